@@ -0,0 +1,208 @@
+"""
+非同步掃描模組
+以 aiohttp 搭配登入後的 cookies 抓取 ticket 列表與詳細內容，供 asyncio 程式（如 MCP 伺服器）直接 await
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict, List
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+import config
+from find_activities import ActivityScanner
+from html_parse import parse_html
+from http_fetcher import HttpTicketFetcher, ticket_id_from_url
+from session_cache import SessionCache
+from throttle import AimdController, RetryableFetchError, THROTTLE_STATUS_CODES, parse_retry_after
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    """每個主機的請求速率限制（固定最小間隔）"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, url: str):
+        """等待直到該主機可以送出下一個請求"""
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def eservice_cookies(driver) -> List[Dict]:
+    """取得瀏覽器中屬於 eService 主機的 cookies（get_cookies 只返回目前頁面網域的 cookies）"""
+    host = urlparse(config.ESERVICE_CONFIG['original_url']).hostname or ''
+    try:
+        cookies = driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+    except Exception as e:
+        logger.warning(f"無法透過 CDP 讀取所有 cookies，改用目前頁面的 cookies: {e}")
+        current_host = urlparse(driver.current_url).hostname or ''
+        if current_host != host:
+            logger.warning(f"瀏覽器目前位於 {current_host}，不是 eService 主機 {host}，cookies 可能不完整")
+        return driver.get_cookies()
+
+    # cookie 網域可能帶開頭的點（適用於子網域）
+    return [cookie for cookie in cookies
+            if host == cookie.get('domain', '').lstrip('.') or host.endswith('.' + cookie.get('domain', '').lstrip('.'))]
+
+
+class AsyncTicketScanner:
+    """以 aiohttp 執行的 ticket 掃描器"""
+
+    def __init__(self, cookies: List[Dict], max_in_flight: int = None, requests_per_second: float = None):
+        self.cookies = cookies
+        self.max_in_flight = max_in_flight or config.ASYNC_SCAN_CONFIG['max_in_flight']
+        self.rate_limiter = HostRateLimiter(requests_per_second or config.ASYNC_SCAN_CONFIG['requests_per_second'])
+        self.throttle = AimdController(max_concurrency=self.max_in_flight, name="async")
+        # 只使用解析方法，不啟動瀏覽器；進度訊息寫入 logging，避免干擾 MCP 的 stdout
+        self.parser = ActivityScanner(use_http_fetch=False, quiet=True)
+
+    @classmethod
+    def from_driver(cls, driver, **kwargs):
+        """使用已登入瀏覽器中屬於 eService 主機的 cookies"""
+        return cls(eservice_cookies(driver), **kwargs)
+
+    @classmethod
+    def from_session_cache(cls, username: str, **kwargs):
+        """使用快取的登入 session，沒有有效快取時返回 None"""
+        cookies = SessionCache().load(config.ESERVICE_CONFIG, username)
+        return cls(cookies, **kwargs) if cookies else None
+
+    def _headers(self) -> Dict[str, str]:
+        """請求標頭（cookies 皆屬於 eService 主機，直接組成 Cookie 標頭）"""
+        return {
+            'User-Agent': config.CHROME_CONFIG['user_agent'],
+            'Cookie': '; '.join(f"{c['name']}={c['value']}" for c in self.cookies),
+        }
+
+    async def _request(self, session, url: str, as_json: bool = False):
+        """受 AIMD 並行數與主機速率限制的 GET 請求，過載或逾時時退避重試，最終失敗返回 None"""
+        for attempt in range(self.throttle.max_retries + 1):
+            try:
+                async with self.throttle.async_slot():
+                    await self.rate_limiter.acquire(url)
+                    # 取得名額並通過速率限制後才開始計時，只量測請求本身
+                    started = time.monotonic()
+                    try:
+                        result = await self._get_once(session, url, as_json)
+                    finally:
+                        latency = time.monotonic() - started
+            except RetryableFetchError as e:
+                self.throttle.record(latency, e.status, e.retry_after)
+                if attempt >= self.throttle.max_retries:
+                    logger.warning(f"非同步請求重試用盡: {e}")
+                    return None
+                delay = self.throttle.backoff_delay(attempt, e.retry_after)
+                self.throttle.stats['retries'] += 1
+                logger.warning(f"{e}，{delay:.1f}s 後第 {attempt + 1} 次重試")
+                await asyncio.sleep(delay)
+                continue
+            self.throttle.record(latency, 200)
+            return result
+
+    async def _get_once(self, session, url: str, as_json: bool):
+        """送出一次 GET 請求；可重試的失敗拋出 RetryableFetchError，其他失敗返回 None"""
+        try:
+            headers = {'Accept': 'application/json'} if as_json else {}
+            async with session.get(url, headers=headers) as response:
+                if response.status in THROTTLE_STATUS_CODES:
+                    raise RetryableFetchError(
+                        f"伺服器回應 HTTP {response.status}: {url}",
+                        status=response.status,
+                        retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                    )
+                final_url = str(response.url).lower()
+                if response.status != 200 or 'login' in urlparse(final_url).path or 'freshworks.com' in final_url:
+                    logger.warning(f"非同步請求未成功: {url} (HTTP {response.status})")
+                    return None
+                if as_json:
+                    return await response.json(content_type=None)
+                return await response.text()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise RetryableFetchError(f"非同步請求逾時或連線失敗: {url} ({e})")
+        except (aiohttp.ClientError, ValueError) as e:
+            logger.warning(f"非同步請求失敗: {url} ({e})")
+            return None
+
+    async def _fetch_list_page(self, session, page: int) -> List[Dict]:
+        """抓取列表第 page 頁並轉為 ticket 信息（HTML 無列表時改用 JSON 端點）"""
+        html = await self._request(session, self.parser.build_list_page_url(page))
+        if html:
+            ticket_infos = await asyncio.to_thread(self._parse_list_html, html)
+            if ticket_infos:
+                return ticket_infos
+
+        api_template = config.HTTP_FETCH_CONFIG.get('ticket_list_api')
+        if not api_template:
+            return []
+        api_url = urljoin(config.ESERVICE_CONFIG['original_url'], api_template.format(
+            order_by=config.SCAN_CONFIG['list_order_by'], per_page=self.parser.list_page_size(), page=page
+        ))
+        payload = await self._request(session, api_url, as_json=True)
+        return await asyncio.to_thread(self.parser.parse_ticket_list_json, payload) if payload else []
+
+    def _parse_list_html(self, html: str) -> List[Dict]:
+        """解析列表 HTML（在工作執行緒中執行）"""
+        soup = parse_html(html, "ticket 列表")
+        elements = self.parser.find_ticket_elements_in_soup(soup, limit=None)
+        return [info for info in (self.parser.extract_ticket_info(e) for e in elements) if info]
+
+    async def _fetch_detail(self, session, ticket_info: Dict) -> List[Dict]:
+        """抓取單一 ticket 的互動內容（頁面含對話時解析 HTML，否則讀取對話 JSON）"""
+        url = ticket_info.get('full_url')
+        if not url:
+            return []
+
+        html = await self._request(session, url)
+        if HttpTicketFetcher.has_conversation_markup(html):
+            return await asyncio.to_thread(lambda: self.parser.parse_ticket_interactions(self.parser.parse_ticket_page(html)))
+
+        api_template = config.HTTP_FETCH_CONFIG.get('conversation_api')
+        ticket_id = ticket_info.get('id') or ticket_id_from_url(url)
+        if not api_template or not ticket_id:
+            return []
+        api_url = urljoin(config.ESERVICE_CONFIG['original_url'], api_template.format(ticket_id=ticket_id))
+        payload = await self._request(session, api_url, as_json=True)
+        return await asyncio.to_thread(self.parser.parse_conversation_json, payload) if payload else []
+
+    async def scan(self, days_back: int = 10, max_tickets: int = None) -> List[Dict]:
+        """掃描最近 days_back 天的 tickets，返回包含 detailed_interactions 的 ticket 信息"""
+        max_tickets = max_tickets or config.SCAN_CONFIG['max_tickets']
+        timeout = aiohttp.ClientTimeout(total=config.ASYNC_SCAN_CONFIG['timeout'])
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+
+        async with aiohttp.ClientSession(headers=self._headers(), timeout=timeout, connector=connector) as session:
+            # 列表依時間遞減排序，逐頁走訪直到超出範圍
+            walk_state = self.parser.new_walk_state()
+            for page in range(1, config.SCAN_CONFIG['max_list_pages'] + 1):
+                ticket_infos = await self._fetch_list_page(session, page)
+                if not ticket_infos:
+                    break
+                stop = self.parser.collect_recent_tickets(ticket_infos, days_back, max_tickets, walk_state)
+                if stop or len(ticket_infos) < self.parser.list_page_size():
+                    break
+
+            recent_activities = walk_state['recent']
+            logger.info(f"非同步掃描: 處理 {walk_state['scanned']} 個 tickets，最近活動 {len(recent_activities)} 個")
+
+            # 所有詳細內容同時排入，實際並行數由 AIMD 控制器與速率限制控制
+            results = await asyncio.gather(*(self._fetch_detail(session, t) for t in recent_activities))
+            for ticket_info, interactions in zip(recent_activities, results):
+                ticket_info['detailed_interactions'] = interactions
+
+        logger.info(f"非同步掃描節流統計: {self.throttle.summary()}")
+        return recent_activities
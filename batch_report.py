@@ -0,0 +1,251 @@
+"""
+批次周報模組
+依名單檔同時掃描多個 FAE 帳號：共用 ChromeDriver 與有並行上限的掃描池、共用限速的 Gemini 服務，
+為每個 FAE 輸出各自的報告，最後生成團隊彙總
+
+名單檔格式（JSON 陣列）:
+[
+    {"name": "Mark", "username": "mark@example.com", "password_env": "MARK_ESERVICE_PASSWORD", "days_back": 7},
+    {"name": "Amy", "username": "amy@example.com", "since": "2024-06-01", "max_tickets": 80}
+]
+- 密碼取自 password_env 指定的環境變數（或 password 欄位），皆未提供時於開始前詢問
+- 日期範圍以 days_back 或 since（YYYY-MM-DD，換算為天數）指定，未指定時使用 BATCH_CONFIG['default_days_back']
+"""
+
+import os
+import re
+import csv
+import json
+import time
+import getpass
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from webdriver_manager.chrome import ChromeDriverManager
+
+import config
+from find_activities import ActivityScanner
+from report_sinks import load_report_data
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+def load_roster(path: str) -> List[Dict]:
+    """讀取名單檔並補齊預設值"""
+    with open(path, 'r', encoding='utf-8') as f:
+        roster = json.load(f)
+    if not isinstance(roster, list):
+        raise ValueError("名單檔必須是 JSON 陣列")
+
+    members = []
+    for index, entry in enumerate(roster, 1):
+        if not entry.get('username'):
+            raise ValueError(f"名單第 {index} 筆缺少 username")
+        members.append({
+            'name': entry.get('name') or entry['username'],
+            'username': entry['username'],
+            'password': entry.get('password') or os.getenv(entry.get('password_env', ''), ''),
+            'days_back': window_days(entry),
+            'max_tickets': entry.get('max_tickets') or config.SCAN_CONFIG['max_tickets'],
+        })
+    return members
+
+
+def window_days(entry: Dict) -> int:
+    """名單項目的掃描天數（since 日期換算為包含今天的天數）"""
+    if entry.get('since'):
+        since = datetime.strptime(entry['since'], "%Y-%m-%d")
+        return max(1, (datetime.now() - since).days + 1)
+    return int(entry.get('days_back') or config.BATCH_CONFIG['default_days_back'])
+
+
+def safe_name(name: str) -> str:
+    """可作為目錄名稱的 FAE 名稱"""
+    return re.sub(r'[^\w.-]+', '_', name).strip('_') or 'fae'
+
+
+def create_shared_gemini_service():
+    """建立所有 FAE 共用的 Gemini 服務（未設定 API Key 或連接失敗時返回 None）"""
+    gemini_api_key = os.getenv('GEMINI_API_KEY')
+    if not gemini_api_key:
+        print("⚠️  未設定 GEMINI_API_KEY 環境變數，批次將只生成基本報告")
+        return None
+
+    try:
+        from gemini_service import GeminiService
+        gemini_service = GeminiService(gemini_api_key)
+        if not gemini_service.test_connection():
+            print("❌ Gemini API 連接失敗，批次將只生成基本報告")
+            return None
+        return gemini_service
+    except Exception as e:
+        logger.warning(f"建立 Gemini 服務失敗，批次將只生成基本報告: {e}")
+        return None
+
+
+class BatchReportRunner:
+    """批次掃描多個 FAE 並生成團隊彙總"""
+
+    def __init__(self, members: List[Dict], output_dir: str = None, max_parallel_scans: int = None):
+        self.members = members
+        self.batch_dir = os.path.join(output_dir or config.BATCH_CONFIG['output_dir'],
+                                      datetime.now().strftime("%Y%m%d_%H%M%S"))
+        self.max_parallel_scans = max(1, min(max_parallel_scans or config.BATCH_CONFIG['max_parallel_scans'], len(members)))
+        self.gemini_service = None
+        self.driver_path = None
+
+    def run(self) -> List[Dict]:
+        """執行批次掃描，返回每個 FAE 的結果"""
+        os.makedirs(self.batch_dir, exist_ok=True)
+
+        # ChromeDriver 與 Gemini 服務只建立一次，所有 FAE 共用
+        self.driver_path = ChromeDriverManager().install()
+        self.gemini_service = create_shared_gemini_service()
+
+        print(f"👥 批次掃描 {len(self.members)} 位 FAE（同時 {self.max_parallel_scans} 位），輸出目錄: {self.batch_dir}")
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_parallel_scans) as executor:
+            try:
+                results = list(executor.map(self.run_member, self.members))
+            except KeyboardInterrupt:
+                # 取消進行中的 Gemini 周報生成，其餘掃描結束後再結束程式
+                if self.gemini_service:
+                    print("\n⏹️  正在取消進行中的 Gemini 周報生成...")
+                    self.gemini_service.cancel()
+                raise
+        elapsed = time.monotonic() - started
+
+        rollup_paths = self.write_rollup(results, elapsed)
+        slowest = max((result['elapsed'] for result in results), default=0.0)
+        total = sum(result['elapsed'] for result in results)
+        print(f"\n⏱️  批次耗時 {elapsed:.0f}s（最慢的 FAE {slowest:.0f}s，逐一執行合計 {total:.0f}s）")
+        print(f"📊 團隊彙總: {rollup_paths['markdown']}")
+        print(f"            {rollup_paths['csv']}")
+        return results
+
+    def run_member(self, member: Dict) -> Dict:
+        """掃描單一 FAE 並生成其報告"""
+        name = member['name']
+        member_dir = os.path.join(self.batch_dir, safe_name(name))
+        scanner = ActivityScanner(
+            report_dir=member_dir,
+            journal_path=os.path.join(config.BATCH_CONFIG['journal_dir'], f"scan_journal_{safe_name(name)}.jsonl"),
+            fae_name=name,
+            gemini_service=self.gemini_service,
+            driver_path=self.driver_path,
+        )
+
+        print(f"▶️  [{name}] 開始掃描（過去 {member['days_back']} 天）")
+        started = time.monotonic()
+        try:
+            success = scanner.scan_tickets_and_generate_report(
+                member['username'], member['password'], member['days_back'], member['max_tickets']
+            )
+        except Exception as e:
+            logger.error(f"[{name}] 批次掃描失敗: {e}")
+            success = False
+        elapsed = time.monotonic() - started
+        print(f"{'✅' if success else '❌'} [{name}] 完成，耗時 {elapsed:.0f}s")
+
+        return {
+            'name': name,
+            'username': member['username'],
+            'days_back': member['days_back'],
+            'success': success,
+            'elapsed': elapsed,
+            'report_paths': scanner.last_report_paths or {},
+            'gemini_report': scanner.last_gemini_report,
+        }
+
+    def summarize_member(self, result: Dict) -> Dict:
+        """由 FAE 的 JSONL 報告統計 tickets、互動、Jira 與狀態"""
+        summary = dict(result, tickets=0, interactions=0, jira_ids=[], statuses=Counter())
+        jsonl_path = result['report_paths'].get('jsonl')
+        if not jsonl_path or not os.path.exists(jsonl_path):
+            return summary
+
+        jira_ids = []
+        for activity in load_report_data(jsonl_path)['activities']:
+            summary['tickets'] += 1
+            summary['statuses'][activity.get('status') or '未知'] += 1
+            interactions = activity.get('detailed_interactions', [])
+            summary['interactions'] += len(interactions)
+            for interaction in interactions:
+                for jira_link in interaction.get('jira_links', []):
+                    if jira_link.get('ticket_id') and jira_link['ticket_id'] not in jira_ids:
+                        jira_ids.append(jira_link['ticket_id'])
+        summary['jira_ids'] = jira_ids
+        return summary
+
+    def display_path(self, path: str) -> str:
+        """相對於批次目錄的路徑（Windows 上位於不同磁碟機時使用絕對路徑）"""
+        try:
+            return os.path.relpath(path, self.batch_dir)
+        except ValueError:
+            return os.path.abspath(path)
+
+    def write_rollup(self, results: List[Dict], elapsed: float) -> Dict[str, str]:
+        """寫入團隊彙總（CSV 與 Markdown）"""
+        summaries = [self.summarize_member(result) for result in results]
+        paths = {
+            'csv': os.path.join(self.batch_dir, "team_rollup.csv"),
+            'markdown': os.path.join(self.batch_dir, "team_rollup.md"),
+        }
+
+        with open(paths['csv'], 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['FAE', '帳號', '掃描天數', '狀態', 'Tickets', '互動數', 'Jira 數', 'Jira 號碼', '耗時(秒)', 'Gemini 周報', 'JSONL'])
+            for summary in summaries:
+                writer.writerow([
+                    summary['name'], summary['username'], summary['days_back'],
+                    '成功' if summary['success'] else '失敗',
+                    summary['tickets'], summary['interactions'], len(summary['jira_ids']),
+                    ', '.join(summary['jira_ids']), f"{summary['elapsed']:.0f}",
+                    summary['gemini_report'] or '', summary['report_paths'].get('jsonl', ''),
+                ])
+
+        team_statuses = Counter()
+        for summary in summaries:
+            team_statuses.update(summary['statuses'])
+
+        lines = [
+            f"# 團隊周報彙總 - {datetime.now().strftime(config.REPORT_CONFIG['date_format'])}",
+            "",
+            f"- FAE 數: {len(summaries)}（成功 {sum(1 for s in summaries if s['success'])}）",
+            f"- Tickets: {sum(s['tickets'] for s in summaries)}，互動: {sum(s['interactions'] for s in summaries)}，"
+            f"Jira: {len({jira_id for s in summaries for jira_id in s['jira_ids']})}",
+            f"- 狀態: {', '.join(f'{status} {count}' for status, count in team_statuses.most_common()) or '無'}",
+            f"- 批次耗時: {elapsed:.0f} 秒",
+            "",
+            "| FAE | 掃描天數 | 狀態 | Tickets | 互動數 | Jira 號碼 | 耗時 | Gemini 周報 |",
+            "|-----|---------|------|---------|-------|----------|------|-------------|",
+        ]
+        for summary in summaries:
+            report = self.display_path(summary['gemini_report']) if summary['gemini_report'] else '無'
+            lines.append(
+                f"| {summary['name']} | {summary['days_back']} | {'成功' if summary['success'] else '失敗'} | "
+                f"{summary['tickets']} | {summary['interactions']} | {', '.join(summary['jira_ids']) or '無'} | "
+                f"{summary['elapsed']:.0f}s | {report} |"
+            )
+
+        with open(paths['markdown'], 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return paths
+
+
+def run_batch(roster_path: str, output_dir: Optional[str] = None) -> List[Dict]:
+    """批次模式入口：讀取名單、補齊缺少的密碼後同時掃描所有 FAE"""
+    print("👥 eService 批次周報生成")
+    print("=" * 60)
+
+    members = load_roster(roster_path)
+    # 所有互動輸入在開始掃描前完成，掃描期間不再詢問
+    for member in members:
+        if not member['password']:
+            member['password'] = getpass.getpass(f"請輸入 {member['name']} ({member['username']}) 的 eService 密碼: ").strip()
+
+    return BatchReportRunner(members, output_dir).run()
@@ -0,0 +1,113 @@
+"""
+Chrome 設定檔效能比較工具
+以相同的 ticket 清單比較標準與精簡（lean）設定的單一 ticket 載入時間與 Chrome 記憶體用量
+"""
+
+import sys
+import time
+import getpass
+import statistics
+
+import config
+from find_activities import ActivityScanner
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def chrome_memory_mb(driver):
+    """計算 ChromeDriver 底下所有 Chrome 行程的 RSS 總和（MB）"""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes if p.is_running()) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def benchmark_profile(lean, username, password, ticket_urls, sample_size):
+    """以指定設定載入 ticket，返回 (載入時間列表, 記憶體峰值 MB, 使用的 ticket URL)"""
+    scanner = ActivityScanner(lean=lean)
+    load_times = []
+    peak_memory = None
+
+    try:
+        scanner.setup_driver()
+        if not scanner.login_to_eservice(username, password):
+            print("❌ 登入失敗")
+            return load_times, peak_memory, ticket_urls
+
+        # 第一次執行時從列表第一頁取得 ticket，之後兩種設定使用相同清單
+        if not ticket_urls:
+            scanner.driver.get(scanner.build_list_page_url(1))
+            for element in scanner.find_ticket_elements(limit=sample_size):
+                ticket_info = scanner.extract_ticket_info(element)
+                if ticket_info and ticket_info.get('full_url'):
+                    ticket_urls.append(ticket_info['full_url'])
+
+        for url in ticket_urls:
+            started = time.monotonic()
+            scanner._load_ticket_page_source(url, scanner.driver)
+            load_times.append(time.monotonic() - started)
+
+            memory = chrome_memory_mb(scanner.driver)
+            if memory is not None:
+                peak_memory = max(peak_memory or 0, memory)
+
+    finally:
+        scanner.close_driver()
+
+    return load_times, peak_memory, ticket_urls
+
+
+def print_result(name, load_times, peak_memory):
+    """輸出單一設定的結果"""
+    if not load_times:
+        print(f"{name:<10} 無資料")
+        return
+    memory_text = f"{peak_memory:.0f} MB" if peak_memory is not None else "N/A (未安裝 psutil)"
+    print(f"{name:<10} 平均 {statistics.mean(load_times):6.2f}s  "
+          f"中位數 {statistics.median(load_times):6.2f}s  "
+          f"最大 {max(load_times):6.2f}s  "
+          f"Chrome 記憶體峰值 {memory_text}")
+
+
+def main():
+    """主函數"""
+    print("⏱️  Chrome 設定檔效能比較 (standard vs lean)")
+    print("=" * 60)
+
+    sample_size = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    username = input("請輸入 eService 帳號: ").strip()
+    password = getpass.getpass("請輸入 eService 密碼: ").strip()
+    if not username or not password:
+        print("❌ 帳號或密碼不能為空")
+        return
+
+    if psutil is None:
+        print("⚠️  未安裝 psutil，將略過記憶體量測 (pip install psutil)")
+
+    print(f"\n📋 headless: {config.CHROME_CONFIG['headless']}，樣本數: {sample_size} 個 tickets")
+
+    ticket_urls = []
+    print("\n▶️  標準設定...")
+    standard_times, standard_memory, ticket_urls = benchmark_profile(False, username, password, ticket_urls, sample_size)
+    print("\n▶️  精簡設定...")
+    lean_times, lean_memory, _ = benchmark_profile(True, username, password, ticket_urls, sample_size)
+
+    print("\n📊 結果 (每個 ticket 的載入時間)")
+    print("-" * 60)
+    print_result("standard", standard_times, standard_memory)
+    print_result("lean", lean_times, lean_memory)
+
+    if standard_times and lean_times:
+        speedup = statistics.mean(standard_times) / max(statistics.mean(lean_times), 1e-6)
+        print(f"\n⚡ 精簡設定平均加速 {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+HTML 轉文字效能比較工具
+比較舊版逐元素 get_text 的對話內容提取與單次走訪的 html_to_text
+
+用法:
+    python benchmark_html_to_text.py [已儲存的 ticket 頁面.html ...]
+未指定檔案時使用合成的多層引用郵件頁面
+"""
+
+import sys
+import time
+import statistics
+
+from bs4 import BeautifulSoup
+
+from html_text import html_to_text
+
+# ticket 頁面中的對話容器
+CONVERSATION_SELECTOR = ('div.ticket-details__conversation__content, '
+                         'div[data-test-id="conversation-content"], div.conversation-content')
+
+
+def legacy_extract_conversation_content(conversation_element):
+    """舊版實作：每個 p/div 呼叫一次 get_text，並以字串 += 累積"""
+    text_content = ""
+    for element in conversation_element.descendants:
+        if element.name is None:
+            text = element.strip()
+            if text:
+                text_content += text + " "
+        elif element.name in ['br']:
+            text_content += "\n"
+        elif element.name in ['p', 'div'] and element.get_text(strip=True):
+            text_content += "\n"
+
+    lines = text_content.split('\n')
+    cleaned_lines = []
+    for line in lines:
+        cleaned_line = ' '.join(line.split())
+        if cleaned_line:
+            cleaned_lines.append(cleaned_line)
+    return '\n'.join(cleaned_lines)
+
+
+def synthetic_page(depth=150, paragraphs=20):
+    """產生多層引用的郵件對話頁面（每層回覆都包住前一層）"""
+    body = ""
+    for level in range(depth):
+        paragraph_html = "".join(
+            f"<p>Reply {level} paragraph {i}: please check the modem log attached.<br>Thanks</p>"
+            for i in range(paragraphs)
+        )
+        body = f'<div class="gmail_quote"><div dir="ltr">{paragraph_html}</div><blockquote>{body}</blockquote></div>'
+    return f'<html><body><div class="conversation-content">{body}</div></body></html>'
+
+
+def time_call(func, element, repeat):
+    """執行 repeat 次，返回 (中位數秒數, 輸出)"""
+    durations = []
+    output = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = func(element)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations), output
+
+
+def benchmark_page(name, html, repeat):
+    """比較單一頁面中所有對話容器的提取時間"""
+    soup = BeautifulSoup(html, 'html.parser')
+    containers = soup.select(CONVERSATION_SELECTOR) or [soup.body or soup]
+    node_count = sum(1 for container in containers for _ in container.descendants)
+
+    legacy_time = new_time = 0.0
+    identical = True
+    for container in containers:
+        legacy_seconds, legacy_output = time_call(legacy_extract_conversation_content, container, repeat)
+        new_seconds, new_output = time_call(html_to_text, container, repeat)
+        legacy_time += legacy_seconds
+        new_time += new_seconds
+        identical = identical and legacy_output == new_output
+
+    speedup = legacy_time / max(new_time, 1e-9)
+    print(f"{name[:40]:<40} {len(containers):>4} 容器 {node_count:>8} 節點  "
+          f"舊版 {legacy_time * 1000:9.1f}ms  新版 {new_time * 1000:8.1f}ms  "
+          f"加速 {speedup:6.1f}x  輸出{'一致' if identical else '不同（註解/script 已略過）'}")
+
+
+def main():
+    """主函數"""
+    print("⏱️  HTML 轉文字效能比較 (legacy vs html_to_text)")
+    print("=" * 60)
+
+    repeat = 3
+    files = sys.argv[1:]
+    if files:
+        for path in files:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                benchmark_page(path, f.read(), repeat)
+    else:
+        for depth in (25, 50, 100, 150):
+            benchmark_page(f"合成頁面（引用深度 {depth}）", synthetic_page(depth), repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,12 @@
 處理 Chrome 瀏覽器的登入和資料抓取
 """
 
-import time
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+from urllib.parse import urlparse
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -17,34 +16,55 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import config
+from wait_engine import WaitEngine, document_ready, url_contains_any, element_count_greater, any_of
+from session_cache import SessionCache, site_origin
+from selector_plan import compile_selectors
+from selector_stats import get_selector_stats
+from chrome_profiles import build_chrome_options, apply_lean_network_blocking, is_lean_profile
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 一次 execute_script 取出活動列表所有列與欄位（依選擇器順序找列表，與 find_element_by_selectors 一致）
+EXTRACT_ACTIVITIES_SCRIPT = """
+var listSelectors = arguments[0], itemSelector = arguments[1], fieldSelectors = arguments[2];
+var list = null;
+for (var i = 0; i < listSelectors.length && !list; i++) {
+    try { list = document.querySelector(listSelectors[i]); } catch (e) {}
+}
+if (!list) { return null; }
+var rows = [];
+list.querySelectorAll(itemSelector).forEach(function (item) {
+    var row = {};
+    for (var name in fieldSelectors) {
+        var element = item.querySelector(fieldSelectors[name]);
+        row[name] = element ? element.innerText.trim() : null;
+    }
+    rows.push(row);
+});
+return {rows: rows};
+"""
+
 class BrowserAutomation:
     """瀏覽器自動化類別"""
     
-    def __init__(self):
+    def __init__(self, lean: Optional[bool] = None):
         self.driver = None
         self.wait = None
+        self.waits = None
+        self.lean = is_lean_profile() if lean is None else lean
         
     def setup_driver(self):
         """設定 Chrome 瀏覽器驅動程式"""
         try:
-            chrome_options = Options()
-            
-            if config.CHROME_CONFIG["headless"]:
-                chrome_options.add_argument("--headless")
-            
-            chrome_options.add_argument(f"--window-size={config.CHROME_CONFIG['window_size']}")
-            chrome_options.add_argument(f"--user-agent={config.CHROME_CONFIG['user_agent']}")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
+            chrome_options = build_chrome_options(lean=self.lean)
             
             # 自動下載並設定 ChromeDriver
             service = Service(ChromeDriverManager().install())
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            if self.lean:
+                apply_lean_network_blocking(self.driver)
             
             # 設定等待時間
             self.driver.implicitly_wait(config.CHROME_CONFIG["implicit_wait"])
@@ -59,6 +79,8 @@ class BrowserAutomation:
     
     def close_driver(self):
         """關閉瀏覽器"""
+        get_selector_stats().save()
+        
         if self.driver:
             try:
                 self.driver.quit()
@@ -71,53 +93,34 @@ class BrowserAutomation:
                 except:
                     pass
     
+    def _get_waits(self) -> WaitEngine:
+        """取得綁定目前 driver 的等待引擎"""
+        if self.waits is None or self.waits.driver is not self.driver:
+            self.waits = WaitEngine(self.driver)
+        return self.waits
+    
     def find_element_by_selectors(self, selectors: str) -> Optional[webdriver.remote.webelement.WebElement]:
-        """使用多個選擇器尋找元素"""
-        selector_list = [s.strip() for s in selectors.split(',')]
-        
-        for selector in selector_list:
-            try:
-                if selector.startswith('#'):
-                    element = self.driver.find_element(By.ID, selector[1:])
-                elif selector.startswith('.'):
-                    element = self.driver.find_element(By.CLASS_NAME, selector[1:])
-                else:
-                    element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                return element
-            except NoSuchElementException:
-                continue
-        
-        return None
+        """使用多個選擇器尋找元素（所有備選共用一個截止時間）"""
+        plan = compile_selectors(selectors)
+        try:
+            return plan.wait(self.driver, config.CHROME_CONFIG["implicit_wait"])
+        except TimeoutException:
+            return None
     
     def wait_for_element(self, selectors: str, timeout: int = 10):
         """等待元素出現"""
-        selector_list = [s.strip() for s in selectors.split(',')]
-        
-        for selector in selector_list:
-            try:
-                if selector.startswith('#'):
-                    element = self.wait.until(
-                        EC.presence_of_element_located((By.ID, selector[1:]))
-                    )
-                elif selector.startswith('.'):
-                    element = self.wait.until(
-                        EC.presence_of_element_located((By.CLASS_NAME, selector[1:]))
-                    )
-                else:
-                    element = self.wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                return element
-            except TimeoutException:
-                continue
-        
-        raise TimeoutException(f"無法找到元素: {selectors}")
+        return compile_selectors(selectors).wait(self.driver, timeout)
     
     def login_to_website(self, site_config: Dict, username: str, password: str) -> bool:
         """登入網站"""
         try:
             logger.info(f"正在登入: {site_config['login_url']}")
             
+            # 優先使用快取的 session，驗證有效時略過完整登入流程
+            if config.SESSION_CACHE_CONFIG['enabled'] and self.restore_cached_session(site_config, username):
+                logger.info("已使用快取的 session，略過登入")
+                return True
+            
             # 檢查是否為雙重登入
             is_dual_login = site_config.get('is_dual_login', False)
             
@@ -138,21 +141,72 @@ class BrowserAutomation:
                     return False
                 
                 logger.info("雙重登入完成")
+                logger.info(self._get_waits().summary())
+                self._save_session(site_config, username)
                 return True
             else:
                 logger.info("單次登入完成")
+                logger.info(self._get_waits().summary())
+                self._save_session(site_config, username)
                 return True
                 
         except Exception as e:
             logger.error(f"登入過程中發生錯誤: {e}")
             return False
     
+    def restore_cached_session(self, site_config: Dict, username: str) -> bool:
+        """還原快取的 cookies 到瀏覽器，並確認未被導回登入頁"""
+        cache = SessionCache()
+        cookies = cache.load(site_config, username)
+        if not cookies:
+            return False
+        
+        # 先用 HTTP 探測，失效時不必動用瀏覽器
+        if not cache.probe(site_config, cookies):
+            cache.invalidate(site_config, username)
+            return False
+        
+        try:
+            waits = self._get_waits()
+            
+            # 必須先進入同一網域才能設定 cookies
+            self.driver.get(site_origin(site_config))
+            for cookie in cookies:
+                cookie = dict(cookie)
+                cookie.pop('sameSite', None)
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception as e:
+                    logger.debug(f"設定 cookie {cookie.get('name')} 失敗: {e}")
+            
+            self.driver.get(site_config['login_url'])
+            waits.until(document_ready(), "快取 session 頁面載入")
+            
+            current_url = self.driver.current_url.lower()
+            if 'login' in urlparse(current_url).path or 'freshworks.com' in current_url:
+                logger.info("快取的 session 在瀏覽器中無效，改為完整登入")
+                cache.invalidate(site_config, username)
+                return False
+            
+            return True
+            
+        except Exception as e:
+            logger.warning(f"還原 session 失敗: {e}")
+            return False
+    
+    def _save_session(self, site_config: Dict, username: str):
+        """保存登入後的 cookies"""
+        if config.SESSION_CACHE_CONFIG['enabled']:
+            SessionCache().save(site_config, username, self.driver.get_cookies())
+    
     def _perform_first_login(self, site_config: Dict, username: str, password: str) -> bool:
         """執行第一次登入"""
         try:
+            waits = self._get_waits()
+            
             # 導航到登入頁面
             self.driver.get(site_config['login_url'])
-            time.sleep(2)
+            waits.until(document_ready(), "第一次登入頁面載入")
             
             # 檢查當前 URL 和頁面標題
             current_url = self.driver.current_url
@@ -191,8 +245,13 @@ class BrowserAutomation:
                 login_button.click()
                 logger.info("已點擊第一次登入按鈕")
                 
-                # 等待登入完成
-                time.sleep(3)
+                # 等待登入完成（重定向到 SSO 或離開登入頁）
+                if site_config.get('is_dual_login', False):
+                    redirected = self._first_login_redirected
+                else:
+                    redirected = lambda driver: "login" not in driver.current_url.lower()
+                waits.until(redirected, "第一次登入重定向", timeout=config.WAIT_CONFIG['login_redirect_timeout'])
+                waits.until(document_ready(), "第一次登入後頁面載入")
                 
                 # 檢查是否成功（對於雙重登入，成功意味著被重定向到第二次登入頁面）
                 new_url = self.driver.current_url
@@ -233,8 +292,19 @@ class BrowserAutomation:
     def _perform_second_login(self, site_config: Dict, username: str, password: str) -> bool:
         """執行第二次登入"""
         try:
-            # 等待頁面載入
-            time.sleep(2)
+            waits = self._get_waits()
+            
+            # 等待進入 Freshworks SSO 頁面，或第二次登入欄位已出現（未重定向到 SSO 時不必等到逾時）
+            sso_host = urlparse(site_config.get('second_login_url', '')).netloc or 'freshworks.com'
+            waits.until(
+                any_of(
+                    url_contains_any(sso_host),
+                    element_count_greater(site_config['selectors']['second_username_input'], 0)
+                ),
+                "等待 SSO 頁面或第二次登入欄位",
+                timeout=config.WAIT_CONFIG['login_redirect_timeout']
+            )
+            waits.until(document_ready(), "SSO 頁面載入")
             
             # 檢查當前 URL 和頁面標題
             current_url = self.driver.current_url
@@ -273,8 +343,13 @@ class BrowserAutomation:
                 login_button.click()
                 logger.info("已點擊第二次登入按鈕")
                 
-                # 等待登入完成
-                time.sleep(3)
+                # 等待登入完成（離開 SSO 頁面進入 Dashboard）
+                waits.until(
+                    lambda driver: sso_host not in driver.current_url.lower() and self._dashboard_reached(driver),
+                    "第二次登入重定向",
+                    timeout=config.WAIT_CONFIG['login_redirect_timeout']
+                )
+                waits.until(document_ready(), "Dashboard 載入")
                 
                 # 檢查是否成功進入 dashboard
                 new_url = self.driver.current_url
@@ -283,14 +358,7 @@ class BrowserAutomation:
                 logger.info(f"第二次登入後標題: {new_title}")
                 
                 # 檢查是否成功進入 dashboard
-                dashboard_indicators = [
-                    'dashboard' in new_url.lower(),
-                    'dashboard' in new_title.lower(),
-                    'freshdesk.com' in new_url.lower() and 'login' not in new_url.lower(),
-                    'e-service.quectel.com' in new_url.lower() and 'login' not in new_url.lower()
-                ]
-                
-                if any(dashboard_indicators):
+                if self._dashboard_reached(self.driver):
                     logger.info("第二次登入成功，已進入 Dashboard")
                     return True
                 else:
@@ -305,8 +373,33 @@ class BrowserAutomation:
             logger.error(f"第二次登入過程中發生錯誤: {e}")
             return False
     
-    def fetch_activities(self, site_config: Dict, days_back: int = 7) -> List[Dict]:
-        """抓取活動資料"""
+    @staticmethod
+    def _first_login_redirected(driver) -> bool:
+        """雙重登入的第一次登入是否已重定向（到 SSO 或 Dashboard）"""
+        url = driver.current_url.lower()
+        return (
+            'freshworks.com' in url or 'freshdesk.com' in url
+            or ('e-service.quectel.com' in url and 'login' not in url)
+        )
+    
+    @staticmethod
+    def _dashboard_reached(driver) -> bool:
+        """是否已進入 Dashboard"""
+        url = driver.current_url.lower()
+        title = driver.title.lower()
+        dashboard_indicators = [
+            'dashboard' in url,
+            'dashboard' in title,
+            'freshdesk.com' in url and 'login' not in url,
+            'e-service.quectel.com' in url and 'login' not in url
+        ]
+        return any(dashboard_indicators)
+    
+    def fetch_activities(self, site_config: Dict, days_back: int = 7, bulk: bool = True) -> List[Dict]:
+        """抓取活動資料（bulk 模式以單次 execute_script 取出所有列）"""
+        if bulk:
+            return self._fetch_activities_bulk(site_config, days_back)
+        
         activities = []
         
         try:
@@ -339,6 +432,61 @@ class BrowserAutomation:
         
         return activities
     
+    def _fetch_activities_bulk(self, site_config: Dict, days_back: int) -> List[Dict]:
+        """以固定次數的瀏覽器往返抓取活動資料"""
+        activities = []
+        
+        try:
+            logger.info(f"正在抓取過去 {days_back} 天的活動（批次模式）")
+            
+            selectors = site_config['selectors']
+            list_selectors = compile_selectors(selectors['activity_list']).alternatives
+            field_selectors = {
+                'date': selectors['activity_date'],
+                'title': selectors['activity_title'],
+                'content': selectors['activity_content'],
+                'status': selectors['activity_status'],
+            }
+            
+            # 等待列表出現；腳本本身不受 implicit wait 影響
+            result = self._get_waits().until(
+                lambda driver: driver.execute_script(
+                    EXTRACT_ACTIVITIES_SCRIPT, list_selectors, selectors['activity_item'], field_selectors
+                ),
+                "活動列表載入",
+                timeout=config.CHROME_CONFIG["implicit_wait"]
+            )
+            if not result:
+                logger.warning("無法找到活動列表")
+                return activities
+            
+            for row in result['rows']:
+                activity = self._build_activity(row, site_config)
+                if activity and self._is_within_date_range(activity['date'], days_back):
+                    activities.append(activity)
+            
+            logger.info(f"成功抓取 {len(activities)} 個活動（共 {len(result['rows'])} 列）")
+            
+        except Exception as e:
+            logger.error(f"抓取活動時發生錯誤: {e}")
+        
+        return activities
+    
+    def _build_activity(self, row: Dict, site_config: Dict) -> Optional[Dict]:
+        """將批次擷取的欄位轉為活動資料，缺少必要欄位時返回 None"""
+        missing = [name for name in ('date', 'title', 'content') if row.get(name) is None]
+        if missing:
+            logger.warning(f"解析活動項目失敗: 缺少欄位 {missing}")
+            return None
+        
+        return {
+            'date': self._parse_date(row['date']),
+            'title': row['title'],
+            'content': row['content'],
+            'status': row.get('status') or "",
+            'source': 'eservice' if 'eservice' in site_config['login_url'].lower() else 'jira'
+        }
+    
     def _parse_activity_item(self, item, site_config: Dict) -> Optional[Dict]:
         """解析單個活動項目"""
         try:
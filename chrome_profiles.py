@@ -0,0 +1,73 @@
+"""
+Chrome 設定檔模組
+提供標準與精簡（lean）兩種瀏覽器設定；精簡設定封鎖圖片、字型、頭像、統計與附件等只讀文字時用不到的資源
+"""
+
+import logging
+
+from selenium.webdriver.chrome.options import Options
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 精簡設定下透過 CDP 封鎖的資源（Network.setBlockedURLs 的萬用字元格式）
+LEAN_BLOCKED_URLS = [
+    # 圖片與頭像
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*/avatars/*", "*gravatar.com*",
+    # 字型
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    # 影音
+    "*.mp4", "*.webm", "*.mp3",
+    # 統計與追蹤
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hotjar.com*", "*segment.io*", "*segment.com*", "*mixpanel.com*", "*newrelic.com*", "*nr-data.net*",
+    "*sentry.io*", "*intercom.io*",
+    # 內嵌附件
+    "*/attachments/*", "*attachment.freshdesk.com*", "*.pdf", "*.zip",
+]
+
+
+def is_lean_profile() -> bool:
+    """config 是否指定使用精簡設定"""
+    return config.CHROME_CONFIG.get('profile', 'standard') == 'lean'
+
+
+def build_chrome_options(lean: bool = False) -> Options:
+    """建立 Chrome 選項（標準或精簡）"""
+    chrome_options = Options()
+
+    if config.CHROME_CONFIG["headless"]:
+        chrome_options.add_argument("--headless")
+
+    chrome_options.add_argument(f"--window-size={config.CHROME_CONFIG['window_size']}")
+    chrome_options.add_argument(f"--user-agent={config.CHROME_CONFIG['user_agent']}")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+
+    if lean:
+        # DOMContentLoaded 即返回，後續由 WaitEngine 等待實際需要的條件
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--mute-audio")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+            "profile.managed_default_content_settings.plugins": 2,
+        })
+
+    return chrome_options
+
+
+def apply_lean_network_blocking(driver):
+    """透過 CDP 封鎖精簡設定不需要的資源"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+        logger.info(f"精簡設定已封鎖 {len(LEAN_BLOCKED_URLS)} 類資源")
+    except Exception as e:
+        logger.warning(f"設定資源封鎖失敗（僅套用 prefs）: {e}")
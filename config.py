@@ -30,6 +30,7 @@ ESERVICE_CONFIG = {
 # Jira 配置
 JIRA_CONFIG = {
     "login_url": "https://ticket.quectel.com/secure/Dashboard.jspa",  # 實際的登入 URL
+    "probe_url": "https://ticket.quectel.com/rest/auth/1/session",  # 驗證 session 用（未登入時回傳 401）
     "selectors": {
         "username_input": "#login-form-username, input[name='os_username'], input[type='text']",
         "password_input": "#login-form-password, input[name='os_password'], input[type='password']",
@@ -50,6 +51,7 @@ REPORT_CONFIG = {
     "date_format": "%Y-%m-%d",
     "time_format": "%H:%M:%S",
     "week_start": "monday",  # monday 或 sunday
+    "max_pending_activities": 200,  # 依列表順序輸出時最多暫存的已完成活動數（超過時跳過前面未完成的 ticket，其完成後直接寫入）
     "categories": {
         "customer_support": ["客戶支援", "客服", "支援"],
         "bug_fixes": ["錯誤修復", "bug", "缺陷"],
@@ -66,5 +68,136 @@ CHROME_CONFIG = {
     "window_size": "1920,1080",
     "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "implicit_wait": 10,
-    "page_load_timeout": 30
+    "page_load_timeout": 30,
+    "profile": "standard"  # standard 或 lean（封鎖圖片/字型/統計/附件並使用 eager 載入策略）
+}
+
+# HTTP 抓取配置 (瀏覽器只負責登入，ticket 詳細內容改用 HTTP 連線池抓取)
+HTTP_FETCH_CONFIG = {
+    "enabled": False,  # 設為 True 啟用 cookie 交接的 HTTP 抓取模式
+    "pool_size": 10,  # 連線池大小
+    "timeout": 15,  # 單一請求逾時（秒）
+    "conversation_api": "/api/_/tickets/{ticket_id}/conversations",  # 對話 JSON 端點，設為 None 可停用
+    "ticket_list_api": "/api/_/tickets?order_by={order_by}&order_type=desc&per_page={per_page}&page={page}"  # 列表 JSON 端點，設為 None 可停用
+}
+
+# 掃描配置
+SCAN_CONFIG = {
+    "concurrency": 1,  # 平行獲取 ticket 詳細內容的 worker 數量（瀏覽器模式下即瀏覽器數量）
+    "incremental": False,  # 設為 True 時只重新抓取列表列有變化的 ticket
+    "state_db": "./.cache/ticket_state.db",  # 增量掃描的 ticket 狀態資料庫
+    "max_tickets": 200,  # 最多收集的最近活動 ticket 數量
+    "max_list_pages": 20,  # ticket 列表最多走訪的頁數
+    "list_order_by": "created_at"  # 列表排序欄位（created_at 或 updated_at，皆為遞減）
+}
+
+# 等待配置 (取代固定 sleep 的條件等待)
+WAIT_CONFIG = {
+    "default_timeout": 10,  # 每一步的預設截止時間（秒）
+    "poll_frequency": 0.2,  # 條件輪詢間隔（秒）
+    "network_quiet_period": 0.5,  # 無新資源請求持續多久視為網路閒置（秒）
+    "login_redirect_timeout": 15,  # 登入後等待重定向的截止時間（秒）
+    "load_more_timeout": 3  # 等待 load-more 按鈕出現的截止時間（秒）
+}
+
+# 登入 session 快取配置
+SESSION_CACHE_CONFIG = {
+    "enabled": True,  # 重複執行時先嘗試使用快取的 session
+    "cache_dir": "~/.ticket_summary/sessions",  # 快取目錄（權限 0700，檔案 0600）
+    "max_age_hours": 12,  # 快取最長有效時間（小時）
+    "probe_timeout": 10  # 驗證 session 的請求逾時（秒）
+}
+
+# 選擇器統計配置 (依歷史命中率調整備選選擇器的嘗試順序)
+SELECTOR_STATS_CONFIG = {
+    "enabled": True,  # 設為 False 時固定使用 config 中的原始順序
+    "path": "./.cache/selector_stats.json",  # 統計檔路徑
+    "decay": 0.9,  # 命中率衰減係數（越小越快反映近期結果）
+    "dead_rate": 0.05,  # 衰減命中率低於此值的備選視為近期未命中，命中的備選可排到它之前；其餘只在確認選到相同元素時調整順序
+    "dead_min_misses": 5  # 至少未命中此次數才視為近期未命中（避免通用備選偶爾勝出一次就提前）
+}
+
+# 網路擷取配置 (直接讀取 ticket 頁面載入的對話 JSON，不解析渲染後的 HTML)
+NETWORK_CAPTURE_CONFIG = {
+    "enabled": False,  # 設為 True 啟用 Chrome performance log / CDP 擷取
+    "conversation_url_pattern": r"/api/_/tickets/\d+/conversations",  # 對話 JSON 請求的 URL 模式
+    "timeout": 10  # 等待對話回應的截止時間（秒）
+}
+
+# 非同步掃描配置 (aiohttp，供 MCP 伺服器等 asyncio 程式使用)
+ASYNC_SCAN_CONFIG = {
+    "max_in_flight": 8,  # 全域同時進行的請求上限
+    "requests_per_second": 4,  # 每個主機每秒請求上限
+    "timeout": 20  # 單一請求逾時（秒）
+}
+
+# 自適應節流配置 (AIMD：延遲穩定時增加並行數，429/5xx 或延遲突增時減半)
+THROTTLE_CONFIG = {
+    "enabled": True,  # 設為 False 時只保留重試，不限制並行數
+    "initial_concurrency": 2,  # 起始並行數
+    "min_concurrency": 1,  # 並行數下限
+    "max_concurrency": 8,  # 並行數上限（實際不超過 worker 數）
+    "increase_step": 1,  # 每個穩定的延遲視窗增加的並行數
+    "decrease_factor": 0.5,  # 過載時並行數的乘數
+    "latency_window": 10,  # 計算 p95 延遲的樣本數
+    "latency_spike_ratio": 2.0,  # p95 超過基準的倍數視為延遲突增
+    "max_retries": 3,  # 單一 ticket 的最多重試次數
+    "backoff_base": 1.0,  # 退避基準秒數（指數增加並加入隨機抖動）
+    "backoff_max": 30.0  # 單次退避上限（秒）
+}
+
+# 掃描日誌配置 (每完成一個 ticket 即寫入，中斷後以 --resume 接續)
+JOURNAL_CONFIG = {
+    "path": "./.cache/scan_journal.jsonl"  # 日誌路徑（報告生成成功後自動刪除）
+}
+
+# HTML 解析配置
+PARSER_CONFIG = {
+    "backend": "auto",  # auto（已安裝 lxml 時使用 lxml）、lxml、html.parser
+    "strain_detail_pages": True,  # ticket 詳細頁面只建立對話相關子樹
+    "detail_class_pattern": r"ticket-details|conversation",  # 篩選子樹時比對的 class（需涵蓋對話容器的外層項目）
+    "report_stats": True  # 輸出每頁解析時間與記憶體峰值
+}
+
+# 郵件串壓縮配置 (移除引用的歷史郵件與各互動間近似重複的段落)
+THREAD_COMPACTION_CONFIG = {
+    "enabled": True,
+    "similarity_threshold": 0.8,  # MinHash 估計的 Jaccard 相似度達此值視為重複
+    "num_perm": 32,  # MinHash 簽章長度
+    "bands": 8,  # LSH 分桶數（num_perm 需可被整除）
+    "shingle_size": 3,  # 每個 shingle 的 token 數
+    "min_paragraph_chars": 40  # 短於此長度的段落不做去重
+}
+
+# Gemini 周報配置
+GEMINI_CONFIG = {
+    "output_format": "html",  # "html": 由模型直接輸出 HTML 表格；"json": 要求結構化 JSON 並以本地模板渲染 HTML（超過預算時同樣依 map_reduce 分批）
+    "compact_prompt": True,  # 送出前移除冗餘欄位與重複內容，改用短鍵名與緊湊分隔符
+    "map_reduce": True,  # prompt 超過預算時改用 map-reduce 摘要
+    "prompt_token_budget": 30000,  # 單次生成 prompt 的 token 上限（以 count_tokens 計算）
+    "map_token_budget": 8000,  # 每批 map prompt 的 token 上限
+    "map_concurrency": 4,  # 同時進行的 map / 分段 reduce 請求數
+    "map_max_output_tokens": 4096,  # 每批 map 摘要的輸出上限
+    "reduce_max_tickets": 40,  # 單次 reduce 最多的 ticket 數，超過時分段生成表格列
+    "stream": True,  # 單次生成 HTML 時使用 stream=True 逐塊寫入輸出檔（預設 output_format "html" 即生效；map-reduce 與 "json" 需完整回應，不串流）
+    "first_token_timeout": 60,  # 等待首個 token 的逾時（秒）
+    "stall_timeout": 30,  # 串流中超過此秒數沒有新內容即判定停滯並放棄
+    "max_concurrent_requests": 4,  # 同時進行的生成請求上限（批次模式下所有 FAE 共用）
+    "requests_per_minute": 10  # 生成請求的速率上限
+}
+
+# Gemini 回應快取配置 (以 prompt + 模型 + 生成配置的雜湊為鍵)
+GEMINI_CACHE_CONFIG = {
+    "enabled": True,  # 內容未變時直接使用快取回應
+    "cache_dir": "./.cache/gemini",  # 快取目錄
+    "max_age_hours": 24 * 14,  # 快取最長保存時間（小時）
+    "max_size_mb": 50  # 快取總大小上限，超過時由最舊的項目開始刪除
+}
+
+# 批次模式配置 (python find_activities.py --batch roster.json)
+BATCH_CONFIG = {
+    "max_parallel_scans": 4,  # 同時掃描的 FAE 數（每個掃描各自登入一個瀏覽器）
+    "default_days_back": 10,  # 名單未指定日期範圍時的掃描天數
+    "journal_dir": "./.cache/batch_journals",  # 每個 FAE 各自的掃描日誌目錄
+    "output_dir": "./reports/batch"  # 批次輸出目錄（每次執行建立一個時間戳子目錄）
 }
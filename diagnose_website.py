@@ -13,8 +13,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import config
+from html_parse import parse_html
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO)
@@ -53,7 +53,7 @@ def diagnose_website(site_name, site_config):
         # 步驟 2: 分析頁面內容
         print("步驟 2: 分析頁面內容...")
         page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+        soup = parse_html(page_source)
         
         # 尋找可能的登入表單
         print("🔍 尋找登入表單...")
@@ -133,7 +133,7 @@ def diagnose_website(site_name, site_config):
             
             # 分析當前頁面
             current_page_source = driver.page_source
-            current_soup = BeautifulSoup(current_page_source, 'html.parser')
+            current_soup = parse_html(current_page_source)
             
             # 檢查是否還在登入頁面或有新的登入表單
             login_indicators = [
@@ -198,7 +198,7 @@ def diagnose_website(site_name, site_config):
                 time.sleep(2)
                 
                 final_page_source = driver.page_source
-                final_soup = BeautifulSoup(final_page_source, 'html.parser')
+                final_soup = parse_html(final_page_source)
                 
                 # 尋找可能的活動記錄區域
                 print("\n🔍 尋找可能的活動記錄區域...")
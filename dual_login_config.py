@@ -12,8 +12,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import config
+from html_parse import parse_html
 import getpass
 
 # 設定日誌
@@ -53,7 +53,7 @@ def analyze_dual_login_flow(site_name, site_config):
         # 步驟 2: 分析第一次登入頁面
         print("步驟 2: 分析第一次登入頁面...")
         initial_page_source = driver.page_source
-        initial_soup = BeautifulSoup(initial_page_source, 'html.parser')
+        initial_soup = parse_html(initial_page_source)
         
         # 分析第一次登入表單
         initial_forms = initial_soup.find_all('form')
@@ -109,7 +109,7 @@ def analyze_dual_login_flow(site_name, site_config):
             
             # 分析第二次登入頁面
             second_page_source = driver.page_source
-            second_soup = BeautifulSoup(second_page_source, 'html.parser')
+            second_soup = parse_html(second_page_source)
             
             # 分析第二次登入表單
             second_forms = second_soup.find_all('form')
@@ -148,7 +148,7 @@ def analyze_dual_login_flow(site_name, site_config):
             
             # 分析最終頁面
             final_page_source = driver.page_source
-            final_soup = BeautifulSoup(final_page_source, 'html.parser')
+            final_soup = parse_html(final_page_source)
             
             # 尋找活動記錄
             print("\n🔍 尋找活動記錄區域...")
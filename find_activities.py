@@ -3,47 +3,114 @@
 自動登入、掃描 ticket、記錄活動並生成報告
 """
 
-import time
+import re
 import logging
-import json
-import csv
 from datetime import datetime, timedelta
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import config
+from http_fetcher import HttpTicketFetcher, ticket_id_from_url
+from ticket_state_store import TicketStateStore
+from selector_plan import compile_selectors
+from selector_stats import get_selector_stats
+from chrome_profiles import build_chrome_options, apply_lean_network_blocking, is_lean_profile
+from network_capture import NetworkCapture, enable_network_logging
+from throttle import AimdController, RetryableFetchError
+from scan_journal import ScanJournal, ticket_key
+from report_sinks import StreamingReportWriter
+from row_index import TicketRowIndex, find_rows_by_date_text
+from html_text import html_to_text
+from html_parse import parse_html, conversation_strainer, get_parse_stats
+from thread_compaction import strip_quoted_html, compact_thread
+from wait_engine import (
+    WaitEngine, document_ready, network_idle, element_count_greater, staleness_of, any_of
+)
 import getpass
+import argparse
 import os
 import glob
+import queue
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# ticket 詳細頁面的 load-more 按鈕與對話容器
+LOAD_MORE_SELECTOR = 'button[data-test-button="load-more"]'
+CONVERSATION_CONTAINER_ALTERNATIVES = [
+    'div.ticket-details__conversation__content',
+    'div[data-test-id="conversation-content"]',
+    'div.conversation-content',
+]
+CONVERSATION_CONTAINER_SELECTOR = ', '.join(CONVERSATION_CONTAINER_ALTERNATIVES)
+
+# 報告輸出目錄
+REPORT_DIR = "./reports"
+
 class ActivityScanner:
     """活動掃描器"""
     
-    def __init__(self):
+    def __init__(self, use_http_fetch=None, concurrency=None, incremental=None, lean=None, capture_network=None,
+                 report_dir=None, journal_path=None, fae_name=None, gemini_service=None, driver_path=None, quiet=False):
         self.driver = None
         self.wait = None
         self.activities = []
+        self.use_http_fetch = config.HTTP_FETCH_CONFIG['enabled'] if use_http_fetch is None else use_http_fetch
+        self.http_fetcher = None
+        self.concurrency = max(1, concurrency or config.SCAN_CONFIG['concurrency'])
+        self.worker_drivers = []
+        self._driver_path = driver_path  # 批次模式共用已安裝的 ChromeDriver
+        self.incremental = config.SCAN_CONFIG['incremental'] if incremental is None else incremental
+        self.lean = is_lean_profile() if lean is None else lean
+        self.capture_network = config.NETWORK_CAPTURE_CONFIG['enabled'] if capture_network is None else capture_network
+        self.state_store = None
+        self.throttle = None
+        self.journal = None
+        self._strainer_misses = 0
+        # 輸出設定（批次模式為每個 FAE 指定各自的目錄、日誌與共用的 Gemini 服務）
+        self.report_dir = report_dir or REPORT_DIR
+        self.journal_path = journal_path
+        self.fae_name = fae_name
+        self.gemini_service = gemini_service
+        self.last_report_paths = None
+        self.last_gemini_report = None
+        # quiet 時進度訊息改寫入 logging（MCP 以 stdout 傳輸 JSON-RPC，不能直接 print）
+        self.quiet = quiet
         
+    def _progress(self, message):
+        """輸出進度訊息"""
+        if self.quiet:
+            logger.info(message)
+        else:
+            print(message)
+    
+    def _create_driver(self):
+        """建立一個 Chrome 瀏覽器實例（依 CHROME_CONFIG 的 headless 與 profile 設定）"""
+        chrome_options = build_chrome_options(lean=self.lean)
+        if self.capture_network:
+            enable_network_logging(chrome_options)
+        
+        # ChromeDriver 只下載一次，避免多個 worker 同時安裝
+        if not self._driver_path:
+            self._driver_path = ChromeDriverManager().install()
+        
+        service = Service(self._driver_path)
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        if self.lean:
+            apply_lean_network_blocking(driver)
+        return driver
+    
     def setup_driver(self):
         """設定瀏覽器"""
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self.driver = self._create_driver()
             self.wait = WebDriverWait(self.driver, 10)
             logger.info("瀏覽器已啟動")
             
@@ -51,8 +118,67 @@ class ActivityScanner:
             logger.error(f"啟動瀏覽器失敗: {e}")
             raise
     
+    def _create_session_driver(self, cookies):
+        """建立共用登入 cookies 的 worker 瀏覽器"""
+        driver = self._create_driver()
+        try:
+            # 必須先進入同一網域才能設定 cookies
+            driver.get(config.ESERVICE_CONFIG['original_url'])
+            for cookie in cookies:
+                cookie = dict(cookie)
+                cookie.pop('sameSite', None)
+                try:
+                    driver.add_cookie(cookie)
+                except Exception as e:
+                    logger.debug(f"設定 cookie {cookie.get('name')} 失敗: {e}")
+            return driver
+        except Exception:
+            driver.quit()
+            raise
+    
+    def setup_worker_drivers(self, count):
+        """建立額外的 worker 瀏覽器，與主瀏覽器共用登入狀態"""
+        if count <= 0:
+            return
+        
+        print(f"🧭 啟動 {count} 個額外瀏覽器進行平行抓取...")
+        cookies = self.driver.get_cookies()
+        
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(self._create_session_driver, cookies) for _ in range(count)]
+            for future in futures:
+                try:
+                    self.worker_drivers.append(future.result())
+                except Exception as e:
+                    logger.warning(f"啟動 worker 瀏覽器失敗: {e}")
+        
+        print(f"✅ 可用瀏覽器數量: {len(self.worker_drivers) + 1}")
+    
+    def setup_http_fetcher(self):
+        """將登入後的瀏覽器 cookies 交給 HTTP 連線池"""
+        try:
+            self.http_fetcher = HttpTicketFetcher()
+            self.http_fetcher.load_cookies_from_driver(self.driver)
+            print("🌐 已啟用 HTTP 抓取模式（瀏覽器僅作為備援）")
+        except Exception as e:
+            logger.warning(f"啟用 HTTP 抓取模式失敗，改用瀏覽器: {e}")
+            self.http_fetcher = None
+    
     def close_driver(self):
         """關閉瀏覽器"""
+        if self.http_fetcher:
+            self.http_fetcher.close()
+            self.http_fetcher = None
+        
+        get_selector_stats().save()
+        
+        for worker_driver in self.worker_drivers:
+            try:
+                worker_driver.quit()
+            except Exception as e:
+                logger.warning(f"關閉 worker 瀏覽器時發生錯誤: {e}")
+        self.worker_drivers = []
+        
         if self.driver:
             try:
                 self.driver.quit()
@@ -95,10 +221,10 @@ class ActivityScanner:
             print(f"📄 頁面標題: {page_title}")
             
             # 等待頁面載入
-            time.sleep(3)
+            WaitEngine(self.driver).until(network_idle(), "Dashboard 網路閒置")
             
             page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            soup = parse_html(page_source, "Dashboard")
             
             # 尋找可能的 ticket 容器
             ticket_selectors = [
@@ -151,17 +277,26 @@ class ActivityScanner:
             logger.error(f"分析 Dashboard 結構失敗: {e}")
             return []
     
-    def find_ticket_elements(self):
-        """尋找 ticket 元素"""
+    def find_ticket_elements(self, limit=50):
+        """尋找 ticket 元素（limit 為 None 時不限制數量）"""
         try:
             print("\n🔍 尋找 ticket 元素...")
             
             # 等待頁面載入
-            time.sleep(2)
+            WaitEngine(self.driver).until(network_idle(), "ticket 列表網路閒置")
             
             page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            soup = parse_html(page_source, "ticket 列表")
+            
+            return self.find_ticket_elements_in_soup(soup, limit)
             
+        except Exception as e:
+            logger.error(f"尋找 ticket 元素失敗: {e}")
+            return []
+    
+    def find_ticket_elements_in_soup(self, soup, limit=50):
+        """從列表頁面的 soup 尋找 ticket 元素"""
+        try:
             # 嘗試多種選擇器來找到 ticket
             ticket_selectors = [
                 'tr[data-ticket-id]', 'tr[data-issue-id]',
@@ -171,38 +306,20 @@ class ActivityScanner:
                 '.item', '.entry', '.record'
             ]
             
+            # 依歷史命中率排序（只在選到相同元素的選擇器之間調整順序）
             found_tickets = []
-            for selector in ticket_selectors:
-                try:
-                    elements = soup.select(selector)
-                    if elements:
-                        print(f"✅ 使用選擇器 '{selector}' 找到 {len(elements)} 個 ticket")
-                        found_tickets.extend(elements[:50])  # 限制為前50個
-                        break
-                except Exception as e:
-                    continue
+            selector, elements = get_selector_stats().select_first('ticket_list', ticket_selectors, soup.select)
+            if elements:
+                self._progress(f"✅ 使用選擇器 '{selector}' 找到 {len(elements)} 個 ticket")
+                found_tickets.extend(elements[:limit])
             
-            # 如果沒有找到，嘗試更通用的方法
+            # 如果沒有找到，嘗試更通用的方法：尋找包含日期的行
             if not found_tickets:
-                print("⚠️  使用通用方法尋找 ticket...")
-                
-                # 尋找包含日期的行
-                date_patterns = ['2024', '2023', '2025', '2026', '2027', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-                
-                for pattern in date_patterns:
-                    elements = soup.find_all(text=lambda text: text and pattern in text)
-                    if elements:
-                        for element in elements:
-                            parent = element.parent
-                            if parent and parent.name in ['tr', 'li', 'div']:
-                                found_tickets.append(parent)
-                                if len(found_tickets) >= 50:
-                                    break
-                        if len(found_tickets) >= 50:
-                            break
+                self._progress("⚠️  使用通用方法尋找 ticket...")
+                found_tickets = find_rows_by_date_text(soup, limit)
             
-            print(f"📋 總共找到 {len(found_tickets)} 個可能的 ticket")
-            return found_tickets[:50]  # 限制為50個
+            self._progress(f"📋 總共找到 {len(found_tickets)} 個可能的 ticket")
+            return found_tickets[:limit]
             
         except Exception as e:
             logger.error(f"尋找 ticket 元素失敗: {e}")
@@ -220,17 +337,21 @@ class ActivityScanner:
                 'url': '',
                 'full_url': '',
                 'source': 'eservice',
+                'list_timestamp': '',  # 列表列上的時間戳，用於增量掃描比對
                 'raw_text': ticket_element.get_text(strip=True)[:500],  # 保存原始文本用於調試
                 'detailed_interactions': []  # 詳細互動內容
             }
             
+            # 走訪一次列元素，建立日期、狀態、連結與時間戳的索引
+            row_index = TicketRowIndex(ticket_element)
+            
             # 提取 ID
             ticket_id = ticket_element.get('data-ticket-id') or ticket_element.get('data-issue-id')
             if ticket_id:
                 ticket_info['id'] = ticket_id
             
             # 提取標題 - 優先尋找 data-test-link 屬性
-            title_element = ticket_element.find('a', attrs={'data-test-link': True})
+            title_element = row_index.title_link
             if title_element:
                 # 提取 data-test-link 下的文字內容，但不包含 span 內的內容
                 title_text = ""
@@ -242,40 +363,21 @@ class ActivityScanner:
                 ticket_info['title'] = title_text.strip()
             else:
                 # 如果沒有找到 data-test-link，嘗試其他方法
-                title_element = ticket_element.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a', 'span', 'div'])
+                title_element = row_index.title_fallback
                 if title_element:
                     ticket_info['title'] = title_element.get_text(strip=True)
             
-            # 提取日期 - 改進的日期提取
-            date_patterns = [
-                '2024', '2023', '2025',  # 年份
-                'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec',  # 英文月份
-                'hours ago', 'days ago', 'minutes ago', 'ago',  # 相對時間
-                'today', 'yesterday',  # 相對日期
-                '分鐘前', '小時前', '天前'  # 中文相對時間
-            ]
-            
-            for pattern in date_patterns:
-                date_elements = ticket_element.find_all(string=lambda text: text and pattern in text)
-                if date_elements:
-                    ticket_info['date'] = date_elements[0].strip()
-                    break
-            
-            # 提取狀態 - 改進的狀態提取
-            status_keywords = ['open', 'closed', 'pending', 'resolved', 'active', 'inactive', 'new', 'old', 'high', 'low', 'medium']
-            for keyword in status_keywords:
-                status_elements = ticket_element.find_all(string=lambda text: text and keyword.lower() in text.lower())
-                if status_elements:
-                    ticket_info['status'] = status_elements[0].strip()
-                    break
+            # 提取日期與狀態（依關鍵字優先順序，取自索引）
+            ticket_info['date'] = row_index.date_text
+            ticket_info['status'] = row_index.status_text
             
             # 提取內容
-            content_element = ticket_element.find(['p', 'div', 'span'])
+            content_element = row_index.content_element
             if content_element:
                 ticket_info['content'] = content_element.get_text(strip=True)[:200]
             
             # 提取 URL
-            link_element = ticket_element.find('a', href=True)
+            link_element = row_index.link
             if link_element:
                 ticket_info['url'] = link_element.get('href')
                 # 構建完整 URL
@@ -284,12 +386,129 @@ class ActivityScanner:
                 else:
                     ticket_info['full_url'] = ticket_info['url']
             
+            if not ticket_info['id']:
+                ticket_info['id'] = ticket_id_from_url(ticket_info['url'])
+            
+            ticket_info['list_timestamp'] = self.extract_list_timestamp(ticket_element, ticket_info, row_index)
+            
             return ticket_info
             
         except Exception as e:
             logger.warning(f"提取 ticket 信息失敗: {e}")
             return None
     
+    def extract_list_timestamp(self, ticket_element, ticket_info, row_index=None):
+        """提取列表列的時間戳：優先使用絕對時間屬性，並結合狀態以偵測列變化"""
+        row_index = row_index or TicketRowIndex(ticket_element)
+        timestamps = row_index.time_datetimes + row_index.year_titles
+        
+        if not timestamps:
+            # 沒有絕對時間時退回列表上的日期文字（相對時間會使 ticket 每天重新抓取一次）
+            timestamps = [ticket_info.get('date', '')]
+        
+        return ' | '.join(timestamps + [ticket_info.get('status', '')])
+    
+    def estimate_days_ago(self, date_str):
+        """估計日期文字距今的天數，無法判斷時返回 None"""
+        if not date_str:
+            return None
+        
+        date_lower = date_str.lower()
+        if any(keyword in date_lower for keyword in ['minute', 'hour', 'second', 'today', 'just now']) or \
+                any(keyword in date_str for keyword in ['分鐘前', '小時前', '秒前']):
+            return 0
+        if 'yesterday' in date_lower:
+            return 1
+        
+        # 相對時間：N days/weeks/months/years ago、N天前
+        units = [('day', 1), ('week', 7), ('month', 30), ('year', 365), ('天', 1), ('週', 7), ('個月', 30), ('年', 365)]
+        for unit, days_per_unit in units:
+            match = re.search(r'(\d+|an?)\s*' + unit, date_lower)
+            if match and ('ago' in date_lower or '前' in date_str):
+                count = 1 if match.group(1) in ('a', 'an') else int(match.group(1))
+                return count * days_per_unit
+        
+        # 具體日期
+        for fmt in ["%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%d/%m/%Y", "%Y年%m月%d日", "%d日%m月%Y年"]:
+            try:
+                return (datetime.now() - datetime.strptime(date_str.strip(), fmt)).days
+            except ValueError:
+                continue
+        
+        return None
+    
+    def build_list_page_url(self, page):
+        """組出 ticket 列表第 page 頁的 URL（依 SCAN_CONFIG 的排序欄位）"""
+        parsed = urlparse(config.ESERVICE_CONFIG['login_url'])
+        params = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True) if key not in ('page', 'orderBy')]
+        params += [('orderBy', config.SCAN_CONFIG['list_order_by']), ('page', str(page))]
+        return urlunparse(parsed._replace(query=urlencode(params)))
+    
+    def walk_ticket_list(self, days_back, max_tickets):
+        """逐頁走訪 ticket 列表（依時間遞減排序），遇到超出範圍的列即停止"""
+        per_page = self.list_page_size()
+        walk_state = self.new_walk_state()
+        
+        for page in range(1, config.SCAN_CONFIG['max_list_pages'] + 1):
+            print(f"\n📄 讀取 ticket 列表第 {page} 頁...")
+            self.driver.get(self.build_list_page_url(page))
+            WaitEngine(self.driver).until(document_ready(), "ticket 列表頁面載入")
+            
+            ticket_elements = self.find_ticket_elements(limit=None)
+            if not ticket_elements:
+                break
+            
+            # 以產生器逐列提取，停止時不再解析其餘的列
+            ticket_infos = (self.extract_ticket_info(element) for element in ticket_elements)
+            stop = self.collect_recent_tickets(ticket_infos, days_back, max_tickets, walk_state)
+            
+            print(f"  📊 已處理 {walk_state['scanned']} 個 tickets，找到 {len(walk_state['recent'])} 個最近活動")
+            
+            if stop or len(ticket_elements) < per_page:
+                break
+        
+        return walk_state['recent'], walk_state['scanned']
+    
+    def list_page_size(self):
+        """ticket 列表每頁的列數（取自列表 URL 的 perPage）"""
+        return int(dict(parse_qsl(urlparse(config.ESERVICE_CONFIG['login_url']).query)).get('perPage', 50))
+    
+    @staticmethod
+    def new_walk_state():
+        """列表走訪的累積狀態"""
+        return {'recent': [], 'seen': set(), 'scanned': 0}
+    
+    def collect_recent_tickets(self, ticket_infos, days_back, max_tickets, walk_state):
+        """處理一頁的 ticket 信息並累積最近活動，返回是否應停止走訪"""
+        for ticket_info in ticket_infos:
+            if not ticket_info:
+                continue
+            
+            ticket_key = ticket_info.get('id') or ticket_info.get('full_url')
+            if ticket_key and ticket_key in walk_state['seen']:
+                continue  # 翻頁期間列表有新 ticket 時可能重複出現
+            walk_state['seen'].add(ticket_key)
+            walk_state['scanned'] += 1
+            
+            self._progress(f"處理 ticket {walk_state['scanned']}: {ticket_info.get('title', 'N/A')[:50]}...")
+            self._progress(f"  📅 日期: {ticket_info.get('date', 'N/A')}  📊 狀態: {ticket_info.get('status', 'N/A')}")
+            
+            if self.check_activity_within_days(ticket_info, days_back):
+                walk_state['recent'].append(ticket_info)
+                self._progress(f"  ✅ 找到最近活動: {ticket_info.get('title', 'N/A')}")
+                if len(walk_state['recent']) >= max_tickets:
+                    self._progress(f"⚠️  已達最大數量 {max_tickets} 個 tickets，停止掃描")
+                    return True
+            else:
+                days_ago = self.estimate_days_ago(ticket_info.get('date', ''))
+                if days_ago is not None and days_ago > days_back:
+                    # 列表依時間遞減排序，之後的列只會更舊
+                    self._progress(f"  ⏹️  已超出最近 {days_back} 天（約 {days_ago} 天前），停止走訪列表")
+                    return True
+                self._progress(f"  ⏰ 不在最近 {days_back} 天內")
+        
+        return False
+    
     def check_activity_within_days(self, ticket_info, days=10):
         """檢查活動是否在指定天數內"""
         try:
@@ -343,61 +562,18 @@ class ActivityScanner:
             return False
     
     def extract_conversation_content(self, conversation_element):
-        """提取對話內容區域的所有文字"""
+        """提取對話內容區域的所有文字（保留段落換行）"""
         try:
-            if not conversation_element:
-                return ""
-            
-            # 使用樹狀遍歷方法提取所有文字內容
-            text_content = ""
-            
-            # 遍歷所有子元素和文字節點
-            for element in conversation_element.descendants:
-                if element.name is None:  # 文字節點
-                    text = element.strip()
-                    if text:
-                        text_content += text + " "
-                elif element.name in ['br']:  # 換行標籤
-                    text_content += "\n"
-                elif element.name in ['p', 'div'] and element.get_text(strip=True):
-                    # 對於段落和 div，添加額外的換行
-                    text_content += "\n"
-            
-            # 清理多餘的空白字符，但保留換行
-            lines = text_content.split('\n')
-            cleaned_lines = []
-            for line in lines:
-                cleaned_line = ' '.join(line.split())
-                if cleaned_line:
-                    cleaned_lines.append(cleaned_line)
-            
-            return '\n'.join(cleaned_lines)
+            return html_to_text(conversation_element)
             
         except Exception as e:
             logger.warning(f"提取對話內容失敗: {e}")
             return conversation_element.get_text(strip=True) if conversation_element else ""
     
     def extract_ltr_content(self, ltr_div):
-        """提取 <div dir="ltr"> 標籤內的完整文字內容"""
+        """提取 <div dir="ltr"> 標籤內的完整文字內容（合併為單行）"""
         try:
-            if not ltr_div:
-                return ""
-            
-            # 獲取所有文字內容，包括嵌套的 div 和 span
-            text_content = ""
-            
-            # 遍歷所有子元素
-            for element in ltr_div.descendants:
-                if element.name is None:  # 文字節點
-                    text = element.strip()
-                    if text:
-                        text_content += text + " "
-                elif element.name in ['br']:  # 換行標籤
-                    text_content += "\n"
-            
-            # 清理多餘的空白字符
-            text_content = ' '.join(text_content.split())
-            return text_content
+            return html_to_text(ltr_div, preserve_blocks=False)
             
         except Exception as e:
             logger.warning(f"提取 LTR 內容失敗: {e}")
@@ -432,8 +608,8 @@ class ActivityScanner:
             logger.warning(f"提取 Jira 連結失敗: {e}")
             return []
     
-    def get_ticket_detailed_interactions(self, ticket_info):
-        """獲取 ticket 的詳細互動內容"""
+    def get_ticket_detailed_interactions(self, ticket_info, driver_pool=None):
+        """獲取 ticket 的詳細互動內容（driver_pool 為平行模式下共用的瀏覽器佇列）"""
         try:
             if not ticket_info.get('full_url'):
                 logger.warning(f"無法獲取詳細內容：缺少完整 URL")
@@ -441,221 +617,458 @@ class ActivityScanner:
             
             print(f"  🔍 獲取詳細內容: {ticket_info['full_url']}")
             
-            # 導航到 ticket 詳細頁面
-            self.driver.get(ticket_info['full_url'])
-            time.sleep(3)
+            # 由節流控制器限制同時進行的 ticket 數，過載或逾時時退避重試
+            if self.throttle is None:
+                self.throttle = AimdController(max_concurrency=1, name="ticket")
+            interactions = self.throttle.call_with_retry(
+                lambda: self._fetch_ticket_interactions(ticket_info['full_url'], driver_pool),
+                ticket_info['full_url']
+            )
             
-            # 等待頁面載入
-            try:
-                self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            except TimeoutException:
-                logger.warning(f"頁面載入超時: {ticket_info['full_url']}")
-                return []
+            print(f"  ✅ 找到 {len(interactions)} 個互動記錄")
+            if self.journal:
+                self.journal.record_ticket(ticket_info, interactions)
+            return interactions
             
-            # 尋找並點擊 "load-more" 按鈕以顯示所有內容
-            try:
-                print(f"  🔍 尋找 load-more 按鈕...")
+        except Exception as e:
+            logger.error(f"獲取詳細互動內容失敗: {e}")
+            return []
+    
+    def _fetch_ticket_interactions(self, ticket_url, driver_pool=None):
+        """抓取一次 ticket 互動內容；過載、逾時或瀏覽器錯誤時拋出 RetryableFetchError"""
+        # HTTP 模式：優先使用登入後的 cookies 直接抓取
+        if self.http_fetcher:
+            interactions = self._fetch_interactions_via_http(ticket_url)
+            if interactions is not None:
+                print(f"  ✅ 透過 HTTP 找到 {len(interactions)} 個互動記錄")
+                return interactions
+            print(f"  🔄 HTTP 回應缺少對話內容，改用瀏覽器載入...")
+        
+        driver = self.driver if driver_pool is None else driver_pool.get()
+        # 等待借用瀏覽器的時間不計入請求延遲
+        self.throttle.start_timer()
+        try:
+            return self._fetch_interactions_with_browser(ticket_url, driver)
+        except WebDriverException as e:
+            raise RetryableFetchError(f"瀏覽器載入失敗: {ticket_url} ({e.msg})")
+        finally:
+            if driver_pool is not None:
+                driver_pool.put(driver)
+    
+    def _fetch_interactions_with_browser(self, ticket_url, driver):
+        """使用瀏覽器獲取互動內容（擷取模式優先讀取對話 JSON）"""
+        if self.capture_network:
+            interactions = self._capture_conversation_json(ticket_url, driver)
+            if interactions is not None:
+                print(f"  📡 由網路回應擷取對話 JSON")
+                return interactions
+            print(f"  🔄 未擷取到對話 JSON，改為解析頁面...")
+        
+        page_source = self._load_ticket_page_source(ticket_url, driver)
+        self.throttle.stop_timer()
+        if page_source is None:
+            raise RetryableFetchError(f"頁面載入超時: {ticket_url}")
+        
+        # 解析頁面內容
+        return self.parse_ticket_interactions(self.parse_ticket_page(page_source))
+    
+    def _capture_conversation_json(self, ticket_url, driver):
+        """載入 ticket 頁面並擷取前端請求的對話 JSON，未擷取到時返回 None"""
+        capture = NetworkCapture(driver)
+        capture.start()
+        driver.get(ticket_url)
+        
+        # 等到至少擷取到一個對話回應且網路閒置（可能分多次請求）
+        idle = network_idle()
+        
+        def conversations_captured(current_driver):
+            capture.poll()
+            return bool(capture.payloads) and idle(current_driver)
+        
+        WaitEngine(driver).until(conversations_captured, "對話 JSON 擷取", timeout=config.NETWORK_CAPTURE_CONFIG['timeout'])
+        capture.poll()
+        self.throttle.stop_timer()
+        
+        if not capture.payloads:
+            return None
+        return self.parse_conversation_json(capture.merged_conversations())
+    
+    def _fetch_interactions_via_http(self, ticket_url):
+        """透過 HTTP session 獲取互動內容，無法取得對話時返回 None"""
+        html = self.http_fetcher.fetch_html(ticket_url)
+        if HttpTicketFetcher.has_conversation_markup(html):
+            self.throttle.stop_timer()
+            return self.parse_ticket_interactions(self.parse_ticket_page(html))
+        
+        # 頁面為前端渲染時，改抓對話 JSON 端點
+        payload = self.http_fetcher.fetch_conversations(ticket_url)
+        self.throttle.stop_timer()
+        if payload is not None:
+            return self.parse_conversation_json(payload)
+        
+        return None
+    
+    def _load_ticket_page_source(self, ticket_url, driver):
+        """使用瀏覽器載入 ticket 頁面並展開所有對話，返回 page_source"""
+        waits = WaitEngine(driver)
+        
+        # 導航到 ticket 詳細頁面
+        driver.get(ticket_url)
+        
+        # 等待頁面載入：精簡設定使用 eager 載入策略，對話容器出現即可，不等待 readyState complete 與網路閒置
+        if self.lean:
+            if not waits.until_plan(compile_selectors(CONVERSATION_CONTAINER_SELECTOR), "ticket 對話容器出現"):
+                # 沒有對話的 ticket 不會出現容器，改以頁面載入完成為準
+                if not waits.until(document_ready(), "ticket 頁面載入"):
+                    logger.warning(f"頁面載入超時: {ticket_url}")
+                    return None
+        else:
+            if not waits.until(document_ready(), "ticket 頁面載入"):
+                logger.warning(f"頁面載入超時: {ticket_url}")
+                return None
+            waits.until(network_idle(), "ticket 網路閒置")
+        
+        # 尋找並點擊 "load-more" 按鈕以顯示所有內容
+        try:
+            print(f"  🔍 尋找 load-more 按鈕...")
+            
+            max_clicks = 5  # 最多點擊5次，避免無限循環
+            click_count = 0
+            
+            while click_count < max_clicks:
+                # 等待按鈕出現（首次給予較長時間，之後按鈕若存在應已渲染）
+                load_more_button = waits.until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, LOAD_MORE_SELECTOR)),
+                    "load-more 按鈕出現",
+                    timeout=config.WAIT_CONFIG['load_more_timeout'] if click_count == 0 else 0.5
+                )
+                if not load_more_button:
+                    break
                 
-                # 使用唯一的選擇器來找到 load-more 按鈕
-                try:
-                    # 等待按鈕出現
-                    load_more_button = self.wait.until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-test-button="load-more"]'))
-                    )
-                    print(f"  ✅ 找到 load-more 按鈕")
-                except TimeoutException:
-                    load_more_button = None
+                # 點擊前記錄對話數量，點擊後等待數量增加或按鈕被重新渲染
+                conversation_count = driver.execute_script(
+                    "return document.querySelectorAll(arguments[0]).length", CONVERSATION_CONTAINER_SELECTOR
+                )
+                print(f"  🔘 點擊第 {click_count + 1} 個 load-more 按鈕...")
+                driver.execute_script("arguments[0].scrollIntoView(true);", load_more_button)
+                load_more_button.click()
+                click_count += 1
                 
-                if load_more_button:
-                    # 滾動到按鈕位置
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", load_more_button)
-                    time.sleep(1)
-                    
-                    # 點擊按鈕
-                    print(f"  🔘 點擊 load-more 按鈕...")
-                    load_more_button.click()
-                    
-                    # 等待內容載入
-                    print(f"  ⏳ 等待內容載入...")
-                    time.sleep(3)
-                    
-                    # 檢查是否還有更多按鈕需要點擊
-                    max_clicks = 5  # 最多點擊5次，避免無限循環
-                    click_count = 1
-                    
-                    while click_count < max_clicks:
-                        try:
-                            # 再次尋找 load-more 按鈕
-                            next_button = self.driver.find_element(By.CSS_SELECTOR, 'button[data-test-button="load-more"]')
-                            if next_button.is_displayed():
-                                print(f"  🔘 點擊第 {click_count + 1} 個 load-more 按鈕...")
-                                self.driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-                                time.sleep(1)
-                                next_button.click()
-                                time.sleep(3)
-                                click_count += 1
-                            else:
-                                break
-                        except:
-                            # 沒有找到更多按鈕，跳出循環
+                print(f"  ⏳ 等待內容載入...")
+                waits.until(
+                    any_of(
+                        element_count_greater(CONVERSATION_CONTAINER_SELECTOR, conversation_count),
+                        staleness_of(load_more_button)
+                    ),
+                    "load-more 內容載入"
+                )
+            
+            if click_count:
+                print(f"  ✅ 總共點擊了 {click_count} 次 load-more 按鈕")
+            else:
+                print(f"  ⚠️  未找到 load-more 按鈕，可能所有內容都已顯示")
+                
+        except Exception as e:
+            logger.warning(f"處理 load-more 按鈕時發生錯誤: {e}")
+            print(f"  ⚠️  處理 load-more 按鈕失敗: {e}")
+            # 繼續執行，即使沒有點擊 load-more 按鈕
+        
+        # 等待內容載入
+        waits.until(network_idle(), "對話內容網路閒置")
+        print(f"  ⏱️  等待耗時 {waits.total_seconds():.1f}s")
+        
+        return driver.page_source
+    
+    def parse_ticket_page(self, html):
+        """解析 ticket 詳細頁面：優先只建立對話相關子樹，篩選結果不足以定位作者與時間時改為完整解析"""
+        if config.PARSER_CONFIG['strain_detail_pages'] and self._strainer_misses < 3:
+            soup = parse_html(html, "ticket 頁面", parse_only=conversation_strainer())
+            containers = soup.select(CONVERSATION_CONTAINER_SELECTOR)
+            # 容器需保留外層項目（父元素），時間戳與作者才找得到
+            if containers and all(container.parent is not soup for container in containers):
+                self._strainer_misses = 0
+                return soup
+            # 連續多頁不符合時停用篩選，避免每頁解析兩次
+            self._strainer_misses += 1
+            if self._strainer_misses == 3:
+                logger.warning("對話子樹篩選連續 3 頁未命中，改為完整解析（請檢查 PARSER_CONFIG['detail_class_pattern']）")
+        return parse_html(html, "ticket 頁面")
+    
+    def parse_ticket_interactions(self, soup):
+        """從 ticket 詳細頁面的 soup 解析互動內容"""
+        interactions = []
+        
+        # 尋找對話內容容器（class → data-test-id → 通用，依歷史命中率排序）
+        selector, conversation_containers = get_selector_stats().select_first(
+            'conversation_container', CONVERSATION_CONTAINER_ALTERNATIVES, soup.select
+        )
+        self._progress(f"  📝 使用 {selector or '所有備選'} 找到 {len(conversation_containers)} 個對話內容容器")
+        
+        # 處理每個對話容器
+        for i, conversation_container in enumerate(conversation_containers[:10]):  # 限制為前10個
+            try:
+                # 尋找相關的時間戳和作者信息
+                timestamp = ''
+                author = ''
+                
+                # 在對話容器的父級或兄弟元素中尋找時間戳和作者
+                parent_container = conversation_container.parent
+                if parent_container:
+                    # 尋找時間戳
+                    time_patterns = ['ago', '前', 'hours', 'days', 'minutes', '小時', '天', '分鐘']
+                    for pattern in time_patterns:
+                        time_elements = parent_container.find_all(string=lambda text: text and pattern in text)
+                        if time_elements:
+                            timestamp = time_elements[0].strip()
                             break
                     
-                    print(f"  ✅ 總共點擊了 {click_count} 次 load-more 按鈕")
+                    # 尋找作者信息
+                    author_selectors = ['.author', '.user', '.name', '.username', '.by', '[data-test-id="user-name"]']
+                    for selector in author_selectors:
+                        author_element = parent_container.select_one(selector)
+                        if author_element:
+                            author = author_element.get_text(strip=True)
+                            break
+                
+                # 提取對話內容
+                conversation_content = self.extract_conversation_content(conversation_container)
+                
+                # 提取 Jira 連結（包含引用的歷史郵件，避免遺漏關聯）
+                jira_links = self.extract_jira_links(conversation_content)
+                
+                # 移除引用的歷史郵件，只保留本次回覆的內容
+                if strip_quoted_html(conversation_container):
+                    new_content = self.extract_conversation_content(conversation_container)
                 else:
-                    print(f"  ⚠️  未找到 load-more 按鈕，可能所有內容都已顯示")
-                    
-            except Exception as e:
-                logger.warning(f"處理 load-more 按鈕時發生錯誤: {e}")
-                print(f"  ⚠️  處理 load-more 按鈕失敗: {e}")
-                # 繼續執行，即使沒有點擊 load-more 按鈕
-            
-            # 等待內容載入
-            print(f"  ⏳ 等待內容載入...")
-            time.sleep(3)
-
-            # 解析頁面內容
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            interactions = []
-            
-            # 使用新的策略：尋找對話內容容器
-            conversation_containers = soup.find_all('div', class_='ticket-details__conversation__content')
-            print(f"  📝 找到 {len(conversation_containers)} 個對話內容容器")
-            
-            # 如果沒有找到對話容器，嘗試其他選擇器
-            if not conversation_containers:
-                conversation_containers = soup.find_all('div', attrs={'data-test-id': 'conversation-content'})
-                print(f"  📝 使用 data-test-id 找到 {len(conversation_containers)} 個對話內容容器")
+                    new_content = conversation_content
+                
+                # 判斷互動類型
+                interaction_type = 'response'
+                if conversation_content:
+                    content_lower = conversation_content.lower()
+                    if 'customer' in content_lower or '客戶' in content_lower:
+                        interaction_type = 'customer_response'
+                    elif 'agent' in content_lower or 'agent responded' in content_lower:
+                        interaction_type = 'agent_response'
+                    elif 'created' in content_lower or 'opened' in content_lower:
+                        interaction_type = 'ticket_created'
+                    elif 'closed' in content_lower or 'resolved' in content_lower:
+                        interaction_type = 'ticket_closed'
+                
+                interaction_info = {
+                    'timestamp': timestamp,
+                    'author': author,
+                    'content': new_content,
+                    'type': interaction_type,
+                    'ltr_content': new_content,
+                    'jira_links': jira_links
+                }
+                
+                interactions.append(interaction_info)
+                self._progress(f"    📝 對話 {i+1}: {conversation_content[:100]}...")
+                if jira_links:
+                    self._progress(f"    🔗 找到 Jira 連結: {[link['ticket_id'] for link in jira_links]}")
             
-            # 如果還是沒有找到，嘗試更通用的方法
-            if not conversation_containers:
-                conversation_containers = soup.find_all('div', class_='conversation-content')
-                print(f"  📝 使用通用選擇器找到 {len(conversation_containers)} 個對話內容容器")
+            except Exception as e:
+                logger.warning(f"處理對話容器失敗: {e}")
+                continue
+        
+        # 如果沒有找到對話容器，回退到舊的 LTR 方法
+        if not interactions:
+            self._progress(f"  🔄 回退到 LTR 方法...")
+            ltr_divs = soup.find_all('div', attrs={'dir': 'ltr'})
+            self._progress(f"  📝 找到 {len(ltr_divs)} 個 <div dir='ltr'> 標籤")
             
-            # 處理每個對話容器
-            for i, conversation_container in enumerate(conversation_containers[:10]):  # 限制為前10個
+            for i, ltr_div in enumerate(ltr_divs[:10]):  # 限制為前10個
                 try:
-                    # 尋找相關的時間戳和作者信息
+                    # 尋找相關的時間戳（在 ltr_div 附近）
+                    parent_container = ltr_div.parent
                     timestamp = ''
-                    author = ''
                     
-                    # 在對話容器的父級或兄弟元素中尋找時間戳和作者
-                    parent_container = conversation_container.parent
-                    if parent_container:
-                        # 尋找時間戳
-                        time_patterns = ['ago', '前', 'hours', 'days', 'minutes', '小時', '天', '分鐘']
-                        for pattern in time_patterns:
-                            time_elements = parent_container.find_all(string=lambda text: text and pattern in text)
-                            if time_elements:
-                                timestamp = time_elements[0].strip()
-                                break
-                        
-                        # 尋找作者信息
-                        author_selectors = ['.author', '.user', '.name', '.username', '.by', '[data-test-id="user-name"]']
-                        for selector in author_selectors:
-                            author_element = parent_container.select_one(selector)
-                            if author_element:
-                                author = author_element.get_text(strip=True)
-                                break
-                    
-                    # 提取對話內容
-                    conversation_content = self.extract_conversation_content(conversation_container)
+                    # 在父容器中尋找時間戳
+                    time_patterns = ['ago', '前', 'hours', 'days', 'minutes', '小時', '天', '分鐘']
+                    for pattern in time_patterns:
+                        time_elements = parent_container.find_all(string=lambda text: text and pattern in text)
+                        if time_elements:
+                            timestamp = time_elements[0].strip()
+                            break
                     
-                    # 提取 Jira 連結
-                    jira_links = self.extract_jira_links(conversation_content)
+                    # 尋找作者信息
+                    author = ''
+                    author_selectors = ['.author', '.user', '.name', '.username', '.by']
+                    for selector in author_selectors:
+                        author_element = parent_container.select_one(selector)
+                        if author_element:
+                            author = author_element.get_text(strip=True)
+                            break
                     
-                    # 判斷互動類型
-                    interaction_type = 'response'
-                    if conversation_content:
-                        content_lower = conversation_content.lower()
-                        if 'customer' in content_lower or '客戶' in content_lower:
-                            interaction_type = 'customer_response'
-                        elif 'agent' in content_lower or 'agent responded' in content_lower:
-                            interaction_type = 'agent_response'
-                        elif 'created' in content_lower or 'opened' in content_lower:
-                            interaction_type = 'ticket_created'
-                        elif 'closed' in content_lower or 'resolved' in content_lower:
-                            interaction_type = 'ticket_closed'
+                    # 提取 LTR 內容
+                    ltr_content = self.extract_ltr_content(ltr_div)
+                    jira_links = self.extract_jira_links(ltr_content)
                     
                     interaction_info = {
                         'timestamp': timestamp,
                         'author': author,
-                        'content': conversation_content[:300],
-                        'type': interaction_type,
-                        'ltr_content': conversation_content[:2000],  # 增加長度限制
+                        'content': ltr_content,
+                        'type': 'response',
+                        'ltr_content': ltr_content,
                         'jira_links': jira_links
                     }
                     
                     interactions.append(interaction_info)
-                    print(f"    📝 對話 {i+1}: {conversation_content[:100]}...")
+                    self._progress(f"    📝 LTR {i+1}: {ltr_content[:100]}...")
                     if jira_links:
-                        print(f"    🔗 找到 Jira 連結: {[link['ticket_id'] for link in jira_links]}")
+                        self._progress(f"    🔗 找到 Jira 連結: {[link['ticket_id'] for link in jira_links]}")
                 
                 except Exception as e:
-                    logger.warning(f"處理對話容器失敗: {e}")
+                    logger.warning(f"處理 LTR div 失敗: {e}")
                     continue
             
-            # 如果沒有找到對話容器，回退到舊的 LTR 方法
-            if not interactions:
-                print(f"  🔄 回退到 LTR 方法...")
-                ltr_divs = soup.find_all('div', attrs={'dir': 'ltr'})
-                print(f"  📝 找到 {len(ltr_divs)} 個 <div dir='ltr'> 標籤")
+            return self.compact_interactions(interactions, ltr_limit=1000)
+        
+        return self.compact_interactions(interactions, ltr_limit=2000)
+    
+    def parse_ticket_list_json(self, payload):
+        """將 ticket 列表 JSON（Freshdesk tickets 格式）轉換為 ticket 信息"""
+        tickets = payload.get('tickets', []) if isinstance(payload, dict) else payload
+        status_names = {2: 'Open', 3: 'Pending', 4: 'Resolved', 5: 'Closed', 6: 'Waiting on Customer', 7: 'Waiting on Third Party'}
+        order_field = config.SCAN_CONFIG['list_order_by']
+        
+        ticket_infos = []
+        for ticket in tickets or []:
+            ticket_id = str(ticket.get('id', ''))
+            url = f"/a/tickets/{ticket_id}"
+            status = status_names.get(ticket.get('status'), str(ticket.get('status', '')))
+            timestamp = ticket.get(order_field) or ticket.get('created_at') or ''
+            
+            ticket_infos.append({
+                'id': ticket_id,
+                'title': ticket.get('subject', ''),
+                'date': timestamp[:10],  # YYYY-MM-DD，可由 check_activity_within_days 解析
+                'status': status,
+                'content': (ticket.get('description_text') or '')[:200],
+                'url': url,
+                'full_url': config.ESERVICE_CONFIG['original_url'] + url,
+                'source': 'eservice',
+                'list_timestamp': f"{ticket.get('updated_at', '')} | {status}",
+                'raw_text': '',
+                'detailed_interactions': []
+            })
+        
+        return ticket_infos
+    
+    def parse_conversation_json(self, payload):
+        """將對話 JSON（Freshdesk conversations 格式）轉換為互動內容"""
+        conversations = payload.get('conversations', []) if isinstance(payload, dict) else payload
+        users = {}
+        if isinstance(payload, dict):
+            for user in payload.get('users', []) or []:
+                users[user.get('id')] = user.get('name') or user.get('email', '')
+        
+        interactions = []
+        for conversation in (conversations or [])[:10]:  # 與頁面解析一致，限制為前10個
+            try:
+                content = conversation.get('body_text') or ''
+                if not content and conversation.get('body'):
+                    content = self.extract_conversation_content(parse_html(conversation['body'], record=False))
                 
-                for i, ltr_div in enumerate(ltr_divs[:10]):  # 限制為前10個
-                    try:
-                        # 尋找相關的時間戳（在 ltr_div 附近）
-                        parent_container = ltr_div.parent
-                        timestamp = ''
-                        
-                        # 在父容器中尋找時間戳
-                        time_patterns = ['ago', '前', 'hours', 'days', 'minutes', '小時', '天', '分鐘']
-                        for pattern in time_patterns:
-                            time_elements = parent_container.find_all(string=lambda text: text and pattern in text)
-                            if time_elements:
-                                timestamp = time_elements[0].strip()
-                                break
-                        
-                        # 尋找作者信息
-                        author = ''
-                        author_selectors = ['.author', '.user', '.name', '.username', '.by']
-                        for selector in author_selectors:
-                            author_element = parent_container.select_one(selector)
-                            if author_element:
-                                author = author_element.get_text(strip=True)
-                                break
-                        
-                        # 提取 LTR 內容
-                        ltr_content = self.extract_ltr_content(ltr_div)
-                        jira_links = self.extract_jira_links(ltr_content)
-                        
-                        interaction_info = {
-                            'timestamp': timestamp,
-                            'author': author,
-                            'content': ltr_content[:300],
-                            'type': 'response',
-                            'ltr_content': ltr_content[:1000],
-                            'jira_links': jira_links
-                        }
-                        
-                        interactions.append(interaction_info)
-                        print(f"    📝 LTR {i+1}: {ltr_content[:100]}...")
-                        if jira_links:
-                            print(f"    🔗 找到 Jira 連結: {[link['ticket_id'] for link in jira_links]}")
-                    
-                    except Exception as e:
-                        logger.warning(f"處理 LTR div 失敗: {e}")
-                        continue
-            
-            print(f"  ✅ 找到 {len(interactions)} 個互動記錄")
-            return interactions
-            
-        except Exception as e:
-            logger.error(f"獲取詳細互動內容失敗: {e}")
-            return []
+                author = users.get(conversation.get('user_id')) or conversation.get('from_email') or ''
+                interaction_type = 'customer_response' if conversation.get('incoming') else 'agent_response'
+                
+                interactions.append({
+                    'timestamp': conversation.get('created_at', ''),
+                    'author': author,
+                    'content': content,
+                    'type': interaction_type,
+                    'ltr_content': content,
+                    'jira_links': self.extract_jira_links(content)
+                })
+            except Exception as e:
+                logger.warning(f"處理對話 JSON 失敗: {e}")
+                continue
+        
+        return self.compact_interactions(interactions, ltr_limit=2000)
+    
+    def compact_interactions(self, interactions, ltr_limit):
+        """移除各互動中引用與重複的郵件內容後，再截斷 content / ltr_content"""
+        texts = compact_thread([interaction['ltr_content'] for interaction in interactions])
+        for interaction, text in zip(interactions, texts):
+            interaction['content'] = text[:300]
+            interaction['ltr_content'] = text[:ltr_limit]
+        return interactions
+    
+    def fetch_detailed_interactions(self, tickets, on_complete):
+        """平行獲取多個 ticket 的詳細互動內容，每個 ticket 完成時呼叫 on_complete(ticket_info, interactions)"""
+        if not tickets:
+            return
+        
+        max_workers = min(self.concurrency, len(tickets))
+        if max_workers <= 1:
+            self.throttle = AimdController(max_concurrency=1, name="ticket")
+            for ticket_info in tickets:
+                on_complete(ticket_info, self.get_ticket_detailed_interactions(ticket_info))
+            print(f"🚦 節流統計: {self.throttle.summary()}")
+            return
+        
+        # 瀏覽器同一時間只能處理一個 ticket，以佇列借用；HTTP 模式只在備援時才借用瀏覽器
+        driver_pool = queue.Queue()
+        for driver in [self.driver] + self.worker_drivers:
+            driver_pool.put(driver)
+        if not self.http_fetcher:
+            max_workers = min(max_workers, driver_pool.qsize())
+        self.throttle = AimdController(max_concurrency=max_workers, name="ticket")
+        
+        def fetch_one(ticket_info):
+            on_complete(ticket_info, self.get_ticket_detailed_interactions(ticket_info, driver_pool))
+        
+        # worker 數為上限，實際並行數由 AIMD 控制器依伺服器回應調整
+        print(f"⚡ 以最多 {max_workers} 個 worker（起始 {self.throttle.concurrency} 個）平行獲取 {len(tickets)} 個 tickets 的詳細內容...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(fetch_one, tickets))
+        print(f"🚦 節流統計: {self.throttle.summary()}")
     
-    def scan_tickets_and_generate_report(self, username, password, days_back=10, max_tickets=50):
-        """掃描 tickets 並生成報告"""
+    def load_interactions_incrementally(self, tickets, on_complete):
+        """增量模式：列表列未變的 ticket 從狀態庫取得互動內容，其餘重新抓取並寫回"""
+        to_fetch = []
+        for ticket_info in tickets:
+            interactions = self.state_store.get_unchanged_interactions(ticket_info.get('id'), ticket_info.get('list_timestamp'))
+            if interactions is not None:
+                on_complete(ticket_info, interactions)
+            else:
+                to_fetch.append(ticket_info)
+        
+        print(f"♻️  增量模式: {len(tickets) - len(to_fetch)} 個 tickets 未變更（使用快取），{len(to_fetch)} 個需要重新抓取")
+        
+        unchanged_content = []
+        
+        def save_and_complete(ticket_info, interactions):
+            # 抓取失敗（空結果）不寫入，避免下次誤用空快取
+            if ticket_info.get('id') and interactions:
+                if not self.state_store.save(ticket_info['id'], ticket_info.get('list_timestamp', ''), interactions, ticket_info.get('title', '')):
+                    unchanged_content.append(ticket_info['id'])
+            on_complete(ticket_info, interactions)
+        
+        self.fetch_detailed_interactions(to_fetch, save_and_complete)
+        
+        if unchanged_content:
+            print(f"   其中 {len(unchanged_content)} 個 tickets 重新抓取後內容無變化")
+    
+    def scan_tickets_and_generate_report(self, username, password, days_back=10, max_tickets=50, resume=False):
+        """掃描 tickets 並生成報告（resume 為 True 時接續上次中斷的掃描日誌）"""
+        self.journal = ScanJournal(self.journal_path)
+        resumed = self.journal.load() if resume else None
+        if resume and not resumed:
+            print("⚠️  沒有可接續的掃描日誌，將重新掃描")
+        elif resumed and resumed['header'].get('username') != username:
+            print("⚠️  掃描日誌屬於其他帳號，將重新掃描")
+            resumed = None
+        elif resumed:
+            # 沿用中斷時的掃描範圍，確保結果一致
+            days_back = resumed['header'].get('days_back', days_back)
+            max_tickets = resumed['header'].get('max_tickets', max_tickets)
+        elif self.journal.exists():
+            print("💡 發現未完成的掃描日誌，可使用 --resume 接續；本次將重新掃描並覆寫")
+        
         try:
             print(f"🚀 開始掃描 eService tickets...")
             print(f"📅 掃描範圍: 過去 {days_back} 天")
@@ -669,217 +1082,145 @@ class ActivityScanner:
             if not self.login_to_eservice(username, password):
                 return False
             
+            # HTTP 模式：瀏覽器只負責登入
+            if self.use_http_fetch:
+                self.setup_http_fetcher()
+            
+            # 平行模式：啟動共用登入狀態的 worker 瀏覽器（HTTP 模式下僅作為備援，只需主瀏覽器）
+            if self.concurrency > 1 and not self.http_fetcher:
+                self.setup_worker_drivers(self.concurrency - 1)
+            
             # 分析 Dashboard 結構
             containers = self.analyze_dashboard_structure()
             
-            # 尋找 ticket 元素
-            ticket_elements = self.find_ticket_elements()
+            if resumed and resumed['tickets'] is not None:
+                # 接續模式：沿用日誌中的列表結果，不再走訪列表
+                recent_activities, scanned_count = resumed['tickets'], resumed['scanned']
+                self.journal.reopen()
+                print(f"♻️  接續掃描日誌: {len(resumed['completed'])}/{len(recent_activities)} 個 tickets 已完成")
+            else:
+                # 逐頁走訪 ticket 列表，超出時間範圍即停止
+                recent_activities, scanned_count = self.walk_ticket_list(days_back, max_tickets)
+                self.journal.start(username, days_back, max_tickets)
+                self.journal.record_list(recent_activities, scanned_count)
             
-            if not ticket_elements:
+            if not scanned_count:
                 print("❌ 未找到任何 ticket 元素")
                 return False
             
-            print(f"\n📋 開始提取 {len(ticket_elements)} 個 tickets 的信息...")
+            # 每個 ticket 完成即寫入報告輸出，互動內容不保留在記憶體中
+            writer = StreamingReportWriter(self.report_dir, days_back)
+            print(f"📝 報告輸出（掃描期間即可查看）: {writer.paths['jsonl']}")
             
-            # 提取 ticket 信息
-            all_tickets = []
-            recent_activities = []
+            # 輸出依 ticket 列表順序，與 worker 完成順序無關
+            list_index = {id(ticket_info): index for index, ticket_info in enumerate(recent_activities)}
             
-            for i, ticket_element in enumerate(ticket_elements):
-                print(f"處理 ticket {i+1}/{len(ticket_elements)}...")
-                
-                ticket_info = self.extract_ticket_info(ticket_element)
-                if ticket_info:
-                    all_tickets.append(ticket_info)
-                    
-                    # 調試：顯示提取的信息
-                    print(f"  📋 標題: {ticket_info.get('title', 'N/A')[:50]}...")
-                    print(f"  📅 日期: {ticket_info.get('date', 'N/A')}")
-                    print(f"  📊 狀態: {ticket_info.get('status', 'N/A')}")
-                    
-                    # 檢查是否在指定天數內
-                    is_recent = self.check_activity_within_days(ticket_info, days_back)
-                    if is_recent:
-                        # 獲取詳細互動內容
-                        detailed_interactions = self.get_ticket_detailed_interactions(ticket_info)
-                        ticket_info['detailed_interactions'] = detailed_interactions
-                        
-                        recent_activities.append(ticket_info)
-                        print(f"  ✅ 找到最近活動: {ticket_info.get('title', 'N/A')}")
-                        print(f"  💬 詳細互動: {len(detailed_interactions)} 個記錄")
-                    else:
-                        print(f"  ⏰ 不在最近 {days_back} 天內")
-                    
-                    # 每處理10個ticket顯示一次進度
-                    if (i + 1) % 10 == 0:
-                        print(f"  📊 已處理 {i+1}/{len(ticket_elements)} 個 tickets，找到 {len(recent_activities)} 個最近活動")
+            def complete_ticket(ticket_info, detailed_interactions):
+                writer.write_at(list_index[id(ticket_info)], dict(ticket_info, detailed_interactions=detailed_interactions))
+                print(f"  💬 {ticket_info.get('title', 'N/A')[:50]}: {len(detailed_interactions)} 個記錄")
+            
+            # 日誌中已完成的 ticket 直接沿用，其餘才抓取
+            completed = resumed['completed'] if resumed else {}
+            pending = []
+            for ticket_info in recent_activities:
+                key = ticket_key(ticket_info)
+                if key in completed:
+                    complete_ticket(ticket_info, completed.pop(key))
+                else:
+                    pending.append(ticket_info)
+            
+            # 獲取詳細互動內容
+            print(f"\n💬 開始獲取 {len(pending)} 個最近活動的詳細互動...")
+            if self.incremental:
+                self.state_store = TicketStateStore()
+                self.load_interactions_incrementally(pending, complete_ticket)
+            else:
+                self.fetch_detailed_interactions(pending, complete_ticket)
+            print(f"🧩 {get_parse_stats().summary()}")
             
             print(f"\n📊 掃描結果:")
-            print(f"   總共處理: {len(all_tickets)} 個 tickets")
+            print(f"   總共處理: {scanned_count} 個 tickets")
             print(f"   最近 {days_back} 天活動: {len(recent_activities)} 個")
             
-            # 生成報告
-            self.generate_report(recent_activities, days_back, username)
+            # 完成報告，成功後才移除日誌
+            if self.finish_report(writer, username):
+                self.journal.finish()
             
             return True
             
         except Exception as e:
             logger.error(f"掃描失敗: {e}")
+            if self.journal.exists():
+                print("💡 已完成的 tickets 已記錄在掃描日誌，可使用 --resume 接續")
             return False
         
         finally:
+            self.journal.close()
             self.close_driver()
+            if self.state_store:
+                self.state_store.close()
+                self.state_store = None
     
     def generate_report(self, activities, days_back, username):
-        """生成報告"""
+        """生成報告（一次寫入所有活動）"""
         try:
             print(f"\n📝 生成報告...")
+            writer = StreamingReportWriter(self.report_dir, days_back)
+            writer.write_all(activities)
+            return self.finish_report(writer, username)
             
-            # 創建報告目錄
-            report_dir = "./reports"
-            os.makedirs(report_dir, exist_ok=True)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # 生成 JSON 報告
-            json_file = f"{report_dir}/eservice_activities_{timestamp}.json"
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'report_date': datetime.now().isoformat(),
-                    'scan_days': days_back,
-                    'total_activities': len(activities),
-                    'activities': activities
-                }, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.error(f"生成報告失敗: {e}")
+            return False
+    
+    def finish_report(self, writer, username):
+        """關閉串流輸出並生成 Gemini 周報"""
+        try:
+            paths = writer.close()
+            self.last_report_paths = paths
             
             # 嘗試生成 Gemini 周報
-            self._generate_gemini_report(json_file, report_dir, username)
-            
-            # 生成 CSV 報告
-            csv_file = f"{report_dir}/eservice_activities_{timestamp}.csv"
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['ID', 'Title', 'Date', 'Status', 'Content', 'URL', 'Source', 'Full_URL', 'Interaction_Count'])
-                
-                for activity in activities:
-                    interaction_count = len(activity.get('detailed_interactions', []))
-                    writer.writerow([
-                        activity.get('id', ''),
-                        activity.get('title', ''),
-                        activity.get('date', ''),
-                        activity.get('status', ''),
-                        activity.get('content', ''),
-                        activity.get('url', ''),
-                        activity.get('source', ''),
-                        activity.get('full_url', ''),
-                        interaction_count
-                    ])
-            
-            # 生成詳細互動 CSV 報告
-            interactions_csv_file = f"{report_dir}/eservice_interactions_{timestamp}.csv"
-            with open(interactions_csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Ticket_ID', 'Ticket_Title', 'Interaction_Timestamp', 'Author', 'Content', 'Type', 'LTR_Content', 'Jira_Links'])
-                
-                for activity in activities:
-                    ticket_id = activity.get('id', '')
-                    ticket_title = activity.get('title', '')
-                    
-                    for interaction in activity.get('detailed_interactions', []):
-                        # 格式化 Jira 連結
-                        jira_links_text = ""
-                        if interaction.get('jira_links'):
-                            jira_links_text = "; ".join([f"{link['ticket_id']}({link['full_url']})" for link in interaction['jira_links']])
-                        
-                        writer.writerow([
-                            ticket_id,
-                            ticket_title,
-                            interaction.get('timestamp', ''),
-                            interaction.get('author', ''),
-                            interaction.get('content', ''),
-                            interaction.get('type', ''),
-                            interaction.get('ltr_content', ''),
-                            jira_links_text
-                        ])
-            
-            # 生成 Jira 連結專用 CSV 報告
-            jira_links_csv_file = f"{report_dir}/eservice_jira_links_{timestamp}.csv"
-            with open(jira_links_csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Ticket_ID', 'Ticket_Title', 'Interaction_Timestamp', 'Jira_Ticket_ID', 'Jira_Full_URL', 'Context'])
-                
-                for activity in activities:
-                    ticket_id = activity.get('id', '')
-                    ticket_title = activity.get('title', '')
-                    
-                    for interaction in activity.get('detailed_interactions', []):
-                        for jira_link in interaction.get('jira_links', []):
-                            writer.writerow([
-                                ticket_id,
-                                ticket_title,
-                                interaction.get('timestamp', ''),
-                                jira_link.get('ticket_id', ''),
-                                jira_link.get('full_url', ''),
-                                jira_link.get('context', '')
-                            ])
-            
-            # 生成 Markdown 報告
-            md_file = f"{report_dir}/eservice_activities_{timestamp}.md"
-            with open(md_file, 'w', encoding='utf-8') as f:
-                f.write(f"# eService 活動報告\n\n")
-                f.write(f"**生成時間**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"**掃描範圍**: 過去 {days_back} 天\n")
-                f.write(f"**活動數量**: {len(activities)} 個\n\n")
-                
-                if activities:
-                    f.write("## 活動列表\n\n")
-                    for i, activity in enumerate(activities, 1):
-                        f.write(f"### {i}. {activity.get('title', '無標題')}\n")
-                        f.write(f"- **ID**: {activity.get('id', 'N/A')}\n")
-                        f.write(f"- **日期**: {activity.get('date', 'N/A')}\n")
-                        f.write(f"- **狀態**: {activity.get('status', 'N/A')}\n")
-                        f.write(f"- **內容**: {activity.get('content', 'N/A')}\n")
-                        if activity.get('full_url'):
-                            f.write(f"- **完整連結**: {activity.get('full_url')}\n")
-                        
-                        # 添加詳細互動內容
-                        interactions = activity.get('detailed_interactions', [])
-                        if interactions:
-                            f.write(f"- **互動記錄**: {len(interactions)} 個\n")
-                            f.write("  \n")
-                            f.write("  #### 詳細互動記錄\n")
-                            for j, interaction in enumerate(interactions, 1):
-                                f.write(f"  **{j}. {interaction.get('type', 'other')}**\n")
-                                f.write(f"  - 時間: {interaction.get('timestamp', 'N/A')}\n")
-                                f.write(f"  - 作者: {interaction.get('author', 'N/A')}\n")
-                                f.write(f"  - 內容: {interaction.get('content', 'N/A')}\n")
-                                if interaction.get('ltr_content'):
-                                    f.write(f"  - **回應訊息**: {interaction.get('ltr_content', 'N/A')}\n")
-                                if interaction.get('jira_links'):
-                                    f.write(f"  - **Jira 連結**:\n")
-                                    for jira_link in interaction['jira_links']:
-                                        f.write(f"    - {jira_link['ticket_id']}: {jira_link['full_url']}\n")
-                                f.write("  \n")
-                        else:
-                            f.write("- **互動記錄**: 無\n")
-                        
-                        f.write("\n")
-                else:
-                    f.write("## 無活動記錄\n\n")
-                    f.write("在指定時間範圍內未找到任何活動記錄。\n")
-            
-            print(f"✅ 報告已生成:")
-            print(f"   📄 JSON: {json_file}")
-            print(f"   📊 CSV: {csv_file}")
-            print(f"   💬 互動 CSV: {interactions_csv_file}")
-            print(f"   🔗 Jira 連結 CSV: {jira_links_csv_file}")
-            print(f"   📝 Markdown: {md_file}")
-            print(f"   🤖 Gemini 周報: 請查看 reports 目錄中的 weekly_report_*.html 文件")
+            self._generate_gemini_report(paths['jsonl'], writer.report_dir, self.fae_name or username)
+            
+            print(f"✅ 報告已生成（{writer.count} 個活動）:")
+            print(f"   📄 JSON: {paths['json']}")
+            print(f"   📄 JSONL: {paths['jsonl']}")
+            print(f"   📊 CSV: {paths['csv']}")
+            print(f"   💬 互動 CSV: {paths['interactions_csv']}")
+            print(f"   🔗 Jira 連結 CSV: {paths['jira_links_csv']}")
+            print(f"   📝 Markdown: {paths['markdown']}")
+            print(f"   🤖 Gemini 周報: 請查看 {writer.report_dir} 目錄中的 weekly_report_*.html 文件")
+            return True
             
         except Exception as e:
             logger.error(f"生成報告失敗: {e}")
+            return False
+    
+    def _run_gemini_report(self, gemini_service, json_file, report_dir, username):
+        """在背景執行緒生成周報；按 Ctrl+C 時取消生成（已串流的部分內容保留為 .partial）"""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(gemini_service.generate_weekly_report, json_file, report_dir, username)
+            while True:
+                try:
+                    # 以逾時輪詢，Windows 上等待期間才能收到 Ctrl+C
+                    return future.result(timeout=0.5)
+                except FuturesTimeoutError:
+                    continue
+                except KeyboardInterrupt:
+                    print("\n⏹️  正在取消 Gemini 周報生成...")
+                    gemini_service.cancel()
+                    return future.result()
     
     def _generate_gemini_report(self, json_file, report_dir, username):
         """使用 Gemini 生成周報"""
+        # 批次模式：使用共用（已測試連接）的 Gemini 服務
+        if self.gemini_service:
+            html_file = self._run_gemini_report(self.gemini_service, json_file, report_dir, username)
+            if html_file:
+                self.last_gemini_report = html_file
+                print(f"   🤖 Gemini 周報: {html_file}")
+            return
+        
         try:
             # 檢查是否有 Gemini API Key
             gemini_api_key = os.getenv('GEMINI_API_KEY')
@@ -906,8 +1247,9 @@ class ActivityScanner:
                     return
                 
                 # 生成周報
-                html_file = gemini_service.generate_weekly_report(json_file, report_dir, username)
+                html_file = self._run_gemini_report(gemini_service, json_file, report_dir, username)
                 if html_file:
+                    self.last_gemini_report = html_file
                     print(f"   🤖 Gemini 周報: {html_file}")
                 
             except Exception as e:
@@ -920,6 +1262,16 @@ class ActivityScanner:
 
 def main():
     """主函數"""
+    parser = argparse.ArgumentParser(description="eService 活動掃描和報告生成工具")
+    parser.add_argument('--resume', action='store_true', help="接續上次中斷的掃描（略過已完成的 tickets）")
+    parser.add_argument('--batch', metavar='ROSTER', help="批次模式：依名單檔（JSON）同時掃描多個 FAE 並生成團隊彙總")
+    args = parser.parse_args()
+    
+    if args.batch:
+        from batch_report import run_batch
+        run_batch(args.batch)
+        return
+    
     print("🔍 eService 活動掃描和報告生成工具")
     print("="*60)
     
@@ -950,11 +1302,15 @@ def main():
     
     # 設定掃描參數
     days_back = 10
-    max_tickets = 50
+    max_tickets = config.SCAN_CONFIG['max_tickets']
     
     print(f"\n📋 掃描設定:")
     print(f"   掃描範圍: 過去 {days_back} 天")
     print(f"   最大掃描數量: {max_tickets} 個 tickets")
+    print(f"   平行 worker 數量: {config.SCAN_CONFIG['concurrency']}")
+    print(f"   增量掃描: {'已啟用' if config.SCAN_CONFIG['incremental'] else '已停用'}")
+    if args.resume:
+        print(f"   ♻️  接續上次中斷的掃描")
     if gemini_api_key:
         print(f"   🤖 AI 周報: 已啟用")
     else:
@@ -968,7 +1324,7 @@ def main():
     
     # 開始掃描
     scanner = ActivityScanner()
-    success = scanner.scan_tickets_and_generate_report(username, password, days_back, max_tickets)
+    success = scanner.scan_tickets_and_generate_report(username, password, days_back, max_tickets, resume=args.resume)
     
     if success:
         print("\n✅ 掃描完成！請查看 reports 目錄中的報告文件。")
@@ -12,8 +12,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import config
+from html_parse import parse_html
 import getpass
 
 # 設定日誌
@@ -85,7 +85,7 @@ def manual_browse_for_activities(site_name, site_config):
             
             # 分析當前頁面
             page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            soup = parse_html(page_source)
             
             # 尋找可能的活動記錄容器
             print("\n🔍 分析當前頁面...")
@@ -0,0 +1,143 @@
+"""
+Gemini 回應快取模組
+以正規化 prompt + 模型名稱 + 生成配置的 SHA-256 為鍵，將回應保存在磁碟上；
+內容未變的周報或 ticket 摘要直接使用快取，不再呼叫 API
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """正規化 prompt：去除每行前後空白與空行，避免排版差異造成快取失效"""
+    return '\n'.join(line.strip() for line in (prompt or '').splitlines() if line.strip())
+
+
+def cache_key(prompt: str, model_name: str, generation_config: Optional[Dict] = None) -> str:
+    """以正規化 prompt、模型名稱與生成配置計算快取鍵"""
+    payload = json.dumps({
+        'model': model_name,
+        'generation_config': generation_config or {},
+        'prompt': normalize_prompt(prompt),
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class GeminiResponseCache:
+    """以內容雜湊為鍵的磁碟快取（依存放時間與總大小淘汰）"""
+
+    def __init__(self, cache_dir: str = None, max_age_hours: float = None, max_size_mb: float = None):
+        cache_config = config.GEMINI_CACHE_CONFIG
+        self.enabled = cache_config['enabled']
+        self.cache_dir = os.path.expanduser(cache_dir or cache_config['cache_dir'])
+        self.max_age_seconds = (max_age_hours or cache_config['max_age_hours']) * 3600
+        self.max_size_bytes = (max_size_mb or cache_config['max_size_mb']) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            self.evict()
+
+    def _path(self, key: str) -> str:
+        """快取檔案路徑（以鍵的前兩碼分目錄）"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """讀取未過期的回應，不存在或過期時返回 None"""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                text = json.load(f)['text']
+        except FileNotFoundError:
+            text = None
+        except Exception as e:
+            logger.warning(f"讀取 Gemini 快取失敗: {e}")
+            text = None
+
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return text
+
+    def contains(self, key: str) -> bool:
+        """是否有未過期的項目（不計入命中統計）"""
+        if not self.enabled:
+            return False
+        try:
+            return time.time() - os.path.getmtime(self._path(key)) <= self.max_age_seconds
+        except OSError:
+            return False
+
+    def put(self, key: str, text: str, label: str = ''):
+        """保存回應（先寫暫存檔再原子性取代）"""
+        if not self.enabled or not text:
+            return
+
+        try:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'label': label, 'saved_at': time.time(), 'text': text}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"保存 Gemini 快取失敗: {e}")
+
+    def evict(self):
+        """刪除過期的項目，總大小超過上限時由最舊的開始刪除"""
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        now = time.time()
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if now - stat.st_mtime > self.max_age_seconds or name.endswith('.tmp'):
+                        os.remove(path)
+                        removed += 1
+                    else:
+                        entries.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+
+        if removed:
+            logger.info(f"Gemini 快取淘汰 {removed} 個項目（剩餘 {total / 1024 / 1024:.1f} MB）")
+
+    def summary(self) -> str:
+        """命中統計摘要"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"Gemini 快取命中 {self.hits} 次、未命中 {self.misses} 次（命中率 {rate:.0f}%）"
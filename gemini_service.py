@@ -4,14 +4,59 @@ Gemini API 服務模塊
 """
 
 import os
+import re
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 import google.generativeai as genai
 
+import config
+
+from gemini_cache import GeminiResponseCache, cache_key
+from gemini_stream import GenerationCancelled, stream_to_file
+from prompt_compaction import FIELD_LEGEND, compact_activities, dumps_compact
+from report_generator import ReportGenerator
+from report_sinks import load_report_data
+from throttle import IntervalRateLimiter
+from thread_compaction import compact_interactions
+
 # 設定日誌
 logger = logging.getLogger(__name__)
 
+# 結構化輸出的 JSON schema（HTML 由本地模板渲染）
+TICKET_REPORT_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'tickets': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'ticket_id': {'type': 'STRING'},
+                    'status': {'type': 'STRING'},
+                    'jira_ids': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+                    'qa_pairs': {
+                        'type': 'ARRAY',
+                        'items': {
+                            'type': 'OBJECT',
+                            'properties': {
+                                'question': {'type': 'STRING'},
+                                'answer': {'type': 'STRING'},
+                            },
+                            'required': ['question', 'answer'],
+                        },
+                    },
+                },
+                'required': ['ticket_id', 'status', 'jira_ids', 'qa_pairs'],
+            },
+        },
+    },
+    'required': ['tickets'],
+}
+
 class GeminiService:
     """Gemini API 服務類"""
     
@@ -24,58 +69,112 @@ class GeminiService:
         # 配置 Gemini
         genai.configure(api_key=self.api_key)
         
+        # 回應快取（內容未變時不再呼叫 API）
+        self.cache = GeminiResponseCache()
+        # SDK 是否支援 response_mime_type / response_schema（舊版改由 prompt 要求 JSON）
+        self._structured_output_supported = True
+        # 進行中各次生成的取消旗標（每次生成各自一個，cancel() 時全部設定）；
+        # 批次模式下多個周報共用同一個服務，每次生成的狀態不保存在服務上
+        self._cancel_events = set()
+        self._cancel_lock = threading.Lock()
+        # 生成請求的並行上限與速率限制（批次模式下多個周報共用同一個服務）
+        self._request_slots = threading.BoundedSemaphore(config.GEMINI_CONFIG['max_concurrent_requests'])
+        self._rate_limiter = IntervalRateLimiter(config.GEMINI_CONFIG['requests_per_minute'] / 60)
+        
         # 初始化模型
         try:
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model_name = 'gemini-2.0-flash-exp'
+            self.model = genai.GenerativeModel(self.model_name)
             logger.info("Gemini 2.0 模型初始化成功")
         except Exception as e:
             logger.error(f"Gemini 模型初始化失敗: {e}")
             raise
     
-    def generate_weekly_report(self, json_file_path, output_dir="./reports", fae_name="FAE"):
-        """生成周報"""
+    def generate_weekly_report(self, json_file_path, output_dir="./reports", fae_name="FAE", cancel_event=None):
+        """生成周報（cancel_event 為本次生成的取消旗標，未提供時自動建立；cancel() 會取消所有進行中的生成）"""
+        cancel_event = cancel_event or threading.Event()
+        with self._cancel_lock:
+            self._cancel_events.add(cancel_event)
+        try:
+            return self._generate_weekly_report(json_file_path, output_dir, fae_name, cancel_event)
+        finally:
+            with self._cancel_lock:
+                self._cancel_events.discard(cancel_event)
+    
+    def _generate_weekly_report(self, json_file_path, output_dir, fae_name, cancel_event):
+        """生成周報（已取消時返回 None，串流的部分內容保留為 .partial）"""
         try:
             print("🤖 正在使用 Gemini 生成周報...")
             
-            # 讀取 JSON 文件
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 讀取報告資料（JSONL 串流輸出或 JSON）
+            data = load_report_data(json_file_path)
+            
+            # 移除引用與重複的郵件內容（舊版報告資料未經壓縮）
+            for activity in data.get('activities', []):
+                activity['detailed_interactions'] = compact_interactions(activity.get('detailed_interactions', []))
             
             # 優化數據 - 減少數據量以避免超時
             # optimized_data = self._optimize_data_for_gemini(data)
             optimized_data = data
             
-            # 構建 prompt
-            prompt = self._build_prompt(optimized_data, fae_name)
+            # 構建 prompt（結構化模式只要求 JSON，HTML 在本地渲染）
+            structured = config.GEMINI_CONFIG['output_format'] == 'json'
+            
+            def build_prompt(compact=None):
+                if structured:
+                    return self._build_map_prompt(optimized_data.get('activities', []), fae_name, structured=True, compact=compact)
+                return self._build_prompt(optimized_data, fae_name, compact=compact)
+            
+            prompt = build_prompt()
             
             print(f"📊 發送數據大小: {len(prompt)} 字符")
             
+            # 生成輸出文件名
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            html_file = f"{output_dir}/weekly_report_{timestamp}.html"
+            streamed = False
+            
             # 調用 Gemini API 並增加超時處理
             try:
-                # 設定生成配置
-                generation_config = genai.types.GenerationConfig(
-                    temperature=0.3,
-                    top_p=0.8,
-                    top_k=40,
-                    max_output_tokens=8192,
-                )
-                
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=generation_config
-                )
+                # 超過 token 預算時改用 map-reduce：先逐批摘要 ticket，再彙整成周報表格
+                prompt_tokens = self._count_tokens(prompt)
+                budget = config.GEMINI_CONFIG['prompt_token_budget']
+                if config.GEMINI_CONFIG['compact_prompt']:
+                    raw_tokens = self._count_tokens(build_prompt(compact=False))
+                    saved = (1 - prompt_tokens / raw_tokens) * 100 if raw_tokens else 0.0
+                    print(f"🗜️  prompt 壓縮: {raw_tokens} → {prompt_tokens} tokens（減少 {saved:.0f}%）")
+                if structured:
+                    # 取得每個 ticket 的結構化摘要，以本地模板渲染；超過預算且啟用 map-reduce 時才分批
+                    # JSON 需完整接收才能解析，此模式不串流；取消旗標在每批摘要開始前檢查
+                    split = config.GEMINI_CONFIG['map_reduce'] and prompt_tokens > budget
+                    print(f"🧱 結構化輸出模式：prompt 共 {prompt_tokens} tokens"
+                          f"{f'，超過預算 {budget}，分批摘要' if split else ''}"
+                          f"{'（JSON 需完整回應才能解析，stream 設定不適用）' if config.GEMINI_CONFIG['stream'] else ''}")
+                    summaries = self._summarize_tickets(optimized_data.get('activities', []), fae_name,
+                                                        prompt_tokens / max(len(prompt), 1), structured=True,
+                                                        cancel_event=cancel_event, single_batch=not split)
+                    report_html = self._render_structured_report(summaries, optimized_data, fae_name)
+                elif config.GEMINI_CONFIG['map_reduce'] and prompt_tokens > budget:
+                    print(f"🧮 prompt 共 {prompt_tokens} tokens，超過預算 {budget}，改用 map-reduce 摘要")
+                    report_html = self._map_reduce_report(optimized_data, fae_name, prompt_tokens / max(len(prompt), 1),
+                                                          cancel_event)
+                elif config.GEMINI_CONFIG['stream']:
+                    # 串流模式：邊接收邊寫入 HTML 文件
+                    report_html = self._generate_streaming(prompt, html_file, prompt_tokens / max(len(prompt), 1),
+                                                           label='weekly_report', cancel_event=cancel_event)
+                    streamed = True
+                else:
+                    report_html = self._generate(prompt, label='weekly_report')
+                print(f"💾 {self.cache.summary()}")
                 
-                if response.text:
-                    # 生成輸出文件名
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    html_file = f"{output_dir}/weekly_report_{timestamp}.html"
-                    
-                    # 確保輸出目錄存在
-                    os.makedirs(output_dir, exist_ok=True)
-                    
-                    # 保存 HTML 文件
-                    with open(html_file, 'w', encoding='utf-8') as f:
-                        f.write(response.text)
+                if report_html:
+                    if not streamed:
+                        # 確保輸出目錄存在
+                        os.makedirs(output_dir, exist_ok=True)
+                        
+                        # 保存 HTML 文件
+                        with open(html_file, 'w', encoding='utf-8') as f:
+                            f.write(report_html)
                     
                     print(f"✅ 周報已生成: {html_file}")
                     return html_file
@@ -83,6 +182,10 @@ class GeminiService:
                     logger.error("Gemini 返回空內容")
                     return None
                     
+            except GenerationCancelled as cancelled:
+                print(f"⏹️  {cancelled}")
+                return None
+                
             except Exception as api_error:
                 logger.error(f"Gemini API 調用失敗: {api_error}")
                 print(f"❌ Gemini API 調用失敗: {api_error}")
@@ -94,6 +197,443 @@ class GeminiService:
             logger.error(f"生成周報失敗: {e}")
             return None
     
+    def _generation_settings(self, max_output_tokens=8192, structured=False):
+        """生成配置參數（同時作為快取鍵的一部分）"""
+        settings = {
+            'temperature': 0.3,
+            'top_p': 0.8,
+            'top_k': 40,
+            'max_output_tokens': max_output_tokens,
+        }
+        if structured:
+            settings['response_mime_type'] = 'application/json'
+            settings['response_schema'] = TICKET_REPORT_SCHEMA
+        return settings
+    
+    def _generation_config(self, max_output_tokens=8192, structured=False):
+        """生成配置"""
+        settings = self._generation_settings(max_output_tokens, structured and self._structured_output_supported)
+        try:
+            return genai.types.GenerationConfig(**settings)
+        except TypeError as e:
+            # 舊版 google-generativeai 不支援結構化輸出參數，改由 prompt 中的格式說明約束
+            logger.warning(f"SDK 不支援結構化輸出，改由 prompt 要求 JSON (pip install -U google-generativeai): {e}")
+            self._structured_output_supported = False
+            return genai.types.GenerationConfig(**self._generation_settings(max_output_tokens))
+    
+    def _cache_key(self, prompt, max_output_tokens=8192, structured=False):
+        """prompt + 模型 + 生成配置的快取鍵"""
+        return cache_key(prompt, self.model_name, self._generation_settings(max_output_tokens, structured))
+    
+    def _generate(self, prompt, max_output_tokens=8192, label='', structured=False, use_cache=True):
+        """呼叫 Gemini 生成內容，相同 prompt 與配置時直接使用快取（use_cache=False 時由呼叫端自行快取）"""
+        key = self._cache_key(prompt, max_output_tokens, structured)
+        cached = self.cache.get(key) if use_cache else None
+        if cached is not None:
+            logger.info(f"使用 Gemini 快取回應: {label or key[:12]}")
+            return cached
+        
+        with self._request_slot():
+            response = self.model.generate_content(prompt, generation_config=self._generation_config(max_output_tokens, structured))
+            text = response.text
+        if use_cache:
+            self.cache.put(key, text, label)
+        return text
+    
+    def _generate_streaming(self, prompt, output_path, tokens_per_char, max_output_tokens=8192, label='', cancel_event=None):
+        """以 stream=True 生成並逐塊寫入 output_path（有快取時直接寫入），完成後保存快取"""
+        key = self._cache_key(prompt, max_output_tokens)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"使用 Gemini 快取回應: {label or key[:12]}")
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(cached)
+            return cached
+        
+        with self._request_slot():
+            response = self.model.generate_content(
+                prompt,
+                generation_config=self._generation_config(max_output_tokens),
+                stream=True
+            )
+            print(f"📡 串流生成中，內容即時寫入: {output_path}")
+            text, metrics = stream_to_file(
+                response,
+                output_path,
+                cancel_event=cancel_event,
+                first_token_timeout=config.GEMINI_CONFIG['first_token_timeout'],
+                stall_timeout=config.GEMINI_CONFIG['stall_timeout'],
+                tokens_per_char=tokens_per_char,
+            )
+        print(f"⏱️  串流完成（{os.path.basename(output_path)}）: {metrics.summary()}")
+        self.cache.put(key, text, label)
+        return text
+    
+    @contextmanager
+    def _request_slot(self):
+        """佔用一個生成請求名額（並行上限 + 每分鐘請求數）"""
+        with self._request_slots:
+            self._rate_limiter.acquire()
+            yield
+    
+    def cancel(self):
+        """取消所有進行中的周報生成（串流中止並保留部分內容，map 階段不再送出新的批次）"""
+        with self._cancel_lock:
+            for cancel_event in self._cancel_events:
+                cancel_event.set()
+    
+    @staticmethod
+    def _check_cancelled(cancel_event, stage):
+        """已取消時拋出 GenerationCancelled"""
+        if cancel_event is not None and cancel_event.is_set():
+            raise GenerationCancelled(f"已取消周報生成（{stage}）")
+    
+    def _count_tokens(self, text):
+        """以 count_tokens 計算 token 數，失敗時以字元數估計"""
+        try:
+            return self.model.count_tokens(text).total_tokens
+        except Exception as e:
+            logger.warning(f"count_tokens 失敗，改以字元數估計: {e}")
+            return len(text) // 2
+    
+    def _map_reduce_report(self, data, fae_name, tokens_per_char, cancel_event=None):
+        """map：並行摘要每批 ticket；reduce：彙整摘要為周報 HTML"""
+        summaries = self._summarize_tickets(data.get('activities', []), fae_name, tokens_per_char, cancel_event=cancel_event)
+        self._check_cancelled(cancel_event, "reduce")
+        
+        # reduce：摘要可放入單一 prompt 時一次生成完整表格，否則分段生成表格列後在本地組合
+        reduce_prompt = self._build_reduce_prompt(summaries, data, fae_name)
+        reduce_tokens = self._count_tokens(reduce_prompt)
+        if reduce_tokens <= config.GEMINI_CONFIG['prompt_token_budget'] and len(summaries) <= config.GEMINI_CONFIG['reduce_max_tickets']:
+            print(f"🧩 reduce: {len(summaries)} 個摘要（{reduce_tokens} tokens）彙整為周報")
+            return self._generate(reduce_prompt, label='reduce')
+        
+        chunk_size = config.GEMINI_CONFIG['reduce_max_tickets']
+        chunks = [summaries[i:i + chunk_size] for i in range(0, len(summaries), chunk_size)]
+        print(f"🧩 reduce: {len(summaries)} 個摘要分 {len(chunks)} 段生成表格列")
+        with ThreadPoolExecutor(max_workers=config.GEMINI_CONFIG['map_concurrency']) as executor:
+            row_chunks = list(executor.map(lambda chunk: self._generate_table_rows(chunk, fae_name), chunks))
+        return self._assemble_table(''.join(row_chunks), data, fae_name)
+    
+    def _summarize_tickets(self, activities, fae_name, tokens_per_char, structured=False, cancel_event=None,
+                           single_batch=False):
+        """map：並行摘要每批 ticket，返回依活動順序排列的摘要（快取以批為單位，內容未變的批直接使用快取；single_batch 時不分批）"""
+        if single_batch:
+            batch_summaries = [self._summarize_batch(activities, fae_name, structured, cancel_event,
+                                                     max_output_tokens=8192)]
+        else:
+            batches = self._batch_activities(activities, fae_name, tokens_per_char, structured)
+            print(f"🗺️  map: {len(activities)} 個 tickets 分為 {len(batches)} 批，"
+                  f"並行數 {config.GEMINI_CONFIG['map_concurrency']}")
+            
+            with ThreadPoolExecutor(max_workers=config.GEMINI_CONFIG['map_concurrency']) as executor:
+                batch_summaries = list(executor.map(
+                    lambda batch: self._summarize_batch(batch, fae_name, structured, cancel_event), batches
+                ))
+        
+        # 以正規化後的 ticket_id 對應摘要；對應不到或重複的摘要記錄後捨棄，不另外產生列
+        ticket_ids = [self._normalize_ticket_id(activity.get('id', '')) for activity in activities]
+        summaries_by_id = {}
+        unmatched = []
+        for summary in (summary for batch_summary in batch_summaries for summary in batch_summary):
+            ticket_id = self._normalize_ticket_id(summary.get('ticket_id', ''))
+            if ticket_id in ticket_ids and ticket_id not in summaries_by_id:
+                summaries_by_id[ticket_id] = summary
+            else:
+                unmatched.append(str(summary.get('ticket_id', '')))
+        if unmatched:
+            logger.warning(f"捨棄 {len(unmatched)} 個對應不到 ticket 或重複的 map 摘要: {', '.join(unmatched)}")
+        
+        # 模型輸出遺漏的 ticket 以本地欄位補上基本摘要
+        missing = [activity for activity, ticket_id in zip(activities, ticket_ids) if ticket_id not in summaries_by_id]
+        if missing:
+            logger.warning(f"map 摘要遺漏 {len(missing)} 個 tickets，使用基本摘要: "
+                           f"{', '.join(str(activity.get('id', '')) for activity in missing)}")
+            for activity, ticket_id in zip(activities, ticket_ids):
+                if ticket_id not in summaries_by_id:
+                    summaries_by_id[ticket_id] = self._local_summary(activity, structured)
+        return [summaries_by_id[ticket_id] for ticket_id in dict.fromkeys(ticket_ids)]
+    
+    @staticmethod
+    def _normalize_ticket_id(ticket_id) -> str:
+        """比對用的 ticket_id：去除空白與開頭的 '#'"""
+        return str(ticket_id).strip().lstrip('#').strip()
+    
+    def _batch_activities(self, activities, fae_name, tokens_per_char, structured=False):
+        """依 token 預算將活動分批（以整份 prompt 的 token/字元比估計，送出前以 count_tokens 確認）"""
+        budget = config.GEMINI_CONFIG['map_token_budget']
+        batches = []
+        current = []
+        current_tokens = 0
+        for activity in activities:
+            activity_tokens = len(self._serialize_activities([activity])) * tokens_per_char
+            if current and current_tokens + activity_tokens > budget:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(activity)
+            current_tokens += activity_tokens
+        if current:
+            batches.append(current)
+        
+        # 估計誤差過大時對半切分（單一 ticket 超過預算時原樣送出）
+        checked = []
+        while batches:
+            batch = batches.pop(0)
+            if (len(batch) > 1 and not self.cache.contains(self._map_cache_key(batch, fae_name, structured))
+                    and self._count_tokens(self._build_map_prompt(batch, fae_name, structured)) > budget):
+                middle = len(batch) // 2
+                batches[:0] = [batch[:middle], batch[middle:]]
+            else:
+                checked.append(batch)
+        return checked
+    
+    def _map_cache_key(self, activities, fae_name, structured=False):
+        """一批 ticket 摘要的快取鍵"""
+        return self._cache_key(self._build_map_prompt(activities, fae_name, structured),
+                               config.GEMINI_CONFIG['map_max_output_tokens'], structured)
+    
+    def _serialize_activities(self, activities, compact=None):
+        """序列化活動資料；壓縮模式移除冗餘欄位並改用短鍵名（附欄位說明）"""
+        if compact is None:
+            compact = config.GEMINI_CONFIG['compact_prompt']
+        if compact:
+            return f"欄位說明：{FIELD_LEGEND}\n{dumps_compact(compact_activities(activities))}"
+        return json.dumps(activities, ensure_ascii=False, separators=(',', ':'))
+    
+    def _ticket_source_hint(self, compact=None):
+        """說明 Ticket ID 與 Jira 號的來源（壓縮模式已移除 url / full_url，改由欄位 i 與 j 取得）"""
+        if compact is None:
+            compact = config.GEMINI_CONFIG['compact_prompt']
+        if compact:
+            return "ticket_id 取自欄位 i；Jira 號（FAE-XXXXXX）出現在互動內容 c 或欄位 j 中"
+        return "ticket_id 取自 /a/tickets/XXXXXX；Jira 號為 https://ticket.quectel.com/browse/FAE-XXXXXX 中的 FAE-XXXXXX"
+    
+    def _build_map_prompt(self, activities, fae_name, structured=False, compact=None):
+        """map 階段的 prompt：每個 ticket 輸出一行 JSON 摘要（結構化模式輸出符合 schema 的 JSON 物件）"""
+        json_data = self._serialize_activities(activities, compact)
+        source_hint = self._ticket_source_hint(compact)
+        if structured:
+            return f"""
+請分析以下 {fae_name} 的 ticket 活動資料，以 JSON 輸出周報內容（HTML 由程式產生）。
+
+要求：
+1. 只輸出 JSON：{{"tickets": [{{"ticket_id": "...", "status": "...", "jira_ids": ["FAE-XXXXXX"], "qa_pairs": [{{"question": "...", "answer": "..."}}]}}]}}
+2. {source_hint}；jira_ids 列出所有 Jira 號，不可遺漏
+3. status 為 Closed、Pending 或 Waiting on Third Party
+4. qa_pairs 依時間順序，question 為 Customer 的問題重點，answer 為 {fae_name} 的回答重點，突出 {fae_name} 的專業能力
+5. 每個 ticket 都要輸出，內容簡潔
+
+數據：
+{json_data}
+"""
+        return f"""
+請逐一摘要以下 {fae_name} 的 ticket 活動資料，之後會彙整成周報。
+
+要求：
+1. 每個 ticket 輸出一行 JSON，不要輸出其他文字或 Markdown
+2. 格式：{{"ticket_id": "...", "title": "...", "status": "...", "date": "...", "jira_ids": ["FAE-XXXXXX"], "qa": "Customer 問題與 {fae_name} 回答重點（200 字內）"}}
+3. {source_hint}；jira_ids 列出所有 Jira 號，不可遺漏
+4. 突出 {fae_name} 的專業能力
+
+數據：
+{json_data}
+"""
+    
+    def _summarize_batch(self, activities, fae_name, structured=False, cancel_event=None, max_output_tokens=None):
+        """map：摘要一批 ticket（只快取可解析的回應），失敗時以本地欄位產生基本摘要；已取消時拋出 GenerationCancelled"""
+        self._check_cancelled(cancel_event, "map")
+        key = self._map_cache_key(activities, fae_name, structured)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"使用 Gemini 快取回應: map {len(activities)} tickets")
+            summaries = self._parse_map_output(cached, structured)
+            if summaries:
+                return summaries
+        
+        try:
+            text = self._generate(
+                self._build_map_prompt(activities, fae_name, structured),
+                max_output_tokens or config.GEMINI_CONFIG['map_max_output_tokens'],
+                structured=structured,
+                use_cache=False
+            )
+            summaries = self._parse_map_output(text, structured)
+            if summaries:
+                self.cache.put(key, text, f"map {len(activities)} tickets")
+                return summaries
+            logger.warning(f"map 摘要無法解析，使用基本摘要（{len(activities)} 個 tickets）")
+        except Exception as e:
+            logger.warning(f"map 摘要失敗，使用基本摘要（{len(activities)} 個 tickets）: {e}")
+        return [self._local_summary(activity, structured) for activity in activities]
+    
+    def _parse_map_output(self, text, structured=False):
+        """解析 map 回應（結構化 JSON 或每行一個 JSON 物件）"""
+        if structured:
+            return self._parse_structured_tickets(text)
+        summaries = []
+        for line in (text or '').splitlines():
+            line = line.strip().strip('`')
+            if line.startswith('{'):
+                try:
+                    summaries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return summaries
+    
+    def _parse_structured_tickets(self, text):
+        """解析結構化輸出（容許 ```json 區塊或直接輸出陣列）"""
+        text = re.sub(r'^\s*```(?:json)?\s*|\s*```\s*$', '', text or '')
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            logger.warning(f"結構化輸出不是有效的 JSON: {e}")
+            return []
+        tickets = data.get('tickets', []) if isinstance(data, dict) else data
+        return [ticket for ticket in tickets if isinstance(ticket, dict)] if isinstance(tickets, list) else []
+    
+    def _local_jira_ids(self, activity):
+        """活動互動中已擷取的 Jira 號"""
+        jira_ids = []
+        for interaction in activity.get('detailed_interactions', []):
+            for jira_link in interaction.get('jira_links', []):
+                if jira_link.get('ticket_id') and jira_link['ticket_id'] not in jira_ids:
+                    jira_ids.append(jira_link['ticket_id'])
+        return jira_ids
+    
+    def _local_summary(self, activity, structured=False):
+        """不經 Gemini 的基本摘要"""
+        jira_ids = self._local_jira_ids(activity)
+        if structured:
+            # 客戶的回覆為問題，其後的回覆為回答
+            qa_pairs = []
+            for interaction in activity.get('detailed_interactions', []):
+                content = (interaction.get('content') or '')[:200]
+                if not content:
+                    continue
+                if interaction.get('type') == 'customer_response':
+                    qa_pairs.append({'question': content, 'answer': ''})
+                elif qa_pairs and not qa_pairs[-1]['answer']:
+                    qa_pairs[-1]['answer'] = content
+                else:
+                    qa_pairs.append({'question': '', 'answer': content})
+            return {
+                'ticket_id': activity.get('id', ''),
+                'status': activity.get('status', ''),
+                'jira_ids': jira_ids,
+                'qa_pairs': qa_pairs,
+            }
+        
+        qa = [interaction['content'][:100] for interaction in activity.get('detailed_interactions', []) if interaction.get('content')]
+        return {
+            'ticket_id': activity.get('id', ''),
+            'title': activity.get('title', ''),
+            'status': activity.get('status', ''),
+            'date': activity.get('date', ''),
+            'jira_ids': jira_ids,
+            'qa': ' / '.join(qa)[:300],
+        }
+    
+    def _build_reduce_prompt(self, summaries, data, fae_name):
+        """reduce 階段的 prompt：以摘要生成完整周報"""
+        summary_lines = '\n'.join(json.dumps(summary, ensure_ascii=False) for summary in summaries)
+        return f"""
+請根據以下 {fae_name} 的 ticket 摘要（每行一個 ticket）生成 HTML 表格格式的周報。
+
+數據包含：
+- 活動數量：{len(summaries)} 個
+- 掃描範圍：過去 {data.get('scan_days', 0)} 天
+- FAE：{fae_name}
+
+要求：
+1. 每個 ticket 一列，包含：Ticket ID、Jira號碼、標題、狀態(Closed, Pending, Waiting on Third Party)、客戶與我們的問答重點，Customer一問，{fae_name}一答，都在同一個格子內
+2. 保留所有 Jira 號碼
+3. 分析回應重點，突出 {fae_name} 的專業能力
+4. 只輸出 HTML 表格，不要其他內容
+5. 使用美觀的 CSS 樣式
+
+摘要：
+{summary_lines}
+"""
+    
+    def _generate_table_rows(self, summaries, fae_name):
+        """分段 reduce：只生成 <tr> 表格列，失敗時以摘要欄位直接產生"""
+        summary_lines = '\n'.join(json.dumps(summary, ensure_ascii=False) for summary in summaries)
+        prompt = f"""
+請將以下 ticket 摘要（每行一個 ticket）轉成 HTML 表格列。
+
+要求：
+1. 每個 ticket 輸出一個 <tr>，依序包含 6 個 <td>：Ticket ID、Jira號碼、標題、狀態、日期、問答重點（Customer一問，{fae_name}一答）
+2. 只輸出 <tr>...</tr>，不要 <table>、CSS 或其他文字
+3. 保留所有 Jira 號碼
+
+摘要：
+{summary_lines}
+"""
+        try:
+            text = self._generate(prompt, label=f"table_rows {len(summaries)} tickets")
+            rows = ''.join(re.findall(r'<tr\b.*?</tr>', text or '', re.DOTALL | re.IGNORECASE))
+            if rows:
+                return rows
+        except Exception as e:
+            logger.warning(f"生成表格列失敗，使用摘要欄位: {e}")
+        
+        return ''.join(
+            f"<tr><td>{summary.get('ticket_id', '')}</td><td>{', '.join(summary.get('jira_ids', [])) or '無'}</td>"
+            f"<td>{summary.get('title', '')}</td><td>{summary.get('status', '')}</td>"
+            f"<td>{summary.get('date', '')}</td><td>{summary.get('qa', '')}</td></tr>"
+            for summary in summaries
+        )
+    
+    def _render_structured_report(self, summaries, data, fae_name):
+        """合併本地欄位（標題、日期、連結、已擷取的 Jira 號）後以 Jinja2 模板渲染周報"""
+        activities_by_id = {str(activity.get('id', '')): activity for activity in data.get('activities', [])}
+        tickets = []
+        for summary in summaries:
+            activity = activities_by_id.get(str(summary.get('ticket_id', '')), {})
+            jira_ids = list(summary.get('jira_ids') or [])
+            jira_ids += [jira_id for jira_id in self._local_jira_ids(activity) if jira_id not in jira_ids]
+            tickets.append({
+                'ticket_id': summary.get('ticket_id', ''),
+                'title': activity.get('title', ''),
+                'date': activity.get('date', ''),
+                'url': activity.get('full_url') or activity.get('url', ''),
+                'status': summary.get('status') or activity.get('status', ''),
+                'jira_ids': jira_ids,
+                'qa_pairs': summary.get('qa_pairs') or [],
+            })
+        return ReportGenerator().generate_ticket_table_html(tickets, fae_name, data.get('scan_days', 0))
+    
+    def _assemble_table(self, rows_html, data, fae_name):
+        """以本地樣式組合分段生成的表格列"""
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{fae_name} 周報</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        table {{ border-collapse: collapse; width: 100%; margin-top: 20px; }}
+        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; vertical-align: top; }}
+        th {{ background-color: #f2f2f2; font-weight: bold; }}
+        tr:nth-child(even) {{ background-color: #f9f9f9; }}
+    </style>
+</head>
+<body>
+    <h1>{fae_name} 周報</h1>
+    <p><strong>掃描範圍:</strong> 過去 {data.get('scan_days', 0)} 天，<strong>活動數量:</strong> {len(data.get('activities', []))} 個</p>
+    <table>
+        <thead>
+            <tr><th>Ticket ID</th><th>Jira 號碼</th><th>標題</th><th>狀態</th><th>日期</th><th>問答重點</th></tr>
+        </thead>
+        <tbody>
+{rows_html}
+        </tbody>
+    </table>
+</body>
+</html>
+"""
+    
     def _optimize_data_for_gemini(self, data):
         """優化數據以減少大小，避免超時"""
         try:
@@ -242,11 +782,20 @@ class GeminiService:
         
         return html
     
-    def _build_prompt(self, data, fae_name="FAE"):
+    def _build_prompt(self, data, fae_name="FAE", compact=None):
         """構建發送給 Gemini 的 prompt"""
         
-        # 將數據轉換為 JSON 字符串
-        json_data = json.dumps(data, ensure_ascii=False, indent=2)
+        # 將數據轉換為 JSON 字符串（壓縮模式只送出精簡後的活動資料）
+        if compact is None:
+            compact = config.GEMINI_CONFIG['compact_prompt']
+        if compact:
+            json_data = self._serialize_activities(data.get('activities', []), compact=True)
+            activity_hint = f"分析每個 ticket 的互動內容與 Jira 號（{self._ticket_source_hint(compact=True)}）"
+            jira_hint = "(FAE-XXXXXX)"
+        else:
+            json_data = json.dumps(data, ensure_ascii=False, indent=2)
+            activity_hint = "分析activities的內容, /a/tickets/XXXXXX , 其中XXXXXX為Ticket ID, 它的json內層有關連的文字內容以及Jira號"
+            jira_hint = "(https://ticket.quectel.com/browse/FAE-XXXXXX), FAE-XXXXXX 是Jira號"
         
         prompt = f"""
 請分析以下 {fae_name} 活動數據並生成 HTML 表格格式的周報。
@@ -257,8 +806,8 @@ class GeminiService:
 - FAE：{fae_name}
 
 要求：
-0. 分析activities的內容, /a/tickets/XXXXXX , 其中XXXXXX為Ticket ID, 它的json內層有關連的文字內容以及Jira號
-1. 提取所有 Jira 號碼 (https://ticket.quectel.com/browse/FAE-XXXXXX), FAE-XXXXXX 是Jira號
+0. {activity_hint}
+1. 提取所有 Jira 號碼 {jira_hint}
 2. 因為是weekly report, 選擇最近8天內的所有相關數據
 3. 分析回應重點，突出 {fae_name} 的專業能力
 4. 生成美觀的 HTML 表格，包含：Ticket ID、Jira號碼、標題、狀態(Closed, Pending, Waiting on Third Party)、客戶與我們的問答重點，Customer一問，{fae_name}一答，都在同一個格子內
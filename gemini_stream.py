@@ -0,0 +1,151 @@
+"""
+Gemini 串流生成模組
+以 stream=True 逐塊接收回應並立即寫入輸出檔，記錄首個 token 時間 (TTFT) 與 tokens/s；
+支援中途取消，並在長時間沒有新內容時判定為停滯而放棄
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Optional
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class GenerationCancelled(Exception):
+    """串流生成被呼叫端取消"""
+
+
+class GenerationStalled(Exception):
+    """串流生成在逾時內沒有新內容"""
+
+
+class StreamMetrics:
+    """串流生成統計（TTFT、輸出 token 數與速度）"""
+
+    def __init__(self, tokens_per_char: float = 0.5):
+        self.tokens_per_char = tokens_per_char
+        self.started = time.monotonic()
+        self.first_chunk_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.chunks = 0
+        self.chars = 0
+        self.reported_tokens: Optional[int] = None  # API 回報的輸出 token 數（usage_metadata）
+
+    def record_chunk(self, text: str, chunk=None):
+        now = time.monotonic()
+        if self.first_chunk_at is None:
+            self.first_chunk_at = now
+        self.chunks += 1
+        self.chars += len(text)
+        usage = getattr(chunk, 'usage_metadata', None)
+        if usage is not None and getattr(usage, 'candidates_token_count', None):
+            self.reported_tokens = usage.candidates_token_count
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """首個 token 時間（秒）"""
+        return self.first_chunk_at - self.started if self.first_chunk_at is not None else None
+
+    @property
+    def tokens(self) -> int:
+        """輸出 token 數（API 未回報時以字元數估計）"""
+        return self.reported_tokens or int(self.chars * self.tokens_per_char)
+
+    @property
+    def tokens_per_second(self) -> float:
+        """首個 token 之後的生成速度"""
+        if self.first_chunk_at is None:
+            return 0.0
+        elapsed = (self.finished_at or time.monotonic()) - self.first_chunk_at
+        return self.tokens / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        ttft = f"{self.ttft:.1f}s" if self.ttft is not None else "N/A"
+        return (f"TTFT {ttft}，{self.chunks} 個區塊 / {self.tokens} tokens，"
+                f"{self.tokens_per_second:.1f} tokens/s")
+
+
+def _chunk_text(chunk) -> str:
+    """取得區塊文字（被安全過濾等原因而沒有文字的區塊返回空字串）"""
+    try:
+        return chunk.text or ''
+    except Exception:
+        return ''
+
+
+def stream_to_file(response, output_path: str, cancel_event: threading.Event = None,
+                   first_token_timeout: float = 60, stall_timeout: float = 30,
+                   tokens_per_char: float = 0.5,
+                   on_chunk: Callable[[str, StreamMetrics], None] = None):
+    """
+    逐塊將串流回應寫入 output_path，返回 (完整文字, StreamMetrics)
+
+    取消或停滯時停止讀取，已寫入的部分內容改名為 output_path.partial，並拋出
+    GenerationCancelled / GenerationStalled
+    """
+    metrics = StreamMetrics(tokens_per_char)
+    chunks: "queue.Queue" = queue.Queue()
+    stop = threading.Event()
+
+    def reader():
+        # 在背景執行緒讀取串流，主執行緒才能在等待時檢查取消與停滯
+        try:
+            for chunk in response:
+                chunks.put(chunk)
+                if stop.is_set():
+                    break
+            chunks.put(_END)
+        except Exception as e:
+            chunks.put(e)
+
+    threading.Thread(target=reader, name="gemini-stream", daemon=True).start()
+
+    parts = []
+    last_progress = time.monotonic()
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    f = open(output_path, 'w', encoding='utf-8')
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled(f"已取消串流生成（已接收 {metrics.chars} 字元）")
+
+            timeout = first_token_timeout if metrics.first_chunk_at is None else stall_timeout
+            try:
+                item = chunks.get(timeout=0.5)
+            except queue.Empty:
+                if time.monotonic() - last_progress > timeout:
+                    raise GenerationStalled(f"串流生成停滯超過 {timeout:.0f} 秒（已接收 {metrics.chars} 字元）")
+                continue
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            text = _chunk_text(item)
+            metrics.record_chunk(text, item)
+            if text:
+                last_progress = time.monotonic()
+                parts.append(text)
+                f.write(text)
+                f.flush()
+                if on_chunk:
+                    on_chunk(text, metrics)
+    except BaseException:
+        stop.set()
+        f.close()
+        try:
+            os.replace(output_path, output_path + '.partial')
+        except OSError as e:
+            logger.warning(f"保留部分輸出失敗: {e}")
+        raise
+    f.close()
+
+    metrics.finished_at = time.monotonic()
+    return ''.join(parts), metrics
@@ -0,0 +1,123 @@
+"""
+HTML 解析後端模組
+已安裝 lxml 時使用 lxml，否則使用 html.parser；可用 SoupStrainer 只建立需要的子樹，並累計解析時間與記憶體峰值增量
+"""
+
+import re
+import sys
+import time
+import logging
+import threading
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import config
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+def parser_features() -> str:
+    """依 PARSER_CONFIG 與已安裝套件選擇 BeautifulSoup 解析器"""
+    backend = config.PARSER_CONFIG.get('backend', 'auto')
+    if backend == 'auto':
+        return 'lxml' if LXML_AVAILABLE else 'html.parser'
+    if backend == 'lxml' and not LXML_AVAILABLE:
+        logger.warning("未安裝 lxml，改用 html.parser (pip install lxml)")
+        return 'html.parser'
+    return backend
+
+
+def peak_rss_mb() -> Optional[float]:
+    """目前行程的記憶體峰值（MB），無法取得時返回 None"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 單位為 KB，macOS 為 bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    return None
+
+
+def conversation_strainer() -> SoupStrainer:
+    """只建立 class 含對話關鍵字的子樹（對話容器及其外層項目）"""
+    return SoupStrainer(class_=re.compile(config.PARSER_CONFIG['detail_class_pattern']))
+
+
+class ParseStats:
+    """解析時間與記憶體峰值增量的累計統計（不保留每頁記錄）"""
+
+    def __init__(self):
+        self.pages = 0
+        self.strained_pages = 0
+        self.total_bytes = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.max_rss_growth_mb = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, label: str, size: int, elapsed_ms: float, strained: bool, rss_growth_mb: Optional[float] = None):
+        with self._lock:
+            self.pages += 1
+            self.strained_pages += 1 if strained else 0
+            self.total_bytes += size
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            if rss_growth_mb is not None:
+                self.max_rss_growth_mb = max(self.max_rss_growth_mb, rss_growth_mb)
+
+        if config.PARSER_CONFIG.get('report_stats'):
+            growth_text = f"，記憶體峰值 +{rss_growth_mb:.1f} MB" if rss_growth_mb else ""
+            logger.info(f"  🧩 解析 {label}: {size / 1024:.0f} KB，{elapsed_ms:.1f}ms"
+                        f"（{parser_features()}{'，篩選子樹' if strained else ''}）{growth_text}")
+
+    def summary(self) -> str:
+        """統計摘要"""
+        with self._lock:
+            if not self.pages:
+                return "尚未解析任何頁面"
+            rss = peak_rss_mb()
+            peak_text = f"{rss:.0f} MB" if rss is not None else "N/A"
+            return (f"解析 {self.pages} 頁（{parser_features()}，篩選 {self.strained_pages} 頁），"
+                    f"共 {self.total_bytes / 1024 / 1024:.1f} MB / {self.total_ms:.0f}ms，"
+                    f"平均 {self.total_ms / self.pages:.1f}ms，最慢 {self.max_ms:.1f}ms，"
+                    f"單頁記憶體峰值最大增量 {self.max_rss_growth_mb:.1f} MB，行程記憶體峰值 {peak_text}")
+
+
+_parse_stats = ParseStats()
+
+
+def get_parse_stats() -> ParseStats:
+    """取得共用的解析統計"""
+    return _parse_stats
+
+
+def parse_html(html: str, label: str = "頁面", parse_only: SoupStrainer = None, record: bool = True) -> BeautifulSoup:
+    """以選定的後端解析 HTML（parse_only 限制只建立符合的子樹）"""
+    # ru_maxrss 只會增加，記錄本次解析造成的峰值增量（多執行緒同時解析時為近似值）
+    rss_before = peak_rss_mb() if record else None
+    started = time.perf_counter()
+    soup = BeautifulSoup(html or '', parser_features(), parse_only=parse_only)
+    if record:
+        rss_after = peak_rss_mb()
+        growth = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        _parse_stats.record(label, len(html or ''), (time.perf_counter() - started) * 1000, parse_only is not None, growth)
+    return soup
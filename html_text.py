@@ -0,0 +1,74 @@
+"""
+HTML 轉文字模組
+單次走訪 DOM 並寫入列表緩衝區，保留段落（p/div）與 <br> 的換行語意；供對話內容與 LTR 內容共用
+"""
+
+from typing import List
+
+from bs4 import NavigableString
+from bs4.element import Comment, Declaration, Doctype, ProcessingInstruction
+
+# 有文字時在開頭換行的區塊標籤
+BLOCK_TAGS = {'p', 'div'}
+# 不輸出內容的標籤
+SKIPPED_TAGS = {'script', 'style', 'head', 'title', 'template'}
+# 不輸出的特殊字串節點（HTML 註解、Outlook 條件註解等）
+SKIPPED_STRINGS = (Comment, Declaration, Doctype, ProcessingInstruction)
+
+
+def _collect_parts(root, block_tags) -> List[str]:
+    """走訪 root 的子孫節點，返回文字片段（區塊只有在含文字時才換行）"""
+    parts: List[str] = []
+    # 尚未出現文字的區塊在 parts 中的佔位索引（依巢狀順序）
+    pending_blocks: List[int] = []
+    stack = [(child, False) for child in reversed(root.contents)]
+
+    while stack:
+        node, closing = stack.pop()
+
+        if closing:
+            # 區塊結束時仍沒有文字，佔位保持空字串
+            if pending_blocks and pending_blocks[-1] == node:
+                pending_blocks.pop()
+            continue
+
+        if isinstance(node, NavigableString):
+            if isinstance(node, SKIPPED_STRINGS):
+                continue
+            text = node.strip()
+            if text:
+                for index in pending_blocks:
+                    parts[index] = '\n'
+                pending_blocks.clear()
+                parts.append(text)
+                parts.append(' ')
+            continue
+
+        name = node.name
+        if name in SKIPPED_TAGS:
+            continue
+        if name == 'br':
+            parts.append('\n')
+            continue
+
+        if name in block_tags:
+            parts.append('')
+            pending_blocks.append(len(parts) - 1)
+            stack.append((len(parts) - 1, True))
+        stack.extend((child, False) for child in reversed(node.contents))
+
+    return parts
+
+
+def html_to_text(element, preserve_blocks: bool = True) -> str:
+    """將元素轉為文字；preserve_blocks 為 False 時合併為單行"""
+    if element is None:
+        return ""
+
+    parts = _collect_parts(element, BLOCK_TAGS if preserve_blocks else ())
+    text = ''.join(parts)
+    if not preserve_blocks:
+        return ' '.join(text.split())
+
+    # 清理多餘的空白字符，但保留換行
+    return '\n'.join(line for line in (' '.join(raw.split()) for raw in text.split('\n')) if line)
@@ -0,0 +1,137 @@
+"""
+HTTP 抓取模組
+沿用瀏覽器登入後的 cookies，以連線池直接抓取 ticket 頁面與對話 JSON
+"""
+
+import re
+import logging
+from typing import Dict, Optional
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from throttle import RetryableFetchError, THROTTLE_STATUS_CODES, parse_retry_after
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# ticket 詳細頁面中代表對話內容已渲染的標記
+CONVERSATION_MARKERS = [
+    'ticket-details__conversation__content',
+    'data-test-id="conversation-content"',
+    'class="conversation-content"',
+]
+
+
+def ticket_id_from_url(url: str) -> str:
+    """從 ticket URL 取出數字 ID"""
+    match = re.search(r'/tickets/(\d+)', url or '')
+    return match.group(1) if match else ''
+
+
+class HttpTicketFetcher:
+    """以 requests 連線池抓取 ticket 詳細內容"""
+
+    def __init__(self, pool_size: int = None, timeout: int = None):
+        self.pool_size = pool_size or config.HTTP_FETCH_CONFIG['pool_size']
+        self.timeout = timeout or config.HTTP_FETCH_CONFIG['timeout']
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': config.CHROME_CONFIG['user_agent'],
+            'Accept': 'text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8',
+        })
+
+    def load_cookies_from_driver(self, driver) -> int:
+        """將瀏覽器目前的 cookies 複製到 HTTP session"""
+        cookies = driver.get_cookies()
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain'),
+                path=cookie.get('path', '/'),
+            )
+
+        # 使用與瀏覽器相同的 User-Agent，避免 session 被判定為不同用戶端
+        try:
+            user_agent = driver.execute_script("return navigator.userAgent")
+            if user_agent:
+                self.session.headers['User-Agent'] = user_agent
+        except Exception:
+            pass
+
+        logger.info(f"已將 {len(cookies)} 個 cookies 交給 HTTP session")
+        return len(cookies)
+
+    def _get(self, url: str, **kwargs):
+        """GET 請求；伺服器過載、逾時或連線錯誤時拋出 RetryableFetchError，其他錯誤返回 None"""
+        try:
+            response = self.session.get(url, timeout=self.timeout, **kwargs)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            raise RetryableFetchError(f"HTTP 請求逾時或連線失敗: {url} ({e})")
+        except requests.RequestException as e:
+            logger.warning(f"HTTP 抓取失敗: {url} ({e})")
+            return None
+
+        if response.status_code in THROTTLE_STATUS_CODES:
+            raise RetryableFetchError(
+                f"伺服器回應 HTTP {response.status_code}: {url}",
+                status=response.status_code,
+                retry_after=parse_retry_after(response.headers.get('Retry-After')),
+            )
+        return response
+
+    def fetch_html(self, url: str) -> Optional[str]:
+        """抓取頁面 HTML，失敗或被導回登入頁時返回 None（可重試的失敗拋出 RetryableFetchError）"""
+        response = self._get(url)
+        if response is None:
+            return None
+
+        if response.status_code != 200 or self._is_login_page(response):
+            logger.warning(f"HTTP 抓取未取得頁面: {url} (HTTP {response.status_code}, {response.url})")
+            return None
+
+        return response.text
+
+    def fetch_conversations(self, ticket_url: str) -> Optional[Dict]:
+        """透過 JSON 端點抓取 ticket 對話，未設定或失敗時返回 None（可重試的失敗拋出 RetryableFetchError）"""
+        api_template = config.HTTP_FETCH_CONFIG.get('conversation_api')
+        ticket_id = ticket_id_from_url(ticket_url)
+        if not api_template or not ticket_id:
+            return None
+
+        api_url = urljoin(config.ESERVICE_CONFIG['original_url'], api_template.format(ticket_id=ticket_id))
+        response = self._get(api_url, headers={'Accept': 'application/json'})
+        if response is None:
+            return None
+
+        if response.status_code != 200 or 'json' not in response.headers.get('Content-Type', ''):
+            logger.warning(f"對話 JSON 抓取未成功: {api_url} (HTTP {response.status_code})")
+            return None
+
+        try:
+            return response.json()
+        except ValueError:
+            logger.warning(f"對話 JSON 解析失敗: {api_url}")
+            return None
+
+    @staticmethod
+    def has_conversation_markup(html: str) -> bool:
+        """檢查 HTML 是否已包含對話內容"""
+        return bool(html) and any(marker in html for marker in CONVERSATION_MARKERS)
+
+    @staticmethod
+    def _is_login_page(response) -> bool:
+        """判斷回應是否為登入頁（session 失效）"""
+        final_url = response.url.lower()
+        return 'login' in final_url or 'freshworks.com' in final_url
+
+    def close(self):
+        """關閉連線池"""
+        self.session.close()
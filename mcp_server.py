@@ -27,6 +27,7 @@ from mcp.types import (
 )
 
 from browser_automation import BrowserAutomation
+from async_scanner import AsyncTicketScanner
 from report_generator import ReportGenerator
 import config
 
@@ -104,6 +105,24 @@ class WeeklyReportMCPServer:
                             }
                         }
                     ),
+                    Tool(
+                        name="scan_tickets",
+                        description="以非同步 HTTP 掃描最近的 eService tickets 及其對話內容（需已登入或有快取的 session）",
+                        inputSchema={
+                            "type": "object",
+                            "properties": {
+                                "days_back": {
+                                    "type": "integer",
+                                    "description": "要掃描的天數（預設為 7 天）",
+                                    "default": 7
+                                },
+                                "max_tickets": {
+                                    "type": "integer",
+                                    "description": "最多處理的 ticket 數量（可選）"
+                                }
+                            }
+                        }
+                    ),
                     Tool(
                         name="generate_weekly_report",
                         description="生成週報（支援 HTML、Excel、Markdown 格式）",
@@ -154,6 +173,8 @@ class WeeklyReportMCPServer:
                     return await self._login_jira(arguments)
                 elif name == "fetch_weekly_activities":
                     return await self._fetch_weekly_activities(arguments)
+                elif name == "scan_tickets":
+                    return await self._scan_tickets(arguments)
                 elif name == "generate_weekly_report":
                     return await self._generate_weekly_report(arguments)
                 elif name == "close_browser":
@@ -399,6 +420,52 @@ class WeeklyReportMCPServer:
                 ]
             )
     
+    async def _scan_tickets(self, arguments: Dict[str, Any]) -> CallToolResult:
+        """以 aiohttp 掃描 eService tickets（不阻塞事件迴圈）"""
+        try:
+            scanner = None
+            if self.browser_automation and self.browser_automation.driver and 'eservice' in self.credentials:
+                scanner = AsyncTicketScanner.from_driver(self.browser_automation.driver)
+            elif 'eservice' in self.credentials:
+                scanner = AsyncTicketScanner.from_session_cache(self.credentials['eservice']['username'])
+            
+            if not scanner:
+                return CallToolResult(
+                    content=[
+                        TextContent(
+                            type="text",
+                            text="請先使用 login_eservice 工具登入 eService。"
+                        )
+                    ]
+                )
+            
+            days_back = arguments.get("days_back", 7)
+            tickets = await scanner.scan(days_back, arguments.get("max_tickets"))
+            
+            summary = [f"掃描完成！最近 {days_back} 天共有 {len(tickets)} 個 tickets", ""]
+            for ticket in tickets:
+                summary.append(f"- {ticket.get('title', 'N/A')} ({ticket.get('status', 'N/A')})，"
+                               f"{len(ticket.get('detailed_interactions', []))} 個互動")
+            
+            return CallToolResult(
+                content=[
+                    TextContent(
+                        type="text",
+                        text="\n".join(summary)
+                    )
+                ]
+            )
+            
+        except Exception as e:
+            return CallToolResult(
+                content=[
+                    TextContent(
+                        type="text",
+                        text=f"掃描 tickets 時發生錯誤: {str(e)}"
+                    )
+                ]
+            )
+    
     async def _generate_weekly_report(self, arguments: Dict[str, Any]) -> CallToolResult:
         """生成週報"""
         try:
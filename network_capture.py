@@ -0,0 +1,95 @@
+"""
+網路擷取模組
+透過 Chrome performance log 與 CDP Network.getResponseBody 讀取 ticket 頁面載入時的對話 JSON
+"""
+
+import re
+import json
+import base64
+import logging
+from typing import Dict, List
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+def enable_network_logging(chrome_options):
+    """在 Chrome 選項中啟用 performance log（只保留網路事件）"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+    return chrome_options
+
+
+class NetworkCapture:
+    """擷取符合 URL 模式的 JSON 回應"""
+
+    def __init__(self, driver, url_pattern: str = None):
+        self.driver = driver
+        self.url_pattern = re.compile(url_pattern or config.NETWORK_CAPTURE_CONFIG['conversation_url_pattern'])
+        self._pending: Dict[str, str] = {}
+        self.payloads: List = []
+
+    def start(self):
+        """啟用網路事件並清除先前累積的 log"""
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.get_log('performance')
+        self._pending = {}
+        self.payloads = []
+
+    def poll(self) -> int:
+        """處理新的 performance log，讀取已完成回應的內容，返回新擷取的數量"""
+        captured = 0
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+
+            method = message.get('method')
+            params = message.get('params', {})
+
+            if method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if response.get('status') == 200 and self.url_pattern.search(response.get('url', '')):
+                    self._pending[params['requestId']] = response['url']
+
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending:
+                url = self._pending.pop(params['requestId'])
+                payload = self._read_body(params['requestId'], url)
+                if payload is not None:
+                    self.payloads.append(payload)
+                    captured += 1
+
+        return captured
+
+    def _read_body(self, request_id: str, url: str):
+        """以 CDP 讀取回應內容並解析 JSON"""
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            body = result.get('body', '')
+            if result.get('base64Encoded'):
+                body = base64.b64decode(body).decode('utf-8')
+            return json.loads(body)
+        except Exception as e:
+            logger.warning(f"讀取回應內容失敗: {url} ({e})")
+            return None
+
+    def merged_conversations(self) -> Dict:
+        """合併所有擷取到的對話回應（依對話 ID 去除重複）"""
+        conversations = []
+        users = []
+        seen = set()
+        for payload in self.payloads:
+            items = payload.get('conversations', []) if isinstance(payload, dict) else payload
+            if isinstance(payload, dict):
+                users.extend(payload.get('users', []) or [])
+            for item in items or []:
+                key = item.get('id') if isinstance(item, dict) else None
+                if key is not None and key in seen:
+                    continue
+                seen.add(key)
+                conversations.append(item)
+
+        return {'conversations': conversations, 'users': users}
@@ -0,0 +1,116 @@
+"""
+Prompt 壓縮模組
+送出 Gemini 前移除活動資料中的冗餘：raw_text / url / full_url 等未使用欄位、content 與其超集 ltr_content 的重複、
+每個 Jira 連結重複的 context 文字；改用短鍵名與緊湊分隔符，並檢查沒有遺失任何 Jira 號或問答文字
+"""
+
+import re
+import json
+import logging
+from typing import Dict, List
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 短鍵名說明（放在 prompt 中）
+FIELD_LEGEND = ("i=Ticket ID, t=標題, d=日期, s=狀態, p=列表摘要, "
+                "j=未出現在對話文字中的 Jira 號, x=互動（依時間順序）: ts=時間, a=作者, k=類型, c=內容")
+
+# 與 extract_jira_links 相同的題號格式
+JIRA_ID_RE = re.compile(r'[A-Z]+-\d+')
+
+
+def normalize_text(text: str) -> str:
+    """合併空白，用於比對文字是否被包含"""
+    return ' '.join((text or '').split())
+
+
+def dumps_compact(obj) -> str:
+    """以緊湊分隔符序列化"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def _interaction_text(interaction: Dict, keep_both: bool = False) -> str:
+    """互動內容：content 與 ltr_content 互為子集時只保留較完整的一份"""
+    content = interaction.get('content') or ''
+    ltr_content = interaction.get('ltr_content') or ''
+    if not keep_both:
+        if normalize_text(content) in normalize_text(ltr_content):
+            return ltr_content
+        if normalize_text(ltr_content) in normalize_text(content):
+            return content
+    return '\n'.join(text for text in (content, ltr_content) if text)
+
+
+def activity_jira_ids(activity: Dict) -> List[str]:
+    """活動中所有的 Jira 號（已擷取的連結與文字中出現的題號）"""
+    jira_ids = []
+    for interaction in activity.get('detailed_interactions', []):
+        candidates = [link.get('ticket_id') for link in interaction.get('jira_links', [])]
+        for field in ('content', 'ltr_content'):
+            candidates.extend(JIRA_ID_RE.findall(interaction.get(field) or ''))
+        for jira_id in candidates:
+            if jira_id and jira_id not in jira_ids:
+                jira_ids.append(jira_id)
+    return jira_ids
+
+
+def compact_activity(activity: Dict, keep_both: bool = False) -> Dict:
+    """將單一活動轉為短鍵名格式（空值省略）"""
+    interactions = []
+    for interaction in activity.get('detailed_interactions', []):
+        text = _interaction_text(interaction, keep_both)
+        if not text:
+            continue
+        entry = {
+            'ts': interaction.get('timestamp'),
+            'a': interaction.get('author'),
+            'k': interaction.get('type'),
+            'c': text,
+        }
+        interactions.append({key: value for key, value in entry.items() if value})
+
+    combined = '\n'.join(entry['c'] for entry in interactions)
+    ids_in_text = set(JIRA_ID_RE.findall(combined))
+    compact = {
+        'i': activity.get('id'),
+        't': activity.get('title'),
+        'd': activity.get('date'),
+        's': activity.get('status'),
+        # 列表摘要通常是對話開頭的重複
+        'p': activity.get('content') if normalize_text(activity.get('content')) not in normalize_text(combined) else '',
+        # Jira 號已出現在對話文字中時不重複列出
+        'j': [jira_id for jira_id in activity_jira_ids(activity) if keep_both or jira_id not in ids_in_text],
+        'x': interactions,
+    }
+    return {key: value for key, value in compact.items() if value}
+
+
+def missing_content(activity: Dict, compact: Dict) -> List[str]:
+    """壓縮後遺失的 Jira 號或問答文字"""
+    texts = [entry['c'] for entry in compact.get('x', [])] + [compact.get('p', ''), compact.get('t', '')]
+    combined = '\n'.join(texts)
+    normalized = normalize_text(combined)
+    ids_in_text = set(JIRA_ID_RE.findall(combined))
+
+    missing = [jira_id for jira_id in activity_jira_ids(activity)
+               if jira_id not in ids_in_text and jira_id not in compact.get('j', [])]
+    for interaction in activity.get('detailed_interactions', []):
+        for field in ('content', 'ltr_content'):
+            text = normalize_text(interaction.get(field))
+            if text and text not in normalized:
+                missing.append(f"{field}: {text[:50]}")
+    return missing
+
+
+def compact_activities(activities: List[Dict]) -> List[Dict]:
+    """壓縮所有活動；檢查發現遺失內容時，該活動改為保留全部文字與 Jira 號"""
+    compacted = []
+    for activity in activities:
+        compact = compact_activity(activity)
+        missing = missing_content(activity, compact)
+        if missing:
+            logger.warning(f"ticket {activity.get('id', '')} 壓縮後遺失 {len(missing)} 項內容，改為保留完整文字: {missing[:3]}")
+            compact = compact_activity(activity, keep_both=True)
+        compacted.append(compact)
+    return compacted
@@ -174,6 +174,24 @@ class ReportGenerator:
         logger.info(f"HTML 報告已生成: {output_path}")
         return output_path
     
+    def generate_ticket_table_html(self, tickets: List[Dict], fae_name: str = "FAE", scan_days: int = 0) -> str:
+        """以 Jinja2 模板渲染 ticket 周報表格（Gemini 結構化輸出使用）"""
+        template_dir = config.REPORT_CONFIG["template_dir"]
+        if not os.path.exists(os.path.join(template_dir, 'ticket_table_report.html')):
+            os.makedirs(template_dir, exist_ok=True)
+            self._create_ticket_table_template()
+        
+        # 問答內容來自客戶郵件，需跳脫 HTML
+        env = Environment(loader=FileSystemLoader(template_dir), autoescape=True)
+        template = env.get_template('ticket_table_report.html')
+        
+        return template.render(
+            tickets=tickets,
+            fae_name=fae_name,
+            scan_days=scan_days,
+            report_date=datetime.now().strftime(config.REPORT_CONFIG["date_format"])
+        )
+    
     def generate_excel_report(self, output_path: str = None) -> str:
         """生成 Excel 報告"""
         if not output_path:
@@ -485,3 +503,129 @@ class ReportGenerator:
         template_path = os.path.join(config.REPORT_CONFIG["template_dir"], "weekly_report.html")
         with open(template_path, 'w', encoding='utf-8') as f:
             f.write(template_content)
+    
+    def _create_ticket_table_template(self):
+        """建立 ticket 周報表格模板"""
+        template_content = """<!DOCTYPE html>
+<html lang="zh-TW">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ fae_name }} 周報 - {{ report_date }}</title>
+    <style>
+        body {
+            font-family: 'Microsoft JhengHei', Arial, sans-serif;
+            line-height: 1.6;
+            margin: 0;
+            padding: 20px;
+            background-color: #f5f5f5;
+        }
+        .container {
+            max-width: 1400px;
+            margin: 0 auto;
+            background-color: white;
+            padding: 30px;
+            border-radius: 10px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }
+        h1 {
+            color: #2c3e50;
+            text-align: center;
+            border-bottom: 3px solid #3498db;
+            padding-bottom: 10px;
+        }
+        .summary {
+            background-color: #ecf0f1;
+            padding: 15px 20px;
+            border-radius: 5px;
+            margin: 20px 0;
+        }
+        table {
+            border-collapse: collapse;
+            width: 100%;
+        }
+        th, td {
+            border: 1px solid #ddd;
+            padding: 10px;
+            text-align: left;
+            vertical-align: top;
+        }
+        th {
+            background-color: #3498db;
+            color: white;
+        }
+        tr:nth-child(even) {
+            background-color: #f8f9fa;
+        }
+        .status {
+            display: inline-block;
+            background-color: #95a5a6;
+            color: white;
+            padding: 2px 8px;
+            border-radius: 3px;
+            font-size: 0.9em;
+        }
+        .status-closed { background-color: #27ae60; }
+        .status-pending { background-color: #e67e22; }
+        .status-waiting-on-third-party { background-color: #8e44ad; }
+        .qa-item {
+            margin-bottom: 8px;
+        }
+        .qa-question {
+            color: #c0392b;
+        }
+        .qa-answer {
+            color: #2c3e50;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>{{ fae_name }} 周報 - {{ report_date }}</h1>
+        
+        <div class="summary">
+            掃描範圍：過去 {{ scan_days }} 天，共 {{ tickets|length }} 個 tickets
+        </div>
+        
+        <table>
+            <thead>
+                <tr>
+                    <th>Ticket ID</th>
+                    <th>Jira 號碼</th>
+                    <th>標題</th>
+                    <th>狀態</th>
+                    <th>日期</th>
+                    <th>問答重點</th>
+                </tr>
+            </thead>
+            <tbody>
+            {% for ticket in tickets %}
+                <tr>
+                    <td>{% if ticket.url %}<a href="{{ ticket.url }}">{{ ticket.ticket_id }}</a>{% else %}{{ ticket.ticket_id }}{% endif %}</td>
+                    <td>
+                        {% for jira_id in ticket.jira_ids %}
+                        <a href="https://ticket.quectel.com/browse/{{ jira_id }}">{{ jira_id }}</a>{% if not loop.last %}<br>{% endif %}
+                        {% else %}無{% endfor %}
+                    </td>
+                    <td>{{ ticket.title }}</td>
+                    <td><span class="status status-{{ ticket.status|lower|replace(' ', '-') }}">{{ ticket.status }}</span></td>
+                    <td>{{ ticket.date }}</td>
+                    <td>
+                        {% for qa in ticket.qa_pairs %}
+                        <div class="qa-item">
+                            {% if qa.question %}<div class="qa-question"><strong>Customer:</strong> {{ qa.question }}</div>{% endif %}
+                            {% if qa.answer %}<div class="qa-answer"><strong>{{ fae_name }}:</strong> {{ qa.answer }}</div>{% endif %}
+                        </div>
+                        {% endfor %}
+                    </td>
+                </tr>
+            {% endfor %}
+            </tbody>
+        </table>
+    </div>
+</body>
+</html>"""
+        
+        template_path = os.path.join(config.REPORT_CONFIG["template_dir"], "ticket_table_report.html")
+        with open(template_path, 'w', encoding='utf-8') as f:
+            f.write(template_content)
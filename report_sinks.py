@@ -0,0 +1,316 @@
+"""
+串流報告輸出模組
+每個 ticket 完成時即寫入所有輸出（JSONL、活動 CSV、互動 CSV、Jira 連結 CSV、Markdown），
+掃描期間記憶體不隨 ticket 數量增加，且中途的輸出即可使用
+
+JSONL 格式：第一行為報告資訊（report_date、scan_days），之後每行一個活動；
+關閉時另外輸出與舊版相同格式的 JSON（report_date、scan_days、total_activities、activities）
+"""
+
+import os
+import csv
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+def iter_jsonl_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """逐行讀取 JSONL，產生 (行號, 記錄)，略過空行與不完整的行"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 掃描進行中讀取時，最後一行可能尚未寫完
+                logger.warning(f"略過 {file_path} 第 {line_number + 1} 行（不完整）")
+                continue
+            yield line_number, record
+
+
+def load_report_data(file_path: str) -> Dict:
+    """讀取報告資料（.jsonl 串流格式或舊版 .json），返回 {'report_date', 'scan_days', 'total_activities', 'activities'}"""
+    if not file_path.endswith('.jsonl'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    header = {}
+    activities = []
+    for line_number, record in iter_jsonl_records(file_path):
+        if line_number == 0:
+            header = record
+        else:
+            activities.append(record)
+
+    return {
+        'report_date': header.get('report_date', ''),
+        'scan_days': header.get('scan_days', 0),
+        'total_activities': len(activities),
+        'activities': activities,
+    }
+
+
+def format_jira_links(interaction: Dict) -> str:
+    """格式化互動中的 Jira 連結"""
+    return "; ".join([f"{link['ticket_id']}({link['full_url']})" for link in interaction.get('jira_links', [])])
+
+
+class ReportSink:
+    """單一輸出檔"""
+
+    def __init__(self, path: str, days_back: int):
+        self.path = path
+        self.days_back = days_back
+        self.count = 0
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.write_header()
+        self.file.flush()
+
+    def write_header(self):
+        pass
+
+    def write(self, activity: Dict):
+        self.count += 1
+        self.write_activity(activity)
+        self.file.flush()
+
+    def write_activity(self, activity: Dict):
+        raise NotImplementedError
+
+    def write_footer(self):
+        pass
+
+    def close(self):
+        self.write_footer()
+        self.file.close()
+
+
+class JsonlSink(ReportSink):
+    """JSONL：每行一個活動（含詳細互動）"""
+
+    def write_header(self):
+        self.header = {'report_date': datetime.now().isoformat(), 'scan_days': self.days_back}
+        self.file.write(json.dumps(self.header, ensure_ascii=False) + '\n')
+
+    def write_activity(self, activity: Dict):
+        self.file.write(json.dumps(activity, ensure_ascii=False) + '\n')
+
+
+class ActivitiesCsvSink(ReportSink):
+    """活動 CSV：每個 ticket 一列"""
+
+    def write_header(self):
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['ID', 'Title', 'Date', 'Status', 'Content', 'URL', 'Source', 'Full_URL', 'Interaction_Count'])
+
+    def write_activity(self, activity: Dict):
+        self.writer.writerow([
+            activity.get('id', ''),
+            activity.get('title', ''),
+            activity.get('date', ''),
+            activity.get('status', ''),
+            activity.get('content', ''),
+            activity.get('url', ''),
+            activity.get('source', ''),
+            activity.get('full_url', ''),
+            len(activity.get('detailed_interactions', []))
+        ])
+
+
+class InteractionsCsvSink(ReportSink):
+    """詳細互動 CSV：每個互動一列"""
+
+    def write_header(self):
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['Ticket_ID', 'Ticket_Title', 'Interaction_Timestamp', 'Author', 'Content', 'Type', 'LTR_Content', 'Jira_Links'])
+
+    def write_activity(self, activity: Dict):
+        for interaction in activity.get('detailed_interactions', []):
+            self.writer.writerow([
+                activity.get('id', ''),
+                activity.get('title', ''),
+                interaction.get('timestamp', ''),
+                interaction.get('author', ''),
+                interaction.get('content', ''),
+                interaction.get('type', ''),
+                interaction.get('ltr_content', ''),
+                format_jira_links(interaction)
+            ])
+
+
+class JiraLinksCsvSink(ReportSink):
+    """Jira 連結 CSV：每個連結一列"""
+
+    def write_header(self):
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['Ticket_ID', 'Ticket_Title', 'Interaction_Timestamp', 'Jira_Ticket_ID', 'Jira_Full_URL', 'Context'])
+
+    def write_activity(self, activity: Dict):
+        for interaction in activity.get('detailed_interactions', []):
+            for jira_link in interaction.get('jira_links', []):
+                self.writer.writerow([
+                    activity.get('id', ''),
+                    activity.get('title', ''),
+                    interaction.get('timestamp', ''),
+                    jira_link.get('ticket_id', ''),
+                    jira_link.get('full_url', ''),
+                    jira_link.get('context', '')
+                ])
+
+
+class MarkdownSink(ReportSink):
+    """Markdown 報告（活動數量在結尾寫入）"""
+
+    def write_header(self):
+        self.file.write("# eService 活動報告\n\n")
+        self.file.write(f"**生成時間**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        self.file.write(f"**掃描範圍**: 過去 {self.days_back} 天\n\n")
+        self.file.write("## 活動列表\n\n")
+
+    def write_activity(self, activity: Dict):
+        f = self.file
+        f.write(f"### {self.count}. {activity.get('title', '無標題')}\n")
+        f.write(f"- **ID**: {activity.get('id', 'N/A')}\n")
+        f.write(f"- **日期**: {activity.get('date', 'N/A')}\n")
+        f.write(f"- **狀態**: {activity.get('status', 'N/A')}\n")
+        f.write(f"- **內容**: {activity.get('content', 'N/A')}\n")
+        if activity.get('full_url'):
+            f.write(f"- **完整連結**: {activity.get('full_url')}\n")
+
+        # 添加詳細互動內容
+        interactions = activity.get('detailed_interactions', [])
+        if interactions:
+            f.write(f"- **互動記錄**: {len(interactions)} 個\n")
+            f.write("  \n")
+            f.write("  #### 詳細互動記錄\n")
+            for j, interaction in enumerate(interactions, 1):
+                f.write(f"  **{j}. {interaction.get('type', 'other')}**\n")
+                f.write(f"  - 時間: {interaction.get('timestamp', 'N/A')}\n")
+                f.write(f"  - 作者: {interaction.get('author', 'N/A')}\n")
+                f.write(f"  - 內容: {interaction.get('content', 'N/A')}\n")
+                if interaction.get('ltr_content'):
+                    f.write(f"  - **回應訊息**: {interaction.get('ltr_content', 'N/A')}\n")
+                if interaction.get('jira_links'):
+                    f.write("  - **Jira 連結**:\n")
+                    for jira_link in interaction['jira_links']:
+                        f.write(f"    - {jira_link['ticket_id']}: {jira_link['full_url']}\n")
+                f.write("  \n")
+        else:
+            f.write("- **互動記錄**: 無\n")
+
+        f.write("\n")
+
+    def write_footer(self):
+        if self.count:
+            self.file.write(f"---\n\n**活動數量**: {self.count} 個\n")
+        else:
+            self.file.write("在指定時間範圍內未找到任何活動記錄。\n")
+
+
+class StreamingReportWriter:
+    """將每個完成的 ticket 寫入所有輸出（可由多個 worker 同時呼叫 write / write_at）"""
+
+    SINKS = [
+        ('jsonl', 'eservice_activities_{timestamp}.jsonl', JsonlSink),
+        ('csv', 'eservice_activities_{timestamp}.csv', ActivitiesCsvSink),
+        ('interactions_csv', 'eservice_interactions_{timestamp}.csv', InteractionsCsvSink),
+        ('jira_links_csv', 'eservice_jira_links_{timestamp}.csv', JiraLinksCsvSink),
+        ('markdown', 'eservice_activities_{timestamp}.md', MarkdownSink),
+    ]
+
+    def __init__(self, report_dir: str, days_back: int):
+        self.report_dir = report_dir
+        os.makedirs(report_dir, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.sinks = {
+            name: sink_class(os.path.join(report_dir, filename.format(timestamp=timestamp)), days_back)
+            for name, filename, sink_class in self.SINKS
+        }
+        self.json_path = os.path.join(report_dir, f"eservice_activities_{timestamp}.json")
+        self.count = 0
+        self._lock = threading.Lock()
+        # write_at：依列表順序輸出，先完成但前面尚未完成的 ticket 暫存於此（最多 max_pending 個）
+        self._pending: Dict[int, Dict] = {}
+        self._next_index = 0
+        self.max_pending = config.REPORT_CONFIG['max_pending_activities']
+
+    @property
+    def paths(self) -> Dict[str, str]:
+        """各輸出檔路徑"""
+        paths = {name: sink.path for name, sink in self.sinks.items()}
+        paths['json'] = self.json_path
+        return paths
+
+    def _write_locked(self, activity: Dict):
+        self.count += 1
+        for sink in self.sinks.values():
+            sink.write(activity)
+
+    def write(self, activity: Dict):
+        """寫入一個完成的活動"""
+        with self._lock:
+            self._write_locked(activity)
+
+    def write_at(self, index: int, activity: Dict):
+        """寫入列表中第 index 個活動（依 index 順序輸出，與完成順序無關）"""
+        with self._lock:
+            if index < self._next_index:
+                # 暫存已滿時被跳過的 ticket：直接寫入，不再等待順序
+                logger.warning(f"列表第 {index + 1} 個 ticket 在暫存上限後才完成，不依列表順序寫入")
+                self._write_locked(activity)
+                return
+            self._pending[index] = activity
+            while self._pending:
+                if self._next_index not in self._pending:
+                    if len(self._pending) <= self.max_pending:
+                        break
+                    # 前面的 ticket 遲遲未完成，跳過空缺繼續依順序寫出，避免暫存無限增加
+                    self._next_index = min(self._pending)
+                self._write_locked(self._pending.pop(self._next_index))
+                self._next_index += 1
+
+    def write_all(self, activities: List[Dict]):
+        """一次寫入多個活動"""
+        for activity in activities:
+            self.write(activity)
+
+    def close(self) -> Dict[str, str]:
+        """寫入暫存的活動與結尾並關閉所有輸出，另輸出 JSON，返回各輸出檔路徑"""
+        with self._lock:
+            # 未完成的 ticket 不會出現，其後已完成的依順序寫入
+            for index in sorted(self._pending):
+                self._write_locked(self._pending.pop(index))
+            if all(sink.file.closed for sink in self.sinks.values()):
+                return self.paths
+            for sink in self.sinks.values():
+                if not sink.file.closed:
+                    sink.close()
+
+        self._write_json(self.sinks['jsonl'])
+        return self.paths
+
+    def _write_json(self, jsonl_sink: JsonlSink):
+        """由 JSONL 逐行轉出 JSON（與 load_report_data 相同結構），不將所有活動載入記憶體"""
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            f.write('{\n')
+            f.write(f'  "report_date": {json.dumps(jsonl_sink.header["report_date"])},\n')
+            f.write(f'  "scan_days": {json.dumps(jsonl_sink.header["scan_days"])},\n')
+            f.write(f'  "total_activities": {jsonl_sink.count},\n')
+            f.write('  "activities": [')
+            first = True
+            for line_number, record in iter_jsonl_records(jsonl_sink.path):
+                if line_number == 0:
+                    continue
+                activity = json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n    ')
+                f.write(('\n    ' if first else ',\n    ') + activity)
+                first = False
+            f.write('\n  ]\n}\n' if not first else ']\n}\n')
@@ -0,0 +1,119 @@
+"""
+列表列索引模組
+以單次 DOM 走訪建立每一列的候選日期、狀態、連結與時間戳，取代逐個關鍵字的 find_all 掃描
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from bs4 import NavigableString, Tag
+
+# 日期關鍵字（依優先順序，與原本逐一嘗試的順序相同）
+DATE_PATTERNS = [
+    '2024', '2023', '2025',  # 年份
+    'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec',  # 英文月份
+    'hours ago', 'days ago', 'minutes ago', 'ago',  # 相對時間
+    'today', 'yesterday',  # 相對日期
+    '分鐘前', '小時前', '天前'  # 中文相對時間
+]
+
+# 狀態關鍵字（不分大小寫，依優先順序）
+STATUS_KEYWORDS = ['open', 'closed', 'pending', 'resolved', 'active', 'inactive', 'new', 'old', 'high', 'low', 'medium']
+
+# 列表頁面找不到 ticket 選擇器時，用來找出含日期文字的列
+LIST_DATE_PATTERNS = ['2024', '2023', '2025', '2026', '2027', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+TITLE_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a', 'span', 'div'}
+CONTENT_TAGS = {'p', 'div', 'span'}
+ROW_TAGS = {'tr', 'li', 'div'}
+YEAR_RE = re.compile(r'\b20\d{2}\b')
+
+
+def compile_keyword_scanner(keywords: List[str], ignore_case: bool = False):
+    """編譯關鍵字掃描正則：以 lookahead 找出所有（含重疊的）關鍵字出現位置"""
+    alternation = '|'.join(re.escape(keyword) for keyword in keywords)
+    return re.compile(f'(?=({alternation}))', re.IGNORECASE if ignore_case else 0)
+
+
+DATE_SCANNER = compile_keyword_scanner(DATE_PATTERNS)
+DATE_RANK = {pattern: rank for rank, pattern in enumerate(DATE_PATTERNS)}
+STATUS_SCANNER = compile_keyword_scanner(STATUS_KEYWORDS, ignore_case=True)
+STATUS_RANK = {keyword: rank for rank, keyword in enumerate(STATUS_KEYWORDS)}
+LIST_DATE_SCANNER = compile_keyword_scanner(LIST_DATE_PATTERNS)
+LIST_DATE_RANK = {pattern: rank for rank, pattern in enumerate(LIST_DATE_PATTERNS)}
+
+
+def best_rank(scanner, ranks: Dict[str, int], text: str, lower: bool = False) -> Optional[int]:
+    """文字中出現的關鍵字的最高優先順序，沒有關鍵字時返回 None"""
+    matches = [ranks[match.group(1).lower() if lower else match.group(1)] for match in scanner.finditer(text)]
+    return min(matches) if matches else None
+
+
+class TicketRowIndex:
+    """單一列表列的索引（走訪一次 DOM）"""
+
+    def __init__(self, row: Tag):
+        self.date_text = ''
+        self.status_text = ''
+        self.title_link = None  # 第一個帶 data-test-link 的連結
+        self.title_fallback = None  # 第一個標題候選元素
+        self.content_element = None
+        self.link = None  # 第一個帶 href 的連結
+        self.time_datetimes: List[str] = []
+        self.year_titles: List[str] = []
+
+        date_rank = status_rank = None
+        for node in row.descendants:
+            if isinstance(node, NavigableString):
+                # 每個關鍵字取第一個出現的文字節點，關鍵字之間依優先順序
+                rank = best_rank(DATE_SCANNER, DATE_RANK, node)
+                if rank is not None and (date_rank is None or rank < date_rank):
+                    date_rank, self.date_text = rank, node.strip()
+                rank = best_rank(STATUS_SCANNER, STATUS_RANK, node, lower=True)
+                if rank is not None and (status_rank is None or rank < status_rank):
+                    status_rank, self.status_text = rank, node.strip()
+                continue
+
+            if not isinstance(node, Tag):
+                continue
+
+            name = node.name
+            if name == 'a':
+                if self.link is None and node.get('href'):
+                    self.link = node
+                if self.title_link is None and node.has_attr('data-test-link'):
+                    self.title_link = node
+            elif name == 'time' and node.get('datetime'):
+                self.time_datetimes.append(node['datetime'])
+
+            title = node.get('title')
+            if isinstance(title, str) and YEAR_RE.search(title):
+                self.year_titles.append(title)
+
+            if self.title_fallback is None and name in TITLE_TAGS:
+                self.title_fallback = node
+            if self.content_element is None and name in CONTENT_TAGS:
+                self.content_element = node
+
+
+def find_rows_by_date_text(soup, limit: Optional[int] = None) -> List[Tag]:
+    """單次走訪所有文字節點，找出含日期文字的列（依日期關鍵字順序、再依文件順序）"""
+    buckets: List[List[Tag]] = [[] for _ in LIST_DATE_PATTERNS]
+    for text in soup.find_all(string=True):
+        parent = text.parent
+        if not parent or parent.name not in ROW_TAGS:
+            continue
+        for rank in {LIST_DATE_RANK[match.group(1)] for match in LIST_DATE_SCANNER.finditer(text)}:
+            buckets[rank].append(parent)
+
+    rows = []
+    seen = set()
+    for bucket in buckets:
+        for parent in bucket:
+            if id(parent) in seen:
+                continue
+            seen.add(id(parent))
+            rows.append(parent)
+            if limit and len(rows) >= limit:
+                return rows
+    return rows
@@ -0,0 +1,129 @@
+"""
+掃描日誌模組
+以只追加的 JSONL 記錄掃描進度（列表結果與每個完成的 ticket），中斷後可用 --resume 接續
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+def ticket_key(ticket_info: Dict) -> str:
+    """ticket 在日誌中的識別鍵"""
+    return ticket_info.get('id') or ticket_info.get('full_url') or ''
+
+
+class ScanJournal:
+    """只追加的掃描日誌（每筆記錄寫入後立即 fsync）"""
+
+    def __init__(self, path: str = None):
+        self.path = path or config.JOURNAL_CONFIG['path']
+        self._file = None
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        """是否有未完成的日誌"""
+        return os.path.exists(self.path)
+
+    def load(self) -> Optional[Dict]:
+        """讀取既有日誌，返回 {'header', 'tickets', 'scanned', 'completed'}；沒有日誌時返回 None"""
+        if not self.exists():
+            return None
+
+        state = {'header': None, 'tickets': None, 'scanned': 0, 'completed': {}}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中斷時最後一行可能只寫了一半
+                    logger.warning(f"略過日誌第 {line_number} 行（不完整）")
+                    continue
+
+                record_type = record.get('type')
+                if record_type == 'scan':
+                    state['header'] = record
+                elif record_type == 'list':
+                    state['tickets'] = record.get('tickets', [])
+                    state['scanned'] = record.get('scanned', 0)
+                elif record_type == 'ticket':
+                    state['completed'][record['key']] = record.get('interactions', [])
+
+        return state if state['header'] else None
+
+    def start(self, username: str, days_back: int, max_tickets: int):
+        """開始新的日誌（覆寫舊日誌）"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.close()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({
+            'type': 'scan',
+            'username': username,
+            'days_back': days_back,
+            'max_tickets': max_tickets,
+            'started_at': datetime.now().isoformat(),
+        })
+
+    def reopen(self):
+        """接續既有日誌（追加模式）；先截斷中斷時寫到一半的最後一行，避免下一筆記錄接在同一行"""
+        self.close()
+        self._truncate_partial_record()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _truncate_partial_record(self):
+        """將日誌截斷到最後一個換行（最後一行不完整時）"""
+        if not self.exists():
+            return
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            end = 0
+            position = size
+            while position > 0:
+                step = min(4096, position)
+                position -= step
+                f.seek(position)
+                newline = f.read(step).rfind(b'\n')
+                if newline != -1:
+                    end = position + newline + 1
+                    break
+            if end < size:
+                logger.warning(f"截斷日誌最後 {size - end} 位元組的不完整記錄")
+                f.truncate(end)
+
+    def record_list(self, tickets: List[Dict], scanned: int):
+        """記錄列表走訪結果"""
+        self._append({'type': 'list', 'tickets': tickets, 'scanned': scanned})
+
+    def record_ticket(self, ticket_info: Dict, interactions: List[Dict]):
+        """記錄一個已完成的 ticket（可由多個 worker 同時呼叫）"""
+        self._append({'type': 'ticket', 'key': ticket_key(ticket_info), 'interactions': interactions})
+
+    def _append(self, record: Dict):
+        """寫入一行並同步到磁碟"""
+        if not self._file:
+            return
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def finish(self):
+        """報告生成完成後移除日誌"""
+        self.close()
+        if self.exists():
+            os.remove(self.path)
+
+    def close(self):
+        """關閉日誌檔（保留內容供 --resume 使用）"""
+        if self._file:
+            self._file.close()
+            self._file = None
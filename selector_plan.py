@@ -0,0 +1,126 @@
+"""
+選擇器計畫模組
+將 config 中以逗號串接的備選選擇器編譯一次，並以單次查詢依序比對所有備選
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import config
+from selector_stats import get_selector_stats
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 在瀏覽器內依優先順序嘗試所有備選，返回 [元素, 備選索引, 各備選與命中元素的關係]
+# 關係：1 = 選到相同元素，0 = 選到不同元素，-1 = 未命中或選擇器無效
+RESOLVE_SCRIPT = """
+var alternatives = arguments[0];
+var found = null, index = -1, relations = [];
+for (var i = 0; i < alternatives.length; i++) {
+    var element = null;
+    try { element = document.querySelector(alternatives[i]); } catch (e) {}
+    if (element && !found) { found = element; index = i; }
+    relations.push(element ? (element === found ? 1 : 0) : -1);
+}
+if (!found) { return null; }
+return [found, index, relations];
+"""
+
+
+class SelectorPlan:
+    """已編譯的選擇器計畫"""
+
+    def __init__(self, selectors: str):
+        self.source = selectors
+        self.alternatives: List[str] = [s.strip() for s in selectors.split(',') if s.strip()]
+        self.last_match: Optional[str] = None
+        self.match_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _query(self, driver, ordered: List[str]):
+        """單次往返查詢，返回 (元素, 命中索引) 或 None"""
+        result = driver.execute_script(RESOLVE_SCRIPT, ordered)
+        if not result:
+            return None
+        element, index, relations = result
+        return element, int(index), relations
+
+    def _record(self, ordered: List[str], index: Optional[int], elapsed_ms: float, relations: List[int] = None):
+        """記錄命中的備選；排在它之前（或全部未命中時）的備選記為未命中，並記錄其後備選是否選到相同元素"""
+        stats = get_selector_stats()
+        tried = ordered if index is None else ordered[:index]
+        for selector in tried:
+            stats.record(self.source, selector, hit=False)
+
+        if index is None:
+            return
+
+        selector = ordered[index]
+        stats.record(self.source, selector, hit=True, elapsed_ms=elapsed_ms)
+        for other, relation in zip(ordered, relations or []):
+            if other != selector and relation >= 0:
+                stats.record_relation(self.source, selector, other, same=bool(relation))
+        with self._lock:
+            self.last_match = selector
+            self.match_counts[selector] = self.match_counts.get(selector, 0) + 1
+        logger.debug(f"選擇器命中: {selector} (第 {index + 1}/{len(ordered)} 個嘗試)")
+
+    def ordered_alternatives(self) -> List[str]:
+        """依衰減命中率排序的備選（只在選到相同元素的備選之間調整順序）"""
+        return get_selector_stats().order(self.source, self.alternatives)
+
+    def resolve(self, driver):
+        """單次往返查詢，返回第一個命中的元素或 None"""
+        ordered = self.ordered_alternatives()
+        started = time.monotonic()
+        result = self._query(driver, ordered)
+        elapsed_ms = (time.monotonic() - started) * 1000
+        if not result:
+            self._record(ordered, None, elapsed_ms)
+            return None
+        element, index, relations = result
+        self._record(ordered, index, elapsed_ms, relations)
+        return element
+
+    def wait(self, driver, timeout: float):
+        """在單一截止時間內等待任一備選出現，逾時拋出 TimeoutException"""
+        ordered = self.ordered_alternatives()
+        started = time.monotonic()
+        try:
+            element, index, relations = WebDriverWait(
+                driver, timeout,
+                poll_frequency=config.WAIT_CONFIG['poll_frequency'],
+                ignored_exceptions=(WebDriverException,)
+            ).until(lambda d: self._query(d, ordered))
+        except TimeoutException:
+            self._record(ordered, None, (time.monotonic() - started) * 1000)
+            raise TimeoutException(f"無法找到元素: {self.source}")
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self._record(ordered, index, elapsed_ms, relations)
+        logger.debug(f"等待選擇器 {self.last_match} 耗時 {elapsed_ms:.0f}ms")
+        return element
+
+
+_PLAN_CACHE: Dict[str, SelectorPlan] = {}
+_PLAN_CACHE_LOCK = threading.Lock()
+
+
+def compile_selectors(selectors: str) -> SelectorPlan:
+    """取得選擇器字串對應的計畫（每個字串只編譯一次）"""
+    plan = _PLAN_CACHE.get(selectors)
+    if plan is None:
+        with _PLAN_CACHE_LOCK:
+            plan = _PLAN_CACHE.setdefault(selectors, SelectorPlan(selectors))
+    return plan
+
+
+def compile_site_selectors(site_config: Dict) -> Dict[str, SelectorPlan]:
+    """預先編譯網站配置中的所有選擇器"""
+    return {name: compile_selectors(selectors) for name, selectors in site_config['selectors'].items()}
@@ -0,0 +1,186 @@
+"""
+選擇器統計模組
+記錄每個備選選擇器的命中次數、衰減命中率與查詢耗時，並依命中率調整嘗試順序；
+為避免通用的備選搶先選到不同的元素，備選只會移到確認選到相同元素、或近期幾乎都未命中的備選之前，其餘保持 config 順序
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+class SelectorStats:
+    """以群組（一組備選選擇器）為單位的命中統計"""
+
+    def __init__(self, path: str = None):
+        self.path = path or config.SELECTOR_STATS_CONFIG['path']
+        self.stats: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """讀取統計檔"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        except Exception as e:
+            logger.warning(f"讀取選擇器統計失敗: {e}")
+            self.stats = {}
+
+    def save(self):
+        """寫入統計檔（僅在有變更時）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self.stats, ensure_ascii=False, indent=2)
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"保存選擇器統計失敗: {e}")
+
+    def _entry(self, group: str, selector: str) -> Dict:
+        return self.stats.setdefault(group, {}).setdefault(selector, {'hits': 0, 'misses': 0, 'total_ms': 0.0})
+
+    def record(self, group: str, selector: str, hit: bool, elapsed_ms: float = 0.0):
+        """記錄一次查詢結果（同時更新衰減命中率）"""
+        decay = config.SELECTOR_STATS_CONFIG['decay']
+        with self._lock:
+            entry = self._entry(group, selector)
+            if hit:
+                entry['hits'] += 1
+            else:
+                entry['misses'] += 1
+            entry['rate'] = round(decay * self._rate(entry) + (1 - decay) * (1.0 if hit else 0.0), 6)
+            entry['total_ms'] = round(entry['total_ms'] + elapsed_ms, 3)
+            self._dirty = True
+
+    def record_relation(self, group: str, selector: str, other: str, same: bool):
+        """記錄兩個備選同時命中時是否選到相同元素（一旦選到不同元素即永久視為不可互換）"""
+        with self._lock:
+            for a, b in ((selector, other), (other, selector)):
+                entry = self._entry(group, a)
+                same_as = entry.setdefault('same', [])
+                differs = entry.setdefault('differs', [])
+                if not same:
+                    if b in same_as:
+                        same_as.remove(b)
+                    if b not in differs:
+                        differs.append(b)
+                elif b not in same_as and b not in differs:
+                    same_as.append(b)
+            self._dirty = True
+
+    @staticmethod
+    def _rate(entry: Optional[Dict]) -> float:
+        """衰減命中率（舊統計檔沒有 rate 時以累計命中率代替）"""
+        if not entry:
+            return 0.0
+        if 'rate' in entry:
+            return entry['rate']
+        total = entry.get('hits', 0) + entry.get('misses', 0)
+        return entry.get('hits', 0) / total if total else 0.0
+
+    def relation(self, group: str, selector: str, other: str) -> Optional[bool]:
+        """兩個備選是否選到相同元素（尚未確認時返回 None）"""
+        entry = self.stats.get(group, {}).get(selector, {})
+        if other in entry.get('differs', []):
+            return False
+        if other in entry.get('same', []):
+            return True
+        return None
+
+    def _can_pass(self, group: str, selector: str, other: str) -> bool:
+        """selector 是否可排到 other 之前：確認選到相同元素，或 other 已多次查詢且近期幾乎都未命中（且未曾選到不同元素）"""
+        relation = self.relation(group, selector, other)
+        if relation is not None:
+            return relation
+        other_entry = self.stats.get(group, {}).get(other) or {}
+        stats_config = config.SELECTOR_STATS_CONFIG
+        return (other_entry.get('misses', 0) >= stats_config['dead_min_misses']
+                and self._rate(other_entry) < stats_config['dead_rate'])
+
+    def order(self, group: str, alternatives: List[str]) -> List[str]:
+        """依衰減命中率排序，但只讓備選移到可越過的備選（見 _can_pass）之前，其餘保持原順序"""
+        group_stats = self.stats.get(group)
+        if not config.SELECTOR_STATS_CONFIG['enabled'] or not group_stats:
+            return list(alternatives)
+
+        ordered: List[str] = []
+        for selector in alternatives:
+            position = len(ordered)
+            rate = self._rate(group_stats.get(selector))
+            while (position and rate > self._rate(group_stats.get(ordered[position - 1]))
+                   and self._can_pass(group, selector, ordered[position - 1])):
+                position -= 1
+            ordered.insert(position, selector)
+        return ordered
+
+    def select_first(self, group: str, alternatives: List[str],
+                     query: Callable[[str], List]) -> Tuple[Optional[str], List]:
+        """
+        依排序以 query(選擇器) 嘗試備選，返回第一個有結果的 (選擇器, 結果)，皆無結果時返回 (None, [])
+
+        命中時，對曾經命中過但尚未確認關係的其他備選各查詢一次，記錄是否選到相同元素
+        """
+        for selector in self.order(group, alternatives):
+            started = time.monotonic()
+            try:
+                elements = query(selector)
+            except Exception as e:
+                logger.debug(f"選擇器查詢失敗 {selector}: {e}")
+                continue
+            self.record(group, selector, bool(elements), (time.monotonic() - started) * 1000)
+            if elements:
+                self._learn_relations(group, selector, elements, alternatives, query)
+                return selector, elements
+        return None, []
+
+    def _learn_relations(self, group: str, selector: str, elements: List,
+                         alternatives: List[str], query: Callable[[str], List]):
+        """比對命中的結果與其他曾命中備選的結果（每組只需確認一次）"""
+        group_stats = self.stats.get(group, {})
+        matched = [id(element) for element in elements]
+        for other in alternatives:
+            if other == selector or not group_stats.get(other, {}).get('hits'):
+                continue
+            if self.relation(group, selector, other) is not None:
+                continue
+            try:
+                other_elements = query(other)
+            except Exception:
+                continue
+            if other_elements:
+                self.record_relation(group, selector, other, [id(element) for element in other_elements] == matched)
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_selector_stats() -> SelectorStats:
+    """取得共用的統計實例（程式結束時自動保存）"""
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = SelectorStats()
+                atexit.register(_stats.save)
+    return _stats
@@ -0,0 +1,122 @@
+"""
+登入 session 快取模組
+將登入後的 cookies 以僅限本人讀寫的檔案保存，重複執行時先驗證 session 再決定是否重新登入
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+def site_origin(site_config: Dict) -> str:
+    """取得網站的 scheme://host"""
+    url = site_config.get('original_url') or site_config['login_url']
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class SessionCache:
+    """以網站 + 帳號為鍵的 cookie 快取"""
+
+    def __init__(self, cache_dir: str = None, max_age_hours: float = None):
+        self.cache_dir = os.path.expanduser(cache_dir or config.SESSION_CACHE_CONFIG['cache_dir'])
+        self.max_age_seconds = (max_age_hours or config.SESSION_CACHE_CONFIG['max_age_hours']) * 3600
+
+    def _path(self, site_config: Dict, username: str) -> str:
+        """快取檔案路徑（檔名不包含帳號明文）"""
+        key = hashlib.sha256(f"{site_origin(site_config)}|{username}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"session_{key}.json")
+
+    def save(self, site_config: Dict, username: str, cookies: List[Dict]):
+        """保存 cookies（目錄 0700、檔案 0600）"""
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            path = self._path(site_config, username)
+            entry = {
+                'origin': site_origin(site_config),
+                'saved_at': time.time(),
+                'cookies': cookies,
+            }
+
+            # 先以 0600 權限建立暫存檔，再原子性取代舊檔
+            tmp_path = path + '.tmp'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            logger.info(f"已保存登入 session 快取 ({len(cookies)} 個 cookies)")
+        except Exception as e:
+            logger.warning(f"保存 session 快取失敗: {e}")
+
+    def load(self, site_config: Dict, username: str) -> Optional[List[Dict]]:
+        """讀取未過期的 cookies，過期或不存在時返回 None"""
+        path = self._path(site_config, username)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception as e:
+            logger.warning(f"讀取 session 快取失敗: {e}")
+            self.invalidate(site_config, username)
+            return None
+
+        if self.is_expired(entry):
+            logger.info("session 快取已過期")
+            self.invalidate(site_config, username)
+            return None
+
+        return entry.get('cookies') or None
+
+    def is_expired(self, entry: Dict) -> bool:
+        """依保存時間與 cookie 的 expiry 判斷是否過期"""
+        now = time.time()
+        if now - entry.get('saved_at', 0) > self.max_age_seconds:
+            return True
+
+        expiries = [cookie['expiry'] for cookie in entry.get('cookies', []) if cookie.get('expiry')]
+        return bool(expiries) and min(expiries) <= now
+
+    def invalidate(self, site_config: Dict, username: str):
+        """刪除快取"""
+        try:
+            os.remove(self._path(site_config, username))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"刪除 session 快取失敗: {e}")
+
+    def probe(self, site_config: Dict, cookies: List[Dict]) -> bool:
+        """以一次 HTTP 請求驗證 session 是否仍有效（未被導回登入頁）"""
+        probe_url = site_config.get('probe_url') or site_config['login_url']
+        jar = requests.cookies.RequestsCookieJar()
+        for cookie in cookies:
+            jar.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+        try:
+            response = requests.get(
+                probe_url,
+                cookies=jar,
+                headers={'User-Agent': config.CHROME_CONFIG['user_agent']},
+                timeout=config.SESSION_CACHE_CONFIG['probe_timeout'],
+            )
+        except requests.RequestException as e:
+            logger.warning(f"session 驗證請求失敗: {e}")
+            return False
+
+        final_url = response.url.lower()
+        valid = response.status_code == 200 and 'login' not in urlparse(final_url).path and 'freshworks.com' not in final_url
+        logger.info(f"session 驗證{'成功' if valid else '失敗'}: HTTP {response.status_code} {response.url}")
+        return valid
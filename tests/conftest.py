@@ -0,0 +1,9 @@
+"""
+pytest 共用設定
+模組位於專案根目錄（非套件），測試前將根目錄加入匯入路徑
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
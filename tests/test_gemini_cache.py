@@ -0,0 +1,60 @@
+"""Gemini 回應快取的行為測試"""
+
+import os
+import time
+
+from gemini_cache import GeminiResponseCache, cache_key
+
+
+def make_cache(tmp_path, **kwargs):
+    return GeminiResponseCache(cache_dir=str(tmp_path / 'cache'), **kwargs)
+
+
+def test_cache_key_ignores_layout_but_not_config():
+    key = cache_key("line one\n   line two  \n\n", 'model', {'temperature': 0})
+    assert key == cache_key("line one\nline two", 'model', {'temperature': 0})
+    assert key != cache_key("line one\nline two", 'model', {'temperature': 1})
+    assert key != cache_key("line one\nline two", 'other-model', {'temperature': 0})
+
+
+def test_get_put_and_counters(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get('a' * 64) is None
+    cache.put('a' * 64, 'response', 'label')
+    assert cache.get('a' * 64) == 'response'
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert '命中 1 次' in cache.summary()
+
+
+def test_contains_does_not_count(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put('b' * 64, 'response')
+    assert cache.contains('b' * 64)
+    assert not cache.contains('c' * 64)
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = make_cache(tmp_path, max_age_hours=1)
+    cache.put('d' * 64, 'old')
+    path = cache._path('d' * 64)
+    stale = time.time() - 2 * 3600
+    os.utime(path, (stale, stale))
+    assert cache.get('d' * 64) is None
+    assert not os.path.exists(path)
+
+
+def test_evict_removes_oldest_over_size_limit(tmp_path):
+    cache = make_cache(tmp_path, max_size_mb=1)
+    for index, key in enumerate(('e' * 64, 'f' * 64)):
+        cache.put(key, 'x' * 700 * 1024)
+        os.utime(cache._path(key), (time.time() - 100 + index, time.time() - 100 + index))
+    cache.evict()
+    assert not os.path.exists(cache._path('e' * 64))
+    assert os.path.exists(cache._path('f' * 64))
+
+
+def test_empty_text_is_not_stored(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put('g' * 64, '')
+    assert not cache.contains('g' * 64)
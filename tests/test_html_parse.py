@@ -0,0 +1,38 @@
+"""HTML 解析後端與解析統計的行為測試"""
+
+import config
+import html_parse
+from html_parse import ParseStats, conversation_strainer, parse_html
+
+
+def test_strained_parse_keeps_only_conversation_subtrees():
+    html = ('<html><body><nav>menu</nav>'
+            '<div class="ticket-details"><div class="conversation">Hello</div></div>'
+            '<footer>footer</footer></body></html>')
+    soup = parse_html(html, parse_only=conversation_strainer(), record=False)
+    assert soup.select_one('.conversation').get_text() == 'Hello'
+    assert soup.find('nav') is None
+    assert soup.find('footer') is None
+
+
+def test_missing_lxml_falls_back_to_html_parser(monkeypatch):
+    monkeypatch.setattr(html_parse, 'LXML_AVAILABLE', False)
+    monkeypatch.setitem(config.PARSER_CONFIG, 'backend', 'lxml')
+    assert html_parse.parser_features() == 'html.parser'
+    monkeypatch.setitem(config.PARSER_CONFIG, 'backend', 'auto')
+    assert html_parse.parser_features() == 'html.parser'
+
+
+def test_parse_stats_aggregates_without_keeping_pages(monkeypatch):
+    monkeypatch.setitem(config.PARSER_CONFIG, 'report_stats', False)
+    stats = ParseStats()
+    assert stats.summary() == "尚未解析任何頁面"
+
+    stats.record('a', 1024, 4.0, strained=True, rss_growth_mb=2.0)
+    stats.record('b', 2048, 8.0, strained=False)
+    assert stats.pages == 2
+    assert stats.strained_pages == 1
+    assert stats.total_bytes == 3072
+    assert stats.max_ms == 8.0
+    assert stats.max_rss_growth_mb == 2.0
+    assert '解析 2 頁' in stats.summary()
@@ -0,0 +1,22 @@
+"""HTML 轉文字的行為測試"""
+
+from bs4 import BeautifulSoup
+
+from html_text import html_to_text
+
+
+def soup(html):
+    return BeautifulSoup(html, 'html.parser')
+
+
+def test_html_to_text_keeps_block_breaks_and_skips_noise():
+    element = soup(
+        '<div><p>Hello <b>world</b></p><p></p><div>line<br>two</div>'
+        '<script>var x;</script><!-- comment --></div>'
+    ).div
+    assert html_to_text(element) == 'Hello world\nline\ntwo'
+    assert html_to_text(element, preserve_blocks=False) == 'Hello world line two'
+
+
+def test_html_to_text_none():
+    assert html_to_text(None) == ''
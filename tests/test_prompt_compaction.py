@@ -0,0 +1,75 @@
+"""prompt 壓縮的行為測試"""
+
+import json
+
+from prompt_compaction import compact_activities, compact_activity, dumps_compact, missing_content
+
+
+def make_activity(**overrides):
+    activity = {
+        'id': '12345',
+        'title': 'Modem resets',
+        'date': '2024-01-02',
+        'status': 'Pending',
+        'url': '/a/tickets/12345',
+        'full_url': 'https://eservice.example.com/a/tickets/12345',
+        'content': 'The module resets',
+        'raw_text': 'noise',
+        'detailed_interactions': [
+            {
+                'timestamp': '2 days ago',
+                'author': 'Customer',
+                'type': 'customer_response',
+                'content': 'The module resets',
+                'ltr_content': 'The module resets after OTA, see FAE-1234',
+                'jira_links': [{'ticket_id': 'FAE-1234', 'full_url': 'https://jira/browse/FAE-1234'}],
+            },
+            {
+                'author': 'FAE',
+                'type': 'reply',
+                'content': 'Tracked in the Jira ticket',
+                'jira_links': [{'ticket_id': 'FAE-5678', 'full_url': 'https://jira/browse/FAE-5678'}],
+            },
+        ],
+    }
+    activity.update(overrides)
+    return activity
+
+
+def test_compact_activity_drops_redundant_fields():
+    compact = compact_activity(make_activity())
+    assert compact['i'] == '12345'
+    assert 'url' not in json.dumps(compact)
+    assert 'noise' not in json.dumps(compact)
+    # content 為 ltr_content 的子集，只保留較完整的一份；列表摘要重複時省略
+    assert compact['x'][0]['c'] == 'The module resets after OTA, see FAE-1234'
+    assert 'p' not in compact
+    # 已出現在文字中的 Jira 號不重複列出
+    assert compact['j'] == ['FAE-5678']
+
+
+def test_compact_payload_loses_no_content():
+    activity = make_activity()
+    assert missing_content(activity, compact_activity(activity)) == []
+
+
+def test_missing_content_detects_dropped_jira_ids():
+    activity = make_activity()
+    compact = compact_activity(activity)
+    compact['j'] = []
+    assert missing_content(activity, compact) == ['FAE-5678']
+
+
+def test_compact_activities_falls_back_to_full_text():
+    # content 與 ltr_content 互不包含時兩份都保留
+    activity = make_activity()
+    activity['detailed_interactions'][0]['content'] = 'A different summary'
+    [compact] = compact_activities([activity])
+    assert 'A different summary' in compact['x'][0]['c']
+    assert missing_content(activity, compact) == []
+
+
+def test_dumps_compact_is_smaller_than_default_json():
+    payload = compact_activities([make_activity()])
+    assert len(dumps_compact(payload)) < len(json.dumps(payload))
+    assert ', ' not in dumps_compact({'a': [1, 2]})
@@ -0,0 +1,112 @@
+"""串流報告輸出的行為測試"""
+
+import json
+import random
+import threading
+
+import config
+from report_sinks import StreamingReportWriter, load_report_data
+
+
+def make_ticket(number):
+    return {'id': str(number), 'title': f'Ticket {number}', 'status': 'Pending', 'date': '2024-01-02'}
+
+
+def written_ids(writer):
+    return [activity['id'] for activity in load_report_data(writer.paths['jsonl'])['activities']]
+
+
+def test_write_at_follows_list_order_not_completion_order(tmp_path):
+    tickets = [make_ticket(number) for number in range(20)]
+    writer = StreamingReportWriter(str(tmp_path), days_back=7)
+
+    completion = list(enumerate(tickets))
+    random.Random(1).shuffle(completion)
+    threads = [threading.Thread(target=writer.write_at, args=(index, dict(ticket, detailed_interactions=[])))
+               for index, ticket in completion]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    assert written_ids(writer) == [ticket['id'] for ticket in tickets]
+
+
+def test_write_at_buffers_until_gap_is_filled(tmp_path):
+    writer = StreamingReportWriter(str(tmp_path), days_back=7)
+    writer.write_at(1, make_ticket(1))
+    writer.write_at(2, make_ticket(2))
+    assert writer.count == 0
+    writer.write_at(0, make_ticket(0))
+    assert writer.count == 3
+    writer.close()
+
+
+def test_close_flushes_tickets_after_a_missing_one(tmp_path):
+    writer = StreamingReportWriter(str(tmp_path), days_back=7)
+    writer.write_at(0, make_ticket(0))
+    writer.write_at(3, make_ticket(3))
+    writer.write_at(2, make_ticket(2))
+    writer.close()
+    assert written_ids(writer) == ['0', '2', '3']
+
+
+def test_close_writes_json_deliverable_and_is_idempotent(tmp_path):
+    writer = StreamingReportWriter(str(tmp_path), days_back=7)
+    writer.write(make_ticket(1))
+    paths = writer.close()
+    assert writer.close() == paths
+
+    with open(paths['json'], 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['scan_days'] == 7
+    assert report['total_activities'] == 1
+    assert report['activities'][0]['id'] == '1'
+    assert load_report_data(paths['json']) == report
+
+
+def test_load_report_data_skips_truncated_last_line(tmp_path):
+    path = tmp_path / 'partial.jsonl'
+    path.write_text('{"report_date": "2024-01-02", "scan_days": 7}\n{"id": "1"}\n{"id": "2", "ti', encoding='utf-8')
+    data = load_report_data(str(path))
+    assert data['scan_days'] == 7
+    assert [activity['id'] for activity in data['activities']] == ['1']
+
+
+def test_json_deliverable_matches_jsonl_for_many_activities(tmp_path):
+    writer = StreamingReportWriter(str(tmp_path), days_back=3)
+    for number in range(5):
+        writer.write(dict(make_ticket(number), detailed_interactions=[{'content': f'第 {number} 則\n回覆'}]))
+    paths = writer.close()
+
+    with open(paths['json'], 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    assert report == load_report_data(paths['jsonl'])
+    assert report['total_activities'] == 5
+
+
+def test_json_deliverable_without_activities(tmp_path):
+    writer = StreamingReportWriter(str(tmp_path), days_back=7)
+    paths = writer.close()
+    with open(paths['json'], 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['activities'] == []
+    assert report['total_activities'] == 0
+
+
+def test_write_at_skips_a_stuck_ticket_once_pending_is_full(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.REPORT_CONFIG, 'max_pending_activities', 3)
+    writer = StreamingReportWriter(str(tmp_path), days_back=7)
+    writer.write_at(0, make_ticket(0))
+    for index in range(2, 5):
+        writer.write_at(index, make_ticket(index))
+    assert writer.count == 1
+    writer.write_at(5, make_ticket(5))
+    assert writer.count == 5
+    assert not writer._pending
+
+    # 被跳過的 ticket 完成後直接寫入
+    writer.write_at(1, make_ticket(1))
+    writer.close()
+    assert written_ids(writer) == ['0', '2', '3', '4', '5', '1']
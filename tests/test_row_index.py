@@ -0,0 +1,45 @@
+"""列表列索引的行為測試"""
+
+from bs4 import BeautifulSoup
+
+from row_index import TicketRowIndex, find_rows_by_date_text
+
+
+def soup(html):
+    return BeautifulSoup(html, 'html.parser')
+
+
+def test_row_index_picks_highest_priority_keywords():
+    row = soup(
+        '<tr><td><a href="/a/tickets/123" data-test-link>Modem resets</a></td>'
+        '<td>Closed</td><td>3 days ago</td><td>Jan 2 2024</td>'
+        '<td><time datetime="2024-01-02T10:00">x</time></td><td title="2 Jan 2024">d</td></tr>'
+    ).tr
+    index = TicketRowIndex(row)
+
+    # 年份優先於相對時間，與逐一嘗試關鍵字的順序相同
+    assert index.date_text == 'Jan 2 2024'
+    assert index.status_text == 'Closed'
+    assert index.link['href'] == '/a/tickets/123'
+    assert index.title_link.get_text() == 'Modem resets'
+    assert index.time_datetimes == ['2024-01-02T10:00']
+    assert index.year_titles == ['2 Jan 2024']
+
+
+def test_row_index_status_is_case_insensitive_and_ranked():
+    index = TicketRowIndex(soup('<li><span>PENDING</span><span>open</span></li>').li)
+    assert index.status_text == 'open'
+
+
+def test_row_index_without_keywords():
+    index = TicketRowIndex(soup('<tr><td>nothing here</td></tr>').tr)
+    assert index.date_text == ''
+    assert index.status_text == ''
+    assert index.link is None
+
+
+def test_find_rows_by_date_text_orders_by_keyword_then_document():
+    page = soup('<ul><li>Feb 3</li><li>2024-01-01</li><li>Jan 5</li><li>no date</li></ul>')
+    rows = find_rows_by_date_text(page)
+    assert [row.get_text() for row in rows] == ['2024-01-01', 'Jan 5', 'Feb 3']
+    assert len(find_rows_by_date_text(page, limit=2)) == 2
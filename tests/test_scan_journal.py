@@ -0,0 +1,110 @@
+"""掃描日誌與接續流程的行為測試"""
+
+from report_sinks import StreamingReportWriter, load_report_data
+from scan_journal import ScanJournal, ticket_key
+
+
+def make_ticket(number):
+    return {'id': str(number), 'title': f'Ticket {number}', 'status': 'Pending', 'date': '2024-01-02'}
+
+
+def test_journal_round_trip_and_truncated_record(tmp_path):
+    journal = ScanJournal(str(tmp_path / 'journal.jsonl'))
+    assert journal.load() is None
+
+    tickets = [make_ticket(number) for number in range(3)]
+    journal.start('fae@example.com', 7, 50)
+    journal.record_list(tickets, scanned=5)
+    journal.record_ticket(tickets[1], [{'content': 'answer'}])
+    journal.close()
+    # 模擬寫到一半時中斷
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "ticket", "key": "2", "inter')
+
+    state = journal.load()
+    assert state['header']['username'] == 'fae@example.com'
+    assert state['tickets'] == tickets
+    assert state['scanned'] == 5
+    assert state['completed'] == {'1': [{'content': 'answer'}]}
+
+
+def test_resume_reuses_completed_tickets_and_keeps_list_order(tmp_path):
+    tickets = [make_ticket(number) for number in range(5)]
+    journal = ScanJournal(str(tmp_path / 'journal.jsonl'))
+    journal.start('fae@example.com', 7, 50)
+    journal.record_list(tickets, scanned=5)
+    for number in (3, 1):
+        journal.record_ticket(tickets[number], [{'content': f'done {number}'}])
+    journal.close()
+
+    # 與 scan_tickets_and_generate_report 相同的接續流程
+    state = journal.load()
+    journal.reopen()
+    writer = StreamingReportWriter(str(tmp_path / 'reports'), days_back=7)
+    list_index = {id(ticket): index for index, ticket in enumerate(state['tickets'])}
+
+    def complete_ticket(ticket, interactions):
+        writer.write_at(list_index[id(ticket)], dict(ticket, detailed_interactions=interactions))
+
+    completed = state['completed']
+    pending = []
+    for ticket in state['tickets']:
+        key = ticket_key(ticket)
+        if key in completed:
+            complete_ticket(ticket, completed.pop(key))
+        else:
+            pending.append(ticket)
+    assert [ticket['id'] for ticket in pending] == ['0', '2', '4']
+
+    # 其餘 ticket 以相反順序完成並記錄到日誌
+    for ticket in reversed(pending):
+        interactions = [{'content': f"fetched {ticket['id']}"}]
+        journal.record_ticket(ticket, interactions)
+        complete_ticket(ticket, interactions)
+    writer.close()
+
+    activities = load_report_data(writer.paths['jsonl'])['activities']
+    assert [activity['id'] for activity in activities] == ['0', '1', '2', '3', '4']
+    assert activities[1]['detailed_interactions'] == [{'content': 'done 1'}]
+    assert len(journal.load()['completed']) == 5
+
+    journal.finish()
+    assert not journal.exists()
+
+
+def test_resume_after_torn_write_keeps_new_records(tmp_path):
+    tickets = [make_ticket(number) for number in range(3)]
+    journal = ScanJournal(str(tmp_path / 'journal.jsonl'))
+    journal.start('fae@example.com', 7, 50)
+    journal.record_list(tickets, scanned=3)
+    journal.record_ticket(tickets[0], [{'content': 'first'}])
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "ticket", "key": "1", "inter')
+
+    journal.load()
+    journal.reopen()
+    journal.record_ticket(tickets[1], [{'content': 'second'}])
+    journal.record_ticket(tickets[2], [{'content': 'third'}])
+    journal.close()
+
+    state = journal.load()
+    assert state['completed'] == {
+        '0': [{'content': 'first'}],
+        '1': [{'content': 'second'}],
+        '2': [{'content': 'third'}],
+    }
+    with open(journal.path, 'r', encoding='utf-8') as f:
+        assert all(line.endswith('\n') for line in f)
+
+
+def test_reopen_keeps_complete_journal_intact(tmp_path):
+    journal = ScanJournal(str(tmp_path / 'journal.jsonl'))
+    journal.start('fae@example.com', 7, 50)
+    journal.close()
+    with open(journal.path, 'rb') as f:
+        before = f.read()
+    journal.reopen()
+    journal.close()
+    with open(journal.path, 'rb') as f:
+        assert f.read() == before
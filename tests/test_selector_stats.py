@@ -0,0 +1,96 @@
+"""選擇器排序的行為測試"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+import config
+from selector_stats import SelectorStats
+
+ALTERNATIVES = ['.specific', '.alias', 'div']
+
+
+@pytest.fixture
+def stats(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.SELECTOR_STATS_CONFIG, 'enabled', True)
+    return SelectorStats(path=str(tmp_path / 'selector_stats.json'))
+
+
+def test_order_without_history_keeps_config_order(stats):
+    assert stats.order('group', ALTERNATIVES) == ALTERNATIVES
+
+
+def test_generic_fallback_does_not_jump_ahead_of_specific(stats):
+    fallback_page = BeautifulSoup('<div class="other">a</div>', 'html.parser')
+    assert stats.select_first('group', ALTERNATIVES, fallback_page.select)[0] == 'div'
+
+    # 特定選擇器與通用選擇器選到不同元素，通用選擇器不可提前
+    page = BeautifulSoup('<p class="specific">a</p><div>b</div>', 'html.parser')
+    assert stats.select_first('group', ALTERNATIVES, page.select)[0] == '.specific'
+    assert stats.relation('group', '.specific', 'div') is False
+    assert stats.order('group', ALTERNATIVES) == ALTERNATIVES
+
+
+def test_selector_that_keeps_winning_moves_ahead_of_missing_ones(stats):
+    # 前兩個備選一直未命中、第三個一直命中：重複查詢後命中的備選排到最前面
+    alternatives = ['.conversation-text', '[data-test-id="conversation"]', '.message-body', 'div']
+    page = BeautifulSoup('<div class="message-body">hi</div>', 'html.parser')
+
+    tried = []
+    for _ in range(8):
+        order = stats.order('conversation', alternatives)
+        tried.append(order[:order.index('.message-body') + 1])
+        assert stats.select_first('conversation', alternatives, page.select)[0] == '.message-body'
+
+    assert tried[0] == ['.conversation-text', '[data-test-id="conversation"]', '.message-body']
+    assert tried[-1] == ['.message-body']
+    # 之後的通用備選未命中過，仍保持原本的相對順序
+    assert stats.order('conversation', alternatives) == ['.message-body', '.conversation-text',
+                                                        '[data-test-id="conversation"]', 'div']
+
+
+def test_one_fallback_win_does_not_pass_untested_selectors(stats):
+    fallback_page = BeautifulSoup('<div>a</div>', 'html.parser')
+    stats.select_first('group', ALTERNATIVES, fallback_page.select)
+    assert stats.order('group', ALTERNATIVES) == ALTERNATIVES
+
+
+def test_recently_hitting_selector_is_not_passed(stats):
+    # 特定選擇器近期仍有命中，偶爾勝出的通用選擇器不可越過它
+    specific_page = BeautifulSoup('<p class="specific">a</p>', 'html.parser')
+    fallback_page = BeautifulSoup('<div>a</div>', 'html.parser')
+    for _ in range(5):
+        stats.select_first('group', ALTERNATIVES, specific_page.select)
+    for _ in range(3):
+        assert stats.select_first('group', ALTERNATIVES, fallback_page.select)[0] == 'div'
+    assert stats.order('group', ALTERNATIVES)[0] == '.specific'
+
+
+def test_different_element_is_sticky(stats):
+    stats.record('group', '.alias', hit=True)
+    stats.record_relation('group', '.alias', '.specific', same=True)
+    stats.record_relation('group', '.alias', '.specific', same=False)
+    stats.record_relation('group', '.alias', '.specific', same=True)
+    assert stats.relation('group', '.specific', '.alias') is False
+    assert stats.order('group', ALTERNATIVES) == ALTERNATIVES
+
+
+def test_decayed_rate_follows_recent_results(stats, monkeypatch):
+    monkeypatch.setitem(config.SELECTOR_STATS_CONFIG, 'decay', 0.5)
+    for _ in range(10):
+        stats.record('group', '.specific', hit=True)
+    for _ in range(3):
+        stats.record('group', '.specific', hit=False)
+    assert stats.stats['group']['.specific']['rate'] < 0.2
+
+
+def test_disabled_keeps_config_order(stats, monkeypatch):
+    stats.record('group', '.alias', hit=True)
+    stats.record_relation('group', '.alias', '.specific', same=True)
+    monkeypatch.setitem(config.SELECTOR_STATS_CONFIG, 'enabled', False)
+    assert stats.order('group', ALTERNATIVES) == ALTERNATIVES
+
+
+def test_save_and_load_round_trip(stats):
+    stats.record('group', '.alias', hit=True)
+    stats.save()
+    assert SelectorStats(path=stats.path).stats['group']['.alias']['hits'] == 1
@@ -0,0 +1,55 @@
+"""引用移除與郵件串去重的行為測試"""
+
+from thread_compaction import ThreadDeduplicator, compact_thread, strip_quoted_text
+
+
+def test_strips_prefixed_quote_lines_and_header():
+    text = "Fixed in the new firmware.\n\nOn Tue, Jan 2, 2024 at 10:00 AM Bob <bob@example.com> wrote:\n> old message"
+    assert strip_quoted_text(text) == "Fixed in the new firmware."
+
+
+def test_strips_inline_mail_client_header():
+    text = "Thanks, fixed. On Tue, Jan 2, 2024 at 10:00 AM Bob <bob@example.com> wrote: Hi team, old text"
+    assert strip_quoted_text(text) == "Thanks, fixed."
+
+
+def test_keeps_prose_that_mentions_someone_wrote():
+    text = "On Monday the customer wrote: the module resets after OTA."
+    assert strip_quoted_text(text) == text
+    text = "Note: on Monday the customer wrote: the module resets after OTA."
+    assert strip_quoted_text(text) == text
+
+
+def test_inline_attribution_followed_by_quote_is_stripped():
+    assert strip_quoted_text("Please check. On Tue Bob wrote: > old") == "Please check."
+    assert strip_quoted_text("Please check. On Tue Bob wrote:\n> old\n> more") == "Please check."
+
+
+def test_outlook_header_requires_following_fields():
+    text = "From: the field log we see a crash\nPlease advise"
+    assert strip_quoted_text(text) == text
+    quoted = "See attached.\nFrom: Bob\nSent: Tuesday\nSubject: old"
+    assert strip_quoted_text(quoted) == "See attached."
+
+
+def test_deduplicator_drops_repeated_and_near_duplicate_paragraphs():
+    paragraph = "The module resets every time the network registration fails after the OTA update"
+    deduplicator = ThreadDeduplicator()
+    assert deduplicator.novel_text(paragraph) == paragraph
+    assert deduplicator.novel_text(paragraph) == ''
+    assert deduplicator.novel_text(paragraph + '.') == ''
+    assert deduplicator.dropped == 2
+
+
+def test_deduplicator_keeps_short_and_distinct_paragraphs():
+    deduplicator = ThreadDeduplicator()
+    deduplicator.novel_text("Thanks\nPlease collect the QXDM log while reproducing the reset issue")
+    assert deduplicator.novel_text("Thanks") == "Thanks"
+    distinct = "The customer confirmed that firmware R02A08 resolves the SIM detection problem"
+    assert deduplicator.novel_text(distinct) == distinct
+
+
+def test_compact_thread_removes_history_from_later_replies():
+    first = "Please collect the QXDM log while reproducing the reset issue on the EVB"
+    second = f"Log attached.\n{first}"
+    assert compact_thread([first, second]) == [first, "Log attached."]
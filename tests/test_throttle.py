@@ -0,0 +1,118 @@
+"""AIMD 節流、速率限制與 Retry-After 解析的行為測試"""
+
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import config
+import throttle
+from throttle import AimdController, IntervalRateLimiter, RetryableFetchError, parse_retry_after
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setitem(config.THROTTLE_CONFIG, 'latency_window', 4)
+    monkeypatch.setitem(config.THROTTLE_CONFIG, 'initial_concurrency', 2)
+    monkeypatch.setitem(config.THROTTLE_CONFIG, 'max_retries', 2)
+    return AimdController(max_concurrency=4, name="test")
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    assert parse_retry_after('5') == 5.0
+    assert parse_retry_after('-3') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= parse_retry_after(future) <= 30
+
+
+def test_stable_latency_increases_concurrency(controller):
+    # 每個延遲穩定的視窗加法增加一次，直到上限
+    for _ in range(4):
+        controller.record(0.1, 200)
+    assert controller.concurrency == 3
+    for _ in range(8):
+        controller.record(0.1, 200)
+    assert controller.concurrency == 4
+    assert controller.stats['increases'] == 2
+
+
+def test_throttled_status_halves_concurrency_once_per_burst(controller):
+    controller.limit = 4
+    controller.record(0.1, 503)
+    controller.record(0.1, 429)
+    assert controller.concurrency == 2
+    assert controller.stats == dict(controller.stats, throttled=2, decreases=1)
+
+
+def test_latency_spike_decreases_concurrency(controller):
+    controller.limit = 4
+    for _ in range(4):
+        controller.record(0.1, 200)
+    for _ in range(4):
+        controller.record(1.0, 200)
+    assert controller.concurrency == 2
+
+
+def test_retry_after_pauses_new_slots(controller):
+    controller.record(0.1, 429, retry_after=30)
+    assert controller._try_enter() > 25
+
+
+def test_call_with_retry_retries_then_succeeds(controller, monkeypatch):
+    monkeypatch.setattr(throttle.time, 'sleep', lambda seconds: None)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RetryableFetchError("busy", status=503)
+        return 'ok'
+
+    assert controller.call_with_retry(flaky, "flaky") == 'ok'
+    assert len(attempts) == 3
+    assert controller.stats['retries'] == 2
+
+
+def test_call_with_retry_raises_when_exhausted(controller, monkeypatch):
+    monkeypatch.setattr(throttle.time, 'sleep', lambda seconds: None)
+
+    def always_busy():
+        raise RetryableFetchError("busy", status=503)
+
+    with pytest.raises(RetryableFetchError):
+        controller.call_with_retry(always_busy, "busy")
+    assert controller.stats['retries'] == 2
+
+
+def test_latency_excludes_time_before_start_timer(controller, monkeypatch):
+    latencies = []
+    monkeypatch.setattr(controller, 'record', lambda latency, *args: latencies.append(latency))
+
+    def fetch():
+        time.sleep(0.05)  # 例如等待借用瀏覽器
+        controller.start_timer()
+        controller.stop_timer()
+        time.sleep(0.05)  # 解析回應
+        return 'ok'
+
+    controller.call_with_retry(fetch)
+    assert latencies[0] < 0.03
+
+
+def test_interval_rate_limiter_spaces_requests():
+    limiter = IntervalRateLimiter(requests_per_second=20)
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - started >= 0.09
+
+
+def test_interval_rate_limiter_disabled():
+    limiter = IntervalRateLimiter(requests_per_second=0)
+    started = time.monotonic()
+    for _ in range(100):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.05
@@ -0,0 +1,230 @@
+"""
+郵件串壓縮模組
+移除回覆中引用的歷史郵件（On … wrote:、> 前綴、gmail_quote、Outlook 分隔線），
+並以 shingling + MinHash 去除同一 ticket 各互動間近似重複的段落，只保留每個互動的新內容
+"""
+
+import re
+import zlib
+import random
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# HTML 中的引用區塊（Gmail、Outlook、Thunderbird、Apple Mail 等）
+QUOTE_HTML_SELECTORS = [
+    'div.gmail_quote', 'blockquote.gmail_quote', 'div.gmail_extra',
+    'div#divRplyFwdMsg', 'div#appendonsend', 'div.OutlookMessageHeader',
+    'div.moz-cite-prefix', 'blockquote[type="cite"]', 'div.yahoo_quoted',
+    'div.freshdesk_quote', 'blockquote.freshdesk_quote',
+]
+
+# 文字中引用開始的行（該行與之後的內容皆為歷史郵件）
+QUOTE_HEADER_PATTERNS = [
+    r'^\s*On\b.{0,200}\bwrote:\s*$',  # Gmail / Apple Mail
+    r'^\s*在.{0,200}(寫道|写道)[:：]\s*$',  # 中文 Gmail
+    r'^\s*於.{0,200}(寫道|写道)[:：]\s*$',
+    r'^\s*-{2,}\s*(Original Message|原始郵件|原始邮件|Forwarded message)\s*-{2,}\s*$',  # Outlook / 轉寄
+    r'^\s*_{10,}\s*$',  # Outlook 分隔線
+    r'^\s*(From|寄件者|发件人|發件人)\s*[:：].+$',  # Outlook 標頭（需緊接 Sent/Date/To 行才視為引用）
+]
+QUOTE_HEADER_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in QUOTE_HEADER_PATTERNS), re.IGNORECASE)
+OUTLOOK_HEADER_FIELD_RE = re.compile(r'^\s*(Sent|Date|To|Subject|傳送時間|发送时间|日期|收件者|收件人|主旨|主题)\s*[:：]', re.IGNORECASE)
+FROM_LINE_RE = re.compile(r'^\s*(From|寄件者|发件人|發件人)\s*[:：]', re.IGNORECASE)
+# 行內的引用開頭（LTR 內容等已合併為單行的文字）
+QUOTE_INLINE_RE = re.compile(
+    r'-{2,}\s*(?:Original Message|Forwarded message|原始郵件|原始邮件)\s*-{2,}'
+    r'|\b(?:From|寄件者|發件人|发件人)\s*[:：].{0,200}?\b(?:Sent|Date|傳送時間|发送时间)\s*[:：]',
+    re.IGNORECASE
+)
+# 行內的 "On … wrote:" 類引用開頭：正文也可能出現（"On Monday the customer wrote: ..."），
+# 只有緊接著引用內容（> 開頭），或本身帶有郵件地址或時間（郵件軟體產生的標頭）時才視為引用
+QUOTE_ATTRIBUTION_RE = re.compile(r'\bOn\s.{0,200}?\bwrote:|在.{0,200}?(?:寫道|写道)[:：]', re.IGNORECASE)
+MAIL_HEADER_HINT_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+|\b\d{1,2}:\d{2}\b')
+
+# 分詞：英數字詞與單一中日韓字元
+TOKEN_RE = re.compile(r'[a-z0-9]+|[぀-ヿ㐀-鿿가-힯]')
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?。！？])\s+')
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def strip_quoted_html(element) -> int:
+    """就地移除元素內的引用區塊，返回移除的數量"""
+    removed = 0
+    for selector in QUOTE_HTML_SELECTORS:
+        for quote in element.select(selector):
+            if quote.decomposed:
+                continue
+            quote.decompose()
+            removed += 1
+    return removed
+
+
+def _inline_quote_start(lines: List[str], index: int) -> Optional[int]:
+    """行內引用開頭的位置（位於行首時由引用標頭處理，返回 None）"""
+    line = lines[index]
+    marker = QUOTE_INLINE_RE.search(line)
+    if marker and marker.start() > 0:
+        return marker.start()
+
+    for attribution in QUOTE_ATTRIBUTION_RE.finditer(line):
+        if attribution.start() == 0:
+            continue
+        rest = line[attribution.end():].lstrip()
+        next_line = next((candidate for candidate in lines[index + 1:] if candidate.strip()), '')
+        quoted_follows = rest.startswith('>') or (not rest and next_line.lstrip().startswith('>'))
+        if quoted_follows or MAIL_HEADER_HINT_RE.search(attribution.group()):
+            return attribution.start()
+    return None
+
+
+def strip_quoted_text(text: str) -> str:
+    """移除文字中的引用內容：> 開頭的行，以及引用標頭（或行內的引用開頭）之後的所有內容"""
+    if not text:
+        return text
+
+    lines = text.split('\n')
+    kept = []
+    for index, line in enumerate(lines):
+        if line.lstrip().startswith('>'):
+            continue
+        inline_start = _inline_quote_start(lines, index)
+        if inline_start:
+            kept.append(line[:inline_start])
+            break
+        if QUOTE_HEADER_RE.match(line):
+            # From: 行需緊接 Outlook 標頭欄位，避免誤判正文中的 "From: ..." 句子
+            if FROM_LINE_RE.match(line):
+                following = lines[index + 1:index + 3]
+                if not any(OUTLOOK_HEADER_FIELD_RE.match(next_line) for next_line in following):
+                    kept.append(line)
+                    continue
+            break
+        kept.append(line)
+
+    return '\n'.join(kept).strip()
+
+
+def split_paragraphs(text: str, max_chars: int = 500) -> List[str]:
+    """以行分段，過長的段落再依句子切分"""
+    paragraphs = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= max_chars:
+            paragraphs.append(line)
+        else:
+            paragraphs.extend(sentence for sentence in SENTENCE_SPLIT_RE.split(line) if sentence.strip())
+    return paragraphs
+
+
+class MinHasher:
+    """以 token shingle 計算 MinHash 簽章"""
+
+    def __init__(self, num_perm: int = 32, shingle_size: int = 3, seed: int = 1):
+        rng = random.Random(seed)
+        self.shingle_size = shingle_size
+        self.params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> Set[int]:
+        tokens = TOKEN_RE.findall(text.lower())
+        size = min(self.shingle_size, len(tokens)) or 1
+        return {zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8')) for i in range(max(1, len(tokens) - size + 1))}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        hashes = self.shingles(text)
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self.params)
+
+
+class ThreadDeduplicator:
+    """同一 ticket 的段落去重（MinHash + LSH 分桶找候選，簽章相似度確認）"""
+
+    def __init__(self, threshold: float = None, num_perm: int = None, bands: int = None,
+                 shingle_size: int = None, min_chars: int = None):
+        compaction_config = config.THREAD_COMPACTION_CONFIG
+        self.threshold = threshold or compaction_config['similarity_threshold']
+        self.min_chars = min_chars or compaction_config['min_paragraph_chars']
+        num_perm = num_perm or compaction_config['num_perm']
+        self.bands = bands or compaction_config['bands']
+        self.rows = num_perm // self.bands
+        self.hasher = MinHasher(num_perm=self.rows * self.bands, shingle_size=shingle_size or compaction_config['shingle_size'])
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._signatures: List[Tuple[int, ...]] = []
+        self._exact: Set[str] = set()
+        self.dropped = 0
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def _is_duplicate(self, signature) -> bool:
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        for candidate in candidates:
+            other = self._signatures[candidate]
+            similarity = sum(1 for x, y in zip(signature, other) if x == y) / len(signature)
+            if similarity >= self.threshold:
+                return True
+        return False
+
+    def _remember(self, signature):
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(index)
+
+    def novel_text(self, text: str) -> str:
+        """返回 text 中未曾出現過（或不近似）的段落，並記住這些段落"""
+        kept = []
+        for paragraph in split_paragraphs(text):
+            normalized = ' '.join(paragraph.lower().split())
+            # 短段落（問候語、簡短回答）不做比對，避免誤刪
+            if len(normalized) < self.min_chars:
+                kept.append(paragraph)
+                continue
+            if normalized in self._exact:
+                self.dropped += 1
+                continue
+
+            signature = self.hasher.signature(normalized)
+            if self._is_duplicate(signature):
+                self.dropped += 1
+                continue
+            self._exact.add(normalized)
+            self._remember(signature)
+            kept.append(paragraph)
+
+        return '\n'.join(kept)
+
+
+def compact_thread(texts: List[str]) -> List[str]:
+    """依序壓縮同一 ticket 的互動文字：移除引用內容後去除與先前互動近似的段落"""
+    if not config.THREAD_COMPACTION_CONFIG['enabled']:
+        return texts
+
+    deduplicator = ThreadDeduplicator()
+    compacted = [deduplicator.novel_text(strip_quoted_text(text or '')) for text in texts]
+
+    before = sum(len(text or '') for text in texts)
+    after = sum(len(text) for text in compacted)
+    if before and after < before:
+        logger.info(f"郵件串壓縮: {before} → {after} 字元（移除 {deduplicator.dropped} 個重複段落）")
+    return compacted
+
+
+def compact_interactions(interactions: List[Dict], ltr_limit: Optional[int] = None) -> List[Dict]:
+    """壓縮已儲存互動的 content / ltr_content（供舊報告資料在送出 prompt 前使用）"""
+    if not config.THREAD_COMPACTION_CONFIG['enabled'] or not interactions:
+        return interactions
+
+    texts = [interaction.get('ltr_content') or interaction.get('content') or '' for interaction in interactions]
+    compacted = []
+    for interaction, text in zip(interactions, compact_thread(texts)):
+        compacted.append(dict(interaction, content=text[:300], ltr_content=text[:ltr_limit] if ltr_limit else text))
+    return compacted
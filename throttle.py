@@ -0,0 +1,236 @@
+"""
+自適應節流模組
+以 AIMD（加法增加、乘法減少）調整對 eService/Jira 的並行請求數：p95 延遲穩定時逐步增加，
+遇到 429/5xx 或延遲突增時減半，並遵守 Retry-After 與抖動退避重試
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 代表伺服器過載、應降低並行數並重試的 HTTP 狀態碼
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RetryableFetchError(Exception):
+    """可重試的抓取失敗（過載、逾時或連線錯誤）"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """解析 Retry-After 標頭（秒數或 HTTP 日期），無法解析時返回 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class IntervalRateLimiter:
+    """執行緒安全的速率限制（固定最小間隔，多個執行緒共用）"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """等待直到可以送出下一個請求"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class AimdController:
+    """AIMD 並行數控制器（執行緒與 asyncio 皆可使用）"""
+
+    def __init__(self, max_concurrency: int = None, initial_concurrency: int = None, name: str = "fetch"):
+        throttle_config = config.THROTTLE_CONFIG
+        self.name = name
+        self.enabled = throttle_config['enabled']
+        self.min_concurrency = throttle_config['min_concurrency']
+        self.max_concurrency = max(self.min_concurrency, max_concurrency or throttle_config['max_concurrency'])
+        initial = initial_concurrency or throttle_config['initial_concurrency']
+        self.limit = float(min(max(initial, self.min_concurrency), self.max_concurrency))
+
+        self.increase_step = throttle_config['increase_step']
+        self.decrease_factor = throttle_config['decrease_factor']
+        self.spike_ratio = throttle_config['latency_spike_ratio']
+        self.max_retries = throttle_config['max_retries']
+        self.backoff_base = throttle_config['backoff_base']
+        self.backoff_max = throttle_config['backoff_max']
+
+        self._window = deque(maxlen=throttle_config['latency_window'])
+        self._baseline_p95: Optional[float] = None
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._timer = threading.local()  # 各執行緒目前請求的計時
+
+        self.stats = {'requests': 0, 'throttled': 0, 'retries': 0, 'increases': 0, 'decreases': 0}
+
+    @property
+    def concurrency(self) -> int:
+        """目前允許的並行數"""
+        return max(self.min_concurrency, int(self.limit))
+
+    def _try_enter(self) -> float:
+        """嘗試佔用一個名額，成功返回 0，否則返回建議等待秒數"""
+        with self._condition:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                return pause
+            if self.enabled and self._in_flight >= self.concurrency:
+                return 0.05
+            self._in_flight += 1
+            return 0.0
+
+    def _leave(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """執行緒用：等待名額後執行區塊"""
+        while True:
+            wait = self._try_enter()
+            if not wait:
+                break
+            with self._condition:
+                self._condition.wait(timeout=wait)
+        try:
+            yield
+        finally:
+            self._leave()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """asyncio 用：等待名額後執行區塊"""
+        while True:
+            wait = self._try_enter()
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        try:
+            yield
+        finally:
+            self._leave()
+
+    def record(self, latency: float, status: Optional[int] = None, retry_after: Optional[float] = None):
+        """記錄一次請求結果並調整並行數（status 為 None 表示逾時或連線錯誤）"""
+        with self._condition:
+            self.stats['requests'] += 1
+
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                logger.warning(f"[{self.name}] 伺服器要求 {retry_after:.1f}s 後重試，暫停所有請求")
+
+            if status is None or status in THROTTLE_STATUS_CODES:
+                self.stats['throttled'] += 1
+                self._decrease(f"HTTP {status}" if status else "逾時/連線錯誤")
+                return
+
+            self._window.append(latency)
+            if len(self._window) < self._window.maxlen:
+                return
+
+            p95 = sorted(self._window)[int(0.95 * (len(self._window) - 1))]
+            self._window.clear()
+            if self._baseline_p95 is None:
+                self._baseline_p95 = p95
+            elif p95 > self._baseline_p95 * self.spike_ratio:
+                self._decrease(f"p95 延遲 {p95:.2f}s 高於基準 {self._baseline_p95:.2f}s")
+                return
+
+            # 延遲穩定：加法增加，基準緩慢跟隨以容忍伺服器正常波動
+            self._baseline_p95 = 0.8 * self._baseline_p95 + 0.2 * p95
+            if self.limit < self.max_concurrency:
+                self.limit = min(self.max_concurrency, self.limit + self.increase_step)
+                self.stats['increases'] += 1
+                logger.info(f"[{self.name}] p95 {p95:.2f}s 穩定，並行數提高至 {self.concurrency}")
+            self._condition.notify_all()
+
+    def _decrease(self, reason: str):
+        """乘法減少（同一批在途請求的連續失敗只減少一次）"""
+        now = time.monotonic()
+        if now - self._last_decrease < max(self._baseline_p95 or 0, 1.0):
+            return
+        self._last_decrease = now
+        self._window.clear()
+        self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+        self.stats['decreases'] += 1
+        logger.warning(f"[{self.name}] {reason}，並行數降至 {self.concurrency}")
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """第 attempt 次重試前的等待秒數（full jitter 指數退避，且不短於 Retry-After）"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+
+    def start_timer(self):
+        """開始計時本執行緒目前的請求（func 可在取得瀏覽器等資源後重新呼叫，排除等待時間）"""
+        self._timer.started = time.monotonic()
+        self._timer.stopped = None
+
+    def stop_timer(self):
+        """結束計時（func 可在收到回應、開始解析前呼叫，排除解析時間；多次呼叫時以最後一次為準）"""
+        self._timer.stopped = time.monotonic()
+
+    def _elapsed(self) -> float:
+        """目前請求的延遲：名額取得後才開始計時，已呼叫 stop_timer 時計到該時間點"""
+        return (self._timer.stopped or time.monotonic()) - self._timer.started
+
+    def call_with_retry(self, func, description: str = ""):
+        """在名額內執行 func，遇到 RetryableFetchError 時退避重試，用盡後重新拋出"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.slot():
+                    self.start_timer()
+                    try:
+                        result = func()
+                    finally:
+                        if self._timer.stopped is None:
+                            self.stop_timer()
+            except RetryableFetchError as e:
+                self.record(self._elapsed(), e.status, e.retry_after)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt, e.retry_after)
+                self.stats['retries'] += 1
+                logger.warning(f"[{self.name}] {description} 失敗（{e}），{delay:.1f}s 後第 {attempt + 1} 次重試")
+                time.sleep(delay)
+                continue
+            self.record(self._elapsed(), 200)
+            return result
+
+    def summary(self) -> str:
+        """統計摘要"""
+        return (f"並行數 {self.concurrency}/{self.max_concurrency}，請求 {self.stats['requests']} 次，"
+                f"節流 {self.stats['throttled']} 次，重試 {self.stats['retries']} 次，"
+                f"增加 {self.stats['increases']} 次，減少 {self.stats['decreases']} 次")
@@ -0,0 +1,109 @@
+"""
+Ticket 狀態儲存模組
+以 SQLite 記錄每個 ticket 的列表時間戳與互動內容雜湊，供增量掃描使用
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+class TicketStateStore:
+    """以 ticket ID 為鍵的持久化狀態儲存"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or config.SCAN_CONFIG['state_db']
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        # 平行掃描時可能由多個執行緒存取
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tickets (
+                ticket_id TEXT PRIMARY KEY,
+                list_timestamp TEXT,
+                content_hash TEXT,
+                interactions TEXT,
+                title TEXT,
+                updated_at TEXT
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def content_hash(interactions: List[Dict]) -> str:
+        """計算互動內容的雜湊值"""
+        payload = json.dumps(interactions, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, ticket_id: str) -> Optional[Dict]:
+        """讀取 ticket 的已儲存狀態"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT list_timestamp, content_hash, interactions, title, updated_at FROM tickets WHERE ticket_id = ?",
+                (ticket_id,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'ticket_id': ticket_id,
+            'list_timestamp': row[0],
+            'content_hash': row[1],
+            'interactions': json.loads(row[2]) if row[2] else [],
+            'title': row[3],
+            'updated_at': row[4],
+        }
+
+    def get_unchanged_interactions(self, ticket_id: str, list_timestamp: str) -> Optional[List[Dict]]:
+        """列表時間戳未變時返回已儲存的互動內容，否則返回 None"""
+        if not ticket_id or not list_timestamp:
+            return None
+
+        state = self.get(ticket_id)
+        if state and state['list_timestamp'] == list_timestamp:
+            return state['interactions']
+        return None
+
+    def save(self, ticket_id: str, list_timestamp: str, interactions: List[Dict], title: str = '') -> bool:
+        """儲存 ticket 狀態，返回互動內容是否與上次不同"""
+        content_hash = self.content_hash(interactions)
+        previous = self.get(ticket_id)
+        changed = not previous or previous['content_hash'] != content_hash
+
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO tickets (ticket_id, list_timestamp, content_hash, interactions, title, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(ticket_id) DO UPDATE SET
+                    list_timestamp = excluded.list_timestamp,
+                    content_hash = excluded.content_hash,
+                    interactions = excluded.interactions,
+                    title = excluded.title,
+                    updated_at = excluded.updated_at
+                """,
+                (ticket_id, list_timestamp, content_hash,
+                 json.dumps(interactions, ensure_ascii=False), title, datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+        return changed
+
+    def close(self):
+        """關閉資料庫連線"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.warning(f"關閉狀態資料庫時發生錯誤: {e}")
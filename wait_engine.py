@@ -0,0 +1,166 @@
+"""
+事件驅動等待模組
+以具體條件（URL 變化、元素數量增加、網路閒置、元素失效）取代固定的 time.sleep
+"""
+
+import time
+import logging
+from typing import Callable, Dict, List
+
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import (
+    JavascriptException, NoSuchElementException, StaleElementReferenceException, TimeoutException
+)
+
+import config
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+def _run_script(driver, script, *args):
+    """執行條件用的腳本；頁面切換中腳本被中斷時返回 None（瀏覽器已關閉等錯誤照常拋出）"""
+    try:
+        return driver.execute_script(script, *args)
+    except JavascriptException:
+        return None
+
+
+def document_ready():
+    """頁面 readyState 為 complete"""
+    def condition(driver):
+        return _run_script(driver, "return document.readyState") == "complete"
+    return condition
+
+
+def url_contains_any(*fragments):
+    """目前 URL 包含任一片段（不分大小寫）"""
+    fragments = [f.lower() for f in fragments]
+
+    def condition(driver):
+        current_url = driver.current_url.lower()
+        return current_url if any(f in current_url for f in fragments) else False
+    return condition
+
+
+def url_changes(original_url):
+    """URL 已離開原本的頁面"""
+    def condition(driver):
+        current_url = driver.current_url
+        return current_url if current_url != original_url else False
+    return condition
+
+
+def element_count_greater(css_selector, count):
+    """符合選擇器的元素數量大於 count"""
+    def condition(driver):
+        current = _run_script(driver, "return document.querySelectorAll(arguments[0]).length", css_selector)
+        return current if current is not None and current > count else False
+    return condition
+
+
+def network_idle(quiet_period=None):
+    """頁面已載入完成，且在 quiet_period 秒內沒有新的資源請求完成"""
+    quiet_period = quiet_period if quiet_period is not None else config.WAIT_CONFIG['network_quiet_period']
+    state = {'count': -1, 'since': time.monotonic()}
+    script = """
+        if (!window.__waitEngineBuffer) {
+            performance.setResourceTimingBufferSize(5000);
+            window.__waitEngineBuffer = true;
+        }
+        return [document.readyState, performance.getEntriesByType('resource').length];
+    """
+
+    def condition(driver):
+        result = _run_script(driver, script)
+        if not result:
+            return False
+        ready_state, count = result
+        now = time.monotonic()
+        if ready_state != "complete" or count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return now - state['since'] >= quiet_period
+    return condition
+
+
+def staleness_of(element):
+    """元素已從 DOM 移除（例如 load-more 按鈕被重新渲染）"""
+    return EC.staleness_of(element)
+
+
+def any_of(*conditions):
+    """任一條件成立"""
+    def condition(driver):
+        for cond in conditions:
+            result = cond(driver)
+            if result:
+                return result
+        return False
+    return condition
+
+
+class WaitEngine:
+    """等待引擎：每一步有獨立的截止時間，並記錄實際等待時間"""
+
+    def __init__(self, driver, default_timeout: float = None, poll_frequency: float = None):
+        self.driver = driver
+        self.default_timeout = default_timeout or config.WAIT_CONFIG['default_timeout']
+        self.poll_frequency = poll_frequency or config.WAIT_CONFIG['poll_frequency']
+        self.timings: List[Dict] = []
+
+    def until(self, condition: Callable, step: str, timeout: float = None):
+        """等待條件成立，逾時返回 None；瀏覽器已關閉等其他 WebDriverException 直接拋出，不等到逾時"""
+        timeout = timeout if timeout is not None else self.default_timeout
+        started = time.monotonic()
+        result = None
+        try:
+            result = WebDriverWait(
+                self.driver, timeout, poll_frequency=self.poll_frequency,
+                ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)
+            ).until(condition)
+        except TimeoutException:
+            result = None
+
+        self._record(step, started, result is not None, timeout)
+        return result
+
+    def until_plan(self, plan, step: str, timeout: float = None):
+        """等待選擇器計畫的任一備選出現（SelectorPlan.wait，命中記錄於選擇器統計），逾時返回 None"""
+        timeout = timeout if timeout is not None else self.default_timeout
+        started = time.monotonic()
+        try:
+            result = plan.wait(self.driver, timeout)
+        except TimeoutException:
+            result = None
+
+        self._record(step, started, result is not None, timeout)
+        return result
+
+    def _record(self, step: str, started: float, success: bool, timeout: float):
+        """記錄一步的等待時間"""
+        elapsed = time.monotonic() - started
+        self.timings.append({'step': step, 'seconds': round(elapsed, 3), 'success': success, 'timeout': timeout})
+        if success:
+            logger.info(f"⏱️  {step}: {elapsed:.2f}s")
+        else:
+            logger.warning(f"⏱️  {step}: 逾時 ({timeout}s)")
+
+    def total_seconds(self) -> float:
+        """所有等待的總時間"""
+        return sum(t['seconds'] for t in self.timings)
+
+    def summary(self) -> str:
+        """等待時間摘要"""
+        lines = [f"等待總計 {self.total_seconds():.2f}s ({len(self.timings)} 步)"]
+        for t in self.timings:
+            status = "✓" if t['success'] else "✗"
+            lines.append(f"  {status} {t['step']}: {t['seconds']:.2f}s")
+        return "\n".join(lines)
+
+    def reset(self):
+        """清除已記錄的等待時間"""
+        self.timings = []
+